@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import subprocess
+import sys
+
+# modules that should only be imported once the functions needing them are used
+LAZY_MODULES = ['matplotlib', 'scipy']
+
+# generous upper limit on the time taken by `import covid`, in seconds
+MAX_IMPORT_TIME = 1.0
+
+check = f"""
+import sys, time
+start = time.perf_counter()
+import covid
+elapsed = time.perf_counter() - start
+loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+covid.get_data
+print(elapsed)
+print(','.join(loaded))
+covid.plot_bay_cases
+assert 'matplotlib.pyplot' in sys.modules
+"""
+
+output = subprocess.run(
+    [sys.executable, '-c', check], check=True, capture_output=True, text=True,
+).stdout.splitlines()
+
+elapsed = float(output[0])
+loaded = [m for m in output[1].split(',') if m]
+
+print(f"import covid took {elapsed:.3f} s")
+
+if loaded:
+    sys.exit(f"import covid imported {', '.join(loaded)}, which should be imported lazily.")
+if elapsed > MAX_IMPORT_TIME:
+    sys.exit(f"import covid took longer than {MAX_IMPORT_TIME} s.")
@@ -0,0 +1,183 @@
+"""
+Benchmarks of the loading, aggregation, smoothing, and plotting of the
+`covid` package, on synthetic data with the schemas of the JHU and
+NY Times datasets. Run with `asv run` from the top-level directory of
+the repo, see https://asv.readthedocs.io.
+
+"""
+
+import os
+import tempfile
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import covid
+import covid._io
+
+from .synthetic import write_synthetic_data
+
+
+SIZES = {
+    'small': (300, 200),
+    'large': (3300, 1100),
+}
+DATA_SOURCES = ['jhu', 'nytimes']
+
+
+def _use_synthetic_data(size):
+    """
+    Hidden function for pointing the `covid` package to the synthetic data
+    of the given size, which is generated on first use, with an empty
+    cache directory.
+
+    """
+
+    ncounties, ndates = SIZES[size]
+    root = os.path.join(tempfile.gettempdir(), 'covid-benchmarks', f'{ncounties}x{ndates}')
+
+    if not os.path.exists(os.path.join(root, 'data')):
+        write_synthetic_data(root, ncounties=ncounties, ndates=ndates)
+
+    covid._io.FILE_PATH = root
+    os.environ['COVID_CACHE_DIR'] = tempfile.mkdtemp(prefix='covid-benchmarks-cache-')
+    covid.clear_cache()
+
+
+class Load:
+    params = [list(SIZES), DATA_SOURCES]
+    param_names = ['size', 'data_source']
+    timeout = 300
+
+    def setup(self, size, data_source):
+        _use_synthetic_data(size)
+
+    def time_get_data(self, size, data_source):
+        covid.get_data(data_source, use_cache=False)
+
+    def peakmem_get_data(self, size, data_source):
+        covid.get_data(data_source, use_cache=False)
+
+
+class CachedLoad:
+    params = [list(SIZES), DATA_SOURCES]
+    param_names = ['size', 'data_source']
+    timeout = 300
+
+    def setup(self, size, data_source):
+        _use_synthetic_data(size)
+        # fills the on-disk cache, the in-process cache is cleared by each run
+        covid.get_data(data_source)
+
+    def time_get_data_disk_cache(self, size, data_source):
+        covid.clear_cache()
+        covid.get_data(data_source)
+
+    def time_get_data_memory_cache(self, size, data_source):
+        covid.get_data(data_source)
+
+
+class BayAggregation:
+    params = [list(SIZES), DATA_SOURCES]
+    param_names = ['size', 'data_source']
+    timeout = 300
+
+    def setup(self, size, data_source):
+        _use_synthetic_data(size)
+
+    def time_get_bay_data(self, size, data_source):
+        covid.get_bay_data(data_source, use_cache=False)
+
+    def time_get_bay_data_cached(self, size, data_source):
+        covid.get_bay_data(data_source)
+
+    def peakmem_get_bay_data(self, size, data_source):
+        covid.get_bay_data(data_source, use_cache=False)
+
+
+class Smoothing:
+    params = [list(SIZES), DATA_SOURCES]
+    param_names = ['size', 'data_source']
+    timeout = 300
+
+    def setup(self, size, data_source):
+        _use_synthetic_data(size)
+        self.cases = covid.get_cube(data_source, metric='cases')[0]
+        self.deaths = covid.get_cube(data_source, metric='deaths')[0]
+
+    def time_derive_metrics(self, size, data_source):
+        covid.derive_metrics(self.cases, self.deaths)
+
+    def time_estimate_rt(self, size, data_source):
+        covid.estimate_rt(self.cases)
+
+
+class CompareSources:
+    params = [list(SIZES)]
+    param_names = ['size']
+    timeout = 300
+
+    def setup(self, size):
+        _use_synthetic_data(size)
+        # the datasets are loaded beforehand, so that only the join is timed
+        covid.get_cube('jhu')
+        covid.get_cube('nytimes')
+
+    def time_compare_sources(self, size):
+        covid.compare_sources()
+
+    def peakmem_compare_sources(self, size):
+        covid.compare_sources()
+
+
+class Decimation:
+    params = [list(SIZES), ['lttb', 'minmax']]
+    param_names = ['size', 'method']
+    timeout = 300
+
+    def setup(self, size, method):
+        _use_synthetic_data(size)
+        self.cases = np.nan_to_num(covid.get_cube('nytimes', metric='cases')[0])
+
+    def time_decimate_series(self, size, method):
+        covid.decimate_series(self.cases, 100, method=method)
+
+
+class Plots:
+    params = [list(SIZES), [True, False], [True, False]]
+    param_names = ['size', 'cumulative', 'groupcounties']
+    timeout = 300
+
+    def setup(self, size, cumulative, groupcounties):
+        _use_synthetic_data(size)
+        # the data are loaded beforehand, so that only the plotting is timed
+        covid.get_bay_data('jhu')
+        covid.get_cube('jhu', metric='cases', county=covid._io.BAYAREA_COUNTIES)
+
+    def teardown(self, size, cumulative, groupcounties):
+        plt.close('all')
+
+    def time_plot_bay_cases(self, size, cumulative, groupcounties):
+        covid.plot_bay_cases(
+            cumulative=cumulative, cases=True, deaths=True, groupcounties=groupcounties,
+        )
+
+
+class CountyTemplate:
+    params = [list(SIZES), [True, False]]
+    param_names = ['size', 'cumulative']
+    timeout = 300
+
+    def setup(self, size, cumulative):
+        _use_synthetic_data(size)
+        self.template = covid.make_county_template(cumulative=cumulative, cases=True, deaths=True)
+        self.template['fig'].canvas.draw()
+        self.dates = self.template['county_data'][3]
+
+    def teardown(self, size, cumulative):
+        plt.close('all')
+
+    def time_update_and_draw(self, size, cumulative):
+        covid.update_county_template(self.template, end=self.dates[len(self.dates) // 2])
+        self.template['fig'].canvas.draw()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Generator of synthetic COVID-19 source files, with the same layout and
+schemas as the JHU and NY Times datasets, for benchmarking without the
+data submodules.
+
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+
+__all__ = [
+    'write_synthetic_data',
+]
+
+BAYAREA_COUNTIES = [
+    'Alameda',
+    'Contra Costa',
+    'Marin',
+    'Napa',
+    'San Francisco',
+    'San Mateo',
+    'Santa Clara',
+    'Solano',
+    'Sonoma',
+]
+STATES = [
+    'Alabama', 'Arizona', 'Colorado', 'Florida', 'Georgia', 'Illinois', 'Michigan',
+    'Nevada', 'New York', 'Ohio', 'Oregon', 'Texas', 'Virginia', 'Washington',
+]
+JHU_DIR = 'data/jhu/csse_covid_19_data/csse_covid_19_time_series'
+NYTIMES_DIR = 'data/nytimes'
+START_DATE = '2020-01-22'
+
+
+def _cumulative_counts(rng, starts, ndates, rate):
+    """
+    Hidden function for generating cumulative counts with shape
+    (regions, dates), which are zero before the start date of each region.
+
+    """
+
+    daily = rng.poisson(rate, size=(len(starts), ndates))
+    daily[np.arange(ndates) < starts[:, np.newaxis]] = 0
+
+    return np.cumsum(daily, axis=1)
+
+def write_synthetic_data(root, ncounties=3300, ndates=1100, ncountries=280, seed=0):
+    """
+    Function for writing synthetic JHU and NY Times source files to
+    `root`, in the layout expected by the `covid` package, i.e. `root`
+    can be used in place of the `covid` package directory.
+
+    Parameters
+    ----------
+    root : str
+        The directory to write the `data` directory to.
+    ncounties : int, optional
+        The number of US counties, which always include the Bay Area
+        counties. Default is 3300, about the size of the JHU dataset.
+    ndates : int, optional
+        The number of daily dates, starting on 2020-01-22. Default is
+        1100, about the length of the JHU dataset.
+    ncountries : int, optional
+        The number of regions in the JHU global files. Default is 280.
+    seed : int, optional
+        The seed of the random number generator. Default is 0.
+
+    """
+
+    rng = np.random.default_rng(seed)
+
+    dates = pd.date_range(START_DATE, periods=ndates)
+    jhu_dates = [f"{d.month}/{d.day}/{d.strftime('%y')}" for d in dates]
+
+    ncounties = max(ncounties, len(BAYAREA_COUNTIES))
+    counties = BAYAREA_COUNTIES + [f'County {ii}' for ii in range(ncounties - len(BAYAREA_COUNTIES))]
+    states = ['California'] * len(BAYAREA_COUNTIES) + [
+        STATES[ii % len(STATES)] for ii in range(ncounties - len(BAYAREA_COUNTIES))
+    ]
+    fips = 6001 + 2 * np.arange(ncounties)
+
+    # each county starts reporting within the first tenth of the dates
+    starts = rng.integers(0, max(ndates // 10, 1), size=ncounties)
+    cases = _cumulative_counts(rng, starts, ndates, 20)
+    deaths = cases // 50
+
+    os.makedirs(os.path.join(root, JHU_DIR), exist_ok=True)
+    os.makedirs(os.path.join(root, NYTIMES_DIR), exist_ok=True)
+
+    for datatype, values in [('confirmed', cases), ('deaths', deaths)]:
+        jhu_us = pd.DataFrame({
+            'UID': 84000000 + fips,
+            'iso2': 'US',
+            'iso3': 'USA',
+            'code3': 840,
+            'FIPS': fips.astype(np.float64),
+            'Admin2': counties,
+            'Province_State': states,
+            'Country_Region': 'US',
+            'Lat': rng.uniform(25, 50, size=ncounties),
+            'Long_': rng.uniform(-125, -65, size=ncounties),
+            'Combined_Key': [f'{c}, {s}, US' for c, s in zip(counties, states)],
+        })
+        if datatype == 'deaths':
+            jhu_us['Population'] = rng.integers(1000, 1000000, size=ncounties)
+        jhu_us = pd.concat([jhu_us, pd.DataFrame(values, columns=jhu_dates)], axis=1)
+        jhu_us.to_csv(
+            os.path.join(root, JHU_DIR, f'time_series_covid19_{datatype}_US.csv'), index=False,
+        )
+
+    countries = [f'Country {ii // 2}' for ii in range(ncountries)]
+    provinces = [f'Province {ii}' if ii % 2 else None for ii in range(ncountries)]
+    global_cases = _cumulative_counts(
+        rng, rng.integers(0, max(ndates // 10, 1), size=ncountries), ndates, 200,
+    )
+
+    for datatype, values in [
+        ('confirmed', global_cases), ('deaths', global_cases // 50), ('recovered', global_cases // 2),
+    ]:
+        jhu_global = pd.DataFrame({
+            'Province/State': provinces,
+            'Country/Region': countries,
+            'Lat': rng.uniform(-60, 70, size=ncountries),
+            'Long': rng.uniform(-180, 180, size=ncountries),
+        })
+        jhu_global = pd.concat([jhu_global, pd.DataFrame(values, columns=jhu_dates)], axis=1)
+        jhu_global.to_csv(
+            os.path.join(root, JHU_DIR, f'time_series_covid19_{datatype}_global.csv'), index=False,
+        )
+
+    # the NY Times rows are ordered by date, and a county only has rows
+    # from the date on which it starts reporting
+    county_idx, date_idx = np.nonzero(np.arange(ndates) >= starts[:, np.newaxis])
+    order = np.lexsort((county_idx, date_idx))
+    county_idx = county_idx[order]
+    date_idx = date_idx[order]
+
+    nytimes = pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d')[date_idx],
+        'county': np.array(counties, dtype=object)[county_idx],
+        'state': np.array(states, dtype=object)[county_idx],
+        'fips': fips[county_idx],
+        'cases': cases[county_idx, date_idx],
+        'deaths': deaths[county_idx, date_idx],
+    })
+    nytimes.to_csv(os.path.join(root, NYTIMES_DIR, 'us-counties.csv'), index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=write_synthetic_data.__doc__.split('\n\n')[0])
+    parser.add_argument('root', help="The directory to write the data directory to.")
+    parser.add_argument('--ncounties', type=int, default=3300)
+    parser.add_argument('--ndates', type=int, default=1100)
+    parser.add_argument('--ncountries', type=int, default=280)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_data(
+        args.root,
+        ncounties=args.ncounties,
+        ndates=args.ndates,
+        ncountries=args.ncountries,
+        seed=args.seed,
+    )
@@ -1,2 +1,49 @@
+import importlib
+
 from ._io import *
-from ._plot import *
+from ._cache import *
+from ._instrument import *
+from ._ingest import *
+from ._incremental import *
+from ._stream import *
+from ._regions import *
+from ._shared import *
+from ._server import *
+from ._metrics import *
+from ._rolling import *
+from ._decimate import *
+from ._html import *
+from ._compare import *
+from ._rt import *
+
+# the plotting functions are only imported when first used, as importing
+# matplotlib is much slower than the rest of the package
+_LAZY_MODULES = {
+    'plot_bay_cases': '._plot',
+    'make_county_template': '._plot',
+    'update_county_template': '._plot',
+    'animate_county_cases': '._plot',
+    'render_figures': '._plot',
+}
+
+# the public names of every module, including the lazily imported ones,
+# so that `from covid import *` still exports the plotting functions
+__all__ = [
+    name
+    for module in [
+        _io, _cache, _instrument, _ingest, _incremental, _stream, _regions, _shared,
+        _server, _metrics, _rolling, _decimate, _html, _compare, _rt,
+    ]
+    for name in module.__all__
+] + list(_LAZY_MODULES)
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        value = getattr(importlib.import_module(_LAZY_MODULES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
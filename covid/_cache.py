@@ -0,0 +1,537 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from ._instrument import _stage
+
+
+__all__ = [
+    'get_cache_dir',
+    'clear_disk_cache',
+    'clear_cache',
+    'set_cache_size',
+]
+
+_CACHE_VERSION = 3
+_HASH_CHUNK_SIZE = 1 << 20
+
+_MEMORY_CACHE = OrderedDict()
+_MEMORY_CACHE_LOCK = threading.RLock()
+_MEMORY_CACHE_MAXSIZE = 4
+
+# the rolling statistics of `get_rolling_data`, keyed on the dataset and
+# the parameters of the statistics, bounded by the same maximum size
+_ROLLING_CACHE = OrderedDict()
+
+_ATTACHED_DATASETS = {}
+
+
+def get_cache_dir():
+    """
+    Function for returning the directory used for the on-disk cache of
+    parsed COVID-19 datasets.
+
+    Returns
+    -------
+    cache_dir : str
+        The cache directory. This is the value of the `COVID_CACHE_DIR`
+        environment variable if set, otherwise `~/.cache/covid`.
+
+    """
+
+    cache_dir = os.environ.get('COVID_CACHE_DIR')
+    if not cache_dir:
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'covid')
+
+    return cache_dir
+
+def clear_disk_cache():
+    """
+    Function for deleting every cached dataset from the on-disk cache.
+
+    """
+
+    shutil.rmtree(get_cache_dir(), ignore_errors=True)
+
+def clear_cache(key=None):
+    """
+    Function for clearing the in-process cache of loaded datasets.
+
+    Parameters
+    ----------
+    key : str, NoneType, optional
+        The cached dataset to remove, e.g. "jhu" or "nytimes", including
+        any region selections loaded from it and its rolling statistics
+        (see `get_rolling_data`). If set to None (default), then every
+        cached dataset is removed.
+
+    """
+
+    _clear_memoized(key)
+    _clear_rolling(key)
+
+def set_cache_size(maxsize):
+    """
+    Function for setting the maximum number of datasets held in the
+    in-process cache, and of rolling statistics held by
+    `get_rolling_data`. When the cache is full, the least recently used
+    dataset is evicted.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of cached datasets. Setting this to 0
+        disables the in-process cache.
+
+    """
+
+    global _MEMORY_CACHE_MAXSIZE
+
+    if maxsize < 0:
+        raise ValueError("maxsize should be a non-negative integer.")
+
+    with _MEMORY_CACHE_LOCK:
+        _MEMORY_CACHE_MAXSIZE = maxsize
+        while len(_MEMORY_CACHE) > _MEMORY_CACHE_MAXSIZE:
+            _MEMORY_CACHE.popitem(last=False)
+        while len(_ROLLING_CACHE) > _MEMORY_CACHE_MAXSIZE:
+            _ROLLING_CACHE.popitem(last=False)
+
+def _clear_memoized(key=None):
+    """
+    Hidden function for removing the dataset `key` and any region
+    selections loaded from it, or every dataset if None, from the
+    in-process cache.
+
+    """
+
+    with _MEMORY_CACHE_LOCK:
+        if key is None:
+            _MEMORY_CACHE.clear()
+        else:
+            for k in list(_MEMORY_CACHE):
+                if k == key or (isinstance(k, tuple) and k[0] == key):
+                    del _MEMORY_CACHE[k]
+
+def _clear_rolling(key=None):
+    """
+    Hidden function for removing the rolling statistics of the dataset
+    `key`, or of every dataset if None, from the in-process cache.
+
+    """
+
+    with _MEMORY_CACHE_LOCK:
+        if key is None:
+            _ROLLING_CACHE.clear()
+        else:
+            for k in list(_ROLLING_CACHE):
+                if k[0] == key:
+                    del _ROLLING_CACHE[k]
+
+def _pop_rolling(key):
+    """
+    Hidden function for removing and returning the rolling statistics
+    `key` from the in-process cache, or None if they are not cached, so
+    that the caller can extend them in place before storing them again.
+
+    """
+
+    with _MEMORY_CACHE_LOCK:
+        return _ROLLING_CACHE.pop(key, None)
+
+def _store_rolling(key, entry):
+    """
+    Hidden function for storing the rolling statistics `key` in the
+    in-process cache, evicting the least recently used ones when full.
+
+    """
+
+    with _MEMORY_CACHE_LOCK:
+        if _MEMORY_CACHE_MAXSIZE > 0:
+            _ROLLING_CACHE[key] = entry
+            while len(_ROLLING_CACHE) > _MEMORY_CACHE_MAXSIZE:
+                _ROLLING_CACHE.popitem(last=False)
+
+def _readonly_dataset(dataset):
+    """
+    Hidden function for making the metric arrays of a dataset read-only,
+    so that they can be safely shared between callers.
+
+    """
+
+    regions, dates, metrics = dataset
+    for values in metrics.values():
+        if values.flags.writeable:
+            values.flags.writeable = False
+
+    return regions, dates, metrics
+
+def _shared_dataset(dataset):
+    """
+    Hidden function for returning a copy of a cached dataset for a caller.
+    The read-only metric arrays and the immutable dates are shared with
+    the cache, while the small region metadata table is copied, so that
+    callers cannot corrupt the cached dataset.
+
+    """
+
+    regions, dates, metrics = dataset
+
+    return regions.copy(), dates, dict(metrics)
+
+def _attached_dataset(name):
+    """
+    Hidden function for returning the dataset `name` attached with
+    `attach_shared`, shared with the caller as by the in-process cache,
+    or None if it is not attached.
+
+    """
+
+    with _MEMORY_CACHE_LOCK:
+        dataset = _ATTACHED_DATASETS.get(name)
+
+    if dataset is None:
+        return None
+
+    return _shared_dataset(dataset)
+
+def _memoized_dataset(key):
+    """
+    Hidden function for returning the dataset `key` from the in-process
+    LRU cache, or None if it is not cached.
+
+    """
+
+    with _MEMORY_CACHE_LOCK:
+        if key not in _MEMORY_CACHE:
+            return None
+        _MEMORY_CACHE.move_to_end(key)
+        return _shared_dataset(_MEMORY_CACHE[key])
+
+def _memoized(key, loader):
+    """
+    Hidden function for returning the dataset produced by `loader` from
+    the in-process LRU cache, calling `loader` and caching its result on
+    a miss.
+
+    """
+
+    dataset = _memoized_dataset(key)
+    if dataset is not None:
+        return dataset
+
+    dataset = _readonly_dataset(loader())
+
+    with _MEMORY_CACHE_LOCK:
+        if _MEMORY_CACHE_MAXSIZE > 0:
+            _MEMORY_CACHE[key] = dataset
+            _MEMORY_CACHE.move_to_end(key)
+            while len(_MEMORY_CACHE) > _MEMORY_CACHE_MAXSIZE:
+                _MEMORY_CACHE.popitem(last=False)
+
+    return _shared_dataset(dataset)
+
+def _hash_file(path):
+    """
+    Hidden function for computing the SHA-256 hash of a file.
+
+    """
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+def _stat_files(paths):
+    """
+    Hidden function for getting the size and modification time of each
+    source file.
+
+    """
+
+    stats = []
+    for p in paths:
+        st = os.stat(p)
+        stats.append({'path': p, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns})
+
+    return stats
+
+def _fingerprint_key(files):
+    """
+    Hidden function for turning the per-file fingerprints into a single
+    cache key.
+
+    """
+
+    sha = hashlib.sha256(f"v{_CACHE_VERSION}".encode())
+    for f in files:
+        sha.update(f"{os.path.basename(f['path'])}:{f['size']}:{f['sha256']}".encode())
+
+    return sha.hexdigest()[:16]
+
+def _read_manifest(name):
+    """
+    Hidden function for reading the manifest of a cached dataset, returning
+    None if it does not exist or cannot be read.
+
+    """
+
+    try:
+        with open(os.path.join(get_cache_dir(), f"{name}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_manifest(name, manifest):
+    """
+    Hidden function for atomically writing the manifest of a cached dataset.
+
+    """
+
+    cache_dir = get_cache_dir()
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.json.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(cache_dir, f"{name}.json"))
+
+def _fingerprint(name, paths):
+    """
+    Hidden function for fingerprinting the source files of a dataset.
+    Files whose size and modification time match the stored manifest
+    reuse the stored hash, so that the files only need to be re-hashed
+    when they appear to have changed.
+
+    """
+
+    manifest = _read_manifest(name)
+    known = {}
+    if manifest is not None:
+        known = {f['path']: f for f in manifest.get('files', [])}
+
+    files = _stat_files(paths)
+    for f in files:
+        old = known.get(f['path'])
+        if old is not None and old['size'] == f['size'] and old['mtime_ns'] == f['mtime_ns']:
+            f['sha256'] = old['sha256']
+        else:
+            f['sha256'] = _hash_file(f['path'])
+
+    return files, manifest
+
+def _save_frame(directory, df):
+    """
+    Hidden function for saving a DataFrame as one `.npy` file per column.
+    Object columns are stored as integer codes plus a small table of
+    unique values, so that the bulk of the data can be memory-mapped.
+
+    """
+
+    columns = []
+    for ii, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            codes, uniques = pd.factorize(values)
+            np.save(os.path.join(directory, f"{ii}.codes.npy"), codes.astype(np.int32))
+            np.save(
+                os.path.join(directory, f"{ii}.uniques.npy"),
+                np.asarray(uniques, dtype=object),
+                allow_pickle=True,
+            )
+            columns.append({'name': col, 'kind': 'codes'})
+        else:
+            np.save(os.path.join(directory, f"{ii}.npy"), values)
+            columns.append({'name': col, 'kind': 'array'})
+
+    with open(os.path.join(directory, 'columns.json'), 'w') as f:
+        json.dump(columns, f)
+
+def _load_frame(directory):
+    """
+    Hidden function for loading a DataFrame saved by `_save_frame`, with
+    the column data memory-mapped from disk.
+
+    """
+
+    with open(os.path.join(directory, 'columns.json')) as f:
+        columns = json.load(f)
+
+    data = {}
+    for ii, col in enumerate(columns):
+        if col['kind'] == 'codes':
+            codes = np.load(os.path.join(directory, f"{ii}.codes.npy"), mmap_mode='r')
+            uniques = np.load(os.path.join(directory, f"{ii}.uniques.npy"), allow_pickle=True)
+            # the object dtype is kept explicitly, as Pandas 3 otherwise
+            # infers a string dtype that differs from the freshly read columns
+            values = pd.Series(np.append(uniques, np.nan).astype(object)[codes], dtype=object)
+        else:
+            values = np.load(os.path.join(directory, f"{ii}.npy"), mmap_mode='r')
+        data[col['name']] = values
+
+    return pd.DataFrame(data, copy=False)
+
+def _save_dataset(directory, dataset):
+    """
+    Hidden function for saving a dataset, i.e. the region metadata, the
+    dates, and the 2-D metric arrays, as `.npy` files in `directory`.
+
+    """
+
+    regions, dates, metrics = dataset
+
+    os.mkdir(os.path.join(directory, 'regions'))
+    _save_frame(os.path.join(directory, 'regions'), regions)
+    np.save(os.path.join(directory, 'dates.npy'), dates.to_numpy())
+    for metric, values in metrics.items():
+        np.save(os.path.join(directory, f"{metric}.npy"), np.ascontiguousarray(values))
+
+    with open(os.path.join(directory, 'metrics.json'), 'w') as f:
+        json.dump(list(metrics), f)
+
+def _load_dataset(directory):
+    """
+    Hidden function for loading a dataset saved by `_save_dataset`, with
+    the metric arrays memory-mapped from disk.
+
+    """
+
+    with open(os.path.join(directory, 'metrics.json')) as f:
+        metric_names = json.load(f)
+
+    regions = _load_frame(os.path.join(directory, 'regions'))
+    dates = pd.DatetimeIndex(np.load(os.path.join(directory, 'dates.npy')))
+    metrics = {
+        m: np.load(os.path.join(directory, f"{m}.npy"), mmap_mode='r') for m in metric_names
+    }
+
+    return regions, dates, metrics
+
+def _is_cached(name, paths):
+    """
+    Hidden function for checking whether the dataset `name` is in the
+    in-process cache, or in the on-disk cache and up to date with the
+    source files in `paths`.
+
+    """
+
+    with _MEMORY_CACHE_LOCK:
+        if name in _MEMORY_CACHE:
+            return True
+
+    files, manifest = _fingerprint(name, paths)
+    if manifest is None or manifest.get('key') != _fingerprint_key(files):
+        return False
+
+    return os.path.isdir(os.path.join(get_cache_dir(), f"{name}-{manifest['key']}"))
+
+def _store_dataset(name, files, dataset, extra=None):
+    """
+    Hidden function for writing a dataset to the on-disk cache, keyed on
+    the fingerprints `files` of its source files, and removing any older
+    cached versions of it. Any `extra` information is stored in the
+    manifest. Returns False if the cache directory is not writable.
+
+    """
+
+    key = _fingerprint_key(files)
+    cache_dir = get_cache_dir()
+    entry = os.path.join(cache_dir, f"{name}-{key}")
+
+    tmp_entry = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_entry = tempfile.mkdtemp(dir=cache_dir, prefix=f".{name}-")
+        _save_dataset(tmp_entry, dataset)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_entry, entry)
+        _write_manifest(name, dict(extra or {}, key=key, files=files))
+    except OSError:
+        # the cache is an optimization only, an unwritable cache
+        # directory should not prevent loading the data
+        if tmp_entry is not None:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        return False
+
+    for stale in os.listdir(cache_dir):
+        if stale.startswith(f"{name}-") and stale != os.path.basename(entry):
+            shutil.rmtree(os.path.join(cache_dir, stale), ignore_errors=True)
+
+    return True
+
+def _load_stored_dataset(name):
+    """
+    Hidden function for loading the manifest and the dataset most recently
+    written to the on-disk cache for `name`, whether or not the source
+    files have changed since. Returns None for both if there is none.
+
+    """
+
+    manifest = _read_manifest(name)
+    if manifest is None:
+        return None, None
+
+    try:
+        dataset = _load_dataset(os.path.join(get_cache_dir(), f"{name}-{manifest['key']}"))
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+    return manifest, dataset
+
+def _replace_memoized(key, dataset):
+    """
+    Hidden function for replacing the dataset `key` in the in-process
+    cache, discarding any region selections loaded from the old version.
+    Its rolling statistics are kept, so that they can be extended to the
+    new dates.
+
+    """
+
+    _clear_memoized(key)
+
+    with _MEMORY_CACHE_LOCK:
+        if _MEMORY_CACHE_MAXSIZE > 0:
+            _MEMORY_CACHE[key] = _readonly_dataset(dataset)
+            while len(_MEMORY_CACHE) > _MEMORY_CACHE_MAXSIZE:
+                _MEMORY_CACHE.popitem(last=False)
+
+def _cached_dataset(name, paths, loader):
+    """
+    Hidden function for returning the dataset produced by `loader`,
+    reading it from the on-disk cache if the source files in `paths`
+    have not changed since it was cached. On a cache miss, `loader` is
+    called and its result is written to the cache.
+
+    """
+
+    with _stage('fingerprint_files', detail=name):
+        files, manifest = _fingerprint(name, paths)
+    key = _fingerprint_key(files)
+    entry = os.path.join(get_cache_dir(), f"{name}-{key}")
+
+    if manifest is not None and manifest.get('key') == key and os.path.isdir(entry):
+        try:
+            with _stage('load_disk_cache', detail=name) as stats:
+                dataset = _load_dataset(entry)
+                stats['rows_out'] = len(dataset[0])
+        except (OSError, ValueError, KeyError):
+            pass
+        else:
+            if manifest['files'] != files:
+                try:
+                    _write_manifest(name, dict(manifest, files=files))
+                except OSError:
+                    pass
+            return dataset
+
+    dataset = loader()
+    with _stage('store_disk_cache', detail=name, rows_in=len(dataset[0])):
+        _store_dataset(name, files, dataset)
+
+    return dataset
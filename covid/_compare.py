@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from ._io import _load_cube
+
+
+__all__ = [
+    'compare_sources',
+]
+
+COMPARE_METRICS = ['cases', 'deaths']
+COMPARE_SOURCES = ['jhu', 'nytimes']
+
+# the date of a key is stored in its lowest bits, as days since 1970-01-01
+_DATE_BITS = 20
+
+
+def _source_keys(data_source, use_cache):
+    """
+    Hidden function for returning the sorted unique (fips, date) keys of
+    the reported values of a dataset, the values of each metric for each
+    key, and the region metadata of each fips code.
+
+    """
+
+    regions, dates, metrics = _load_cube(data_source, use_cache=use_cache)
+
+    fips = regions['fips'].to_numpy(dtype=np.float64)
+    rows = np.flatnonzero(~np.isnan(fips))
+    # with the regions sorted by fips code, the keys are built already sorted
+    rows = rows[np.argsort(fips[rows], kind='stable')]
+    days = dates.values.astype('datetime64[D]').astype(np.int64)
+
+    region_keys = fips[rows].astype(np.int64) << _DATE_BITS
+    reported = ~np.isnan(metrics['cases'][rows])
+    row_index, date_index = np.nonzero(reported)
+    keys = region_keys[row_index] + days[date_index]
+    values = {m: metrics[m][rows[row_index], date_index] for m in COMPARE_METRICS}
+
+    # regions sharing a fips code are summed
+    if len(keys) > 1 and not (np.diff(keys) > 0).all():
+        keys, inverse = np.unique(keys, return_inverse=True)
+        values = {
+            m: np.bincount(inverse, weights=v, minlength=len(keys)) for m, v in values.items()
+        }
+
+    names = regions.iloc[rows][['fips', 'county', 'state']].drop_duplicates('fips')
+
+    return keys, values, names
+
+def compare_sources(tolerance=0, use_cache=True):
+    """
+    Function for comparing the cumulative cases and deaths of each US
+    county between the John Hopkins University and the NY Times
+    datasets, matching the counties by their fips codes.
+
+    Parameters
+    ----------
+    tolerance : float, optional
+        The absolute difference between the datasets above which values
+        are reported as discrepancies. Default is 0, i.e. every
+        difference is reported.
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed datasets. Default is True.
+
+    Returns
+    -------
+    discrepancies : Pandas.DataFrame
+        The values of each county on each date on which the datasets
+        differ by more than `tolerance`, or on which only one of them has
+        reported data, with the columns "fips", "county", "state",
+        "date", and, for both cases and deaths, the values of each
+        dataset (e.g. "cases_jhu" and "cases_nytimes", NaN if not
+        reported) and their difference (e.g. "cases_diff", JHU minus NY
+        Times).
+    summary : Pandas.DataFrame
+        The summary of the comparison of each county, indexed by fips
+        code, with the columns "county", "state", "dates_both",
+        "dates_jhu_only", and "dates_nytimes_only" (the number of dates
+        reported by both or only one of the datasets), "discrepancies"
+        (the number of dates on which they differ by more than
+        `tolerance`), and, for both cases and deaths, the mean and
+        maximum absolute differences (e.g. "cases_mean_abs_diff" and
+        "cases_max_abs_diff") and the difference on the last date
+        reported by both (e.g. "cases_last_diff"), which are NaN if no
+        date is reported by both.
+
+    Notes
+    -----
+    Each reported value is identified by a single int64 key encoding its
+    fips code and date, so that the datasets are joined by merging their
+    sorted keys in one vectorized pass. Regions without a fips code,
+    e.g. New York City in the NY Times dataset, and the JHU countries
+    are not compared. The county and state names are taken from the JHU
+    dataset when available.
+
+    """
+
+    keys = {}
+    values = {}
+    names = []
+    for data_source in COMPARE_SOURCES:
+        keys[data_source], values[data_source], source_names = _source_keys(data_source, use_cache)
+        names.append(source_names)
+
+    # outer join of the sorted keys, merging them with a stable sort, which
+    # takes linear time for two sorted runs
+    merged = np.concatenate([keys[s] for s in COMPARE_SOURCES])
+    order = np.argsort(merged, kind='stable')
+    merged = merged[order]
+    new_key = np.ones(len(merged), dtype=bool)
+    new_key[1:] = merged[1:] != merged[:-1]
+    joined = merged[new_key]
+
+    # the position of each key of each dataset in the joined keys
+    positions = np.empty(len(merged), dtype=np.intp)
+    positions[order] = np.cumsum(new_key) - 1
+    positions = np.split(positions, [len(keys[COMPARE_SOURCES[0]])])
+    del merged, order, new_key
+
+    present = {}
+    columns = {}
+    for data_source, source_positions in zip(COMPARE_SOURCES, positions):
+        present[data_source] = np.zeros(len(joined), dtype=bool)
+        present[data_source][source_positions] = True
+        for metric in COMPARE_METRICS:
+            column = np.full(len(joined), np.nan)
+            column[source_positions] = values[data_source][metric]
+            columns[f'{metric}_{data_source}'] = column
+    # the keys and values of each dataset are no longer needed
+    del keys, values
+
+    both = present['jhu'] & present['nytimes']
+    differs = ~both
+    for metric in COMPARE_METRICS:
+        columns[f'{metric}_diff'] = columns[f'{metric}_jhu'] - columns[f'{metric}_nytimes']
+        with np.errstate(invalid='ignore'):
+            differs |= both & ~(np.abs(columns[f'{metric}_diff']) <= tolerance)
+
+    fips = joined >> _DATE_BITS
+
+    names = pd.concat(names).drop_duplicates('fips').set_index('fips')
+    names.index = names.index.astype(np.int64)
+
+    # the keys are sorted, so the dates of each county are contiguous
+    new_region = np.ones(len(fips), dtype=bool)
+    new_region[1:] = fips[1:] != fips[:-1]
+    starts = np.flatnonzero(new_region)
+    region_fips = fips[starts]
+    group = np.cumsum(new_region) - 1
+
+    summary = names.reindex(region_fips)
+    summary.index.name = 'fips'
+    summary['dates_both'] = np.bincount(group, weights=both, minlength=len(region_fips)).astype(np.int64)
+    summary['dates_jhu_only'] = np.bincount(
+        group, weights=present['jhu'] & ~both, minlength=len(region_fips),
+    ).astype(np.int64)
+    summary['dates_nytimes_only'] = np.bincount(
+        group, weights=present['nytimes'] & ~both, minlength=len(region_fips),
+    ).astype(np.int64)
+    summary['discrepancies'] = np.bincount(
+        group, weights=differs, minlength=len(region_fips),
+    ).astype(np.int64)
+
+    last_both = np.maximum.reduceat(np.where(both, np.arange(len(joined)), -1), starts)
+    has_both = last_both >= 0
+    ndates = summary['dates_both'].to_numpy()
+    for metric in COMPARE_METRICS:
+        absdiff = np.abs(columns[f'{metric}_diff'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            summary[f'{metric}_mean_abs_diff'] = np.bincount(
+                group, weights=np.nan_to_num(absdiff), minlength=len(region_fips),
+            ) / np.where(ndates > 0, ndates, np.nan)
+        summary[f'{metric}_max_abs_diff'] = np.fmax.reduceat(absdiff, starts)
+        summary[f'{metric}_last_diff'] = np.where(
+            has_both, columns[f'{metric}_diff'][np.maximum(last_both, 0)], np.nan,
+        )
+
+    rows = np.flatnonzero(differs)
+    region_names = names.reindex(fips[rows])
+    discrepancies = pd.DataFrame({
+        'fips': fips[rows],
+        'county': region_names['county'].to_numpy(),
+        'state': region_names['state'].to_numpy(),
+        'date': pd.DatetimeIndex((joined[rows] & ((1 << _DATE_BITS) - 1)).astype('datetime64[D]')),
+        **{c: columns[c][rows] for c in [
+            f'{metric}_{suffix}' for metric in COMPARE_METRICS
+            for suffix in COMPARE_SOURCES + ['diff']
+        ]},
+    })
+
+    return discrepancies, summary
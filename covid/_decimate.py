@@ -0,0 +1,166 @@
+import numpy as np
+
+
+__all__ = [
+    'decimate_series',
+]
+
+
+def _bucket_edges(ndates, nbuckets):
+    """
+    Hidden function for splitting the points between the first and the
+    last of a series of `ndates` points into `nbuckets` buckets of
+    (nearly) equal size, returning the `nbuckets + 1` edges.
+
+    """
+
+    return (np.arange(nbuckets + 1) * (ndates - 2) // nbuckets + 1).astype(np.intp)
+
+def _lttb(x, y, max_points):
+    """
+    Hidden function for selecting the points of each series (row) of `y`
+    with the largest-triangle-three-buckets algorithm.
+
+    """
+
+    nseries, ndates = y.shape
+    nbuckets = max_points - 2
+    edges = _bucket_edges(ndates, nbuckets)
+    sizes = np.diff(edges)
+
+    # the mean point of every bucket, which is the third vertex of the
+    # triangles of the previous bucket
+    xsum = np.concatenate([[0], np.cumsum(x)])
+    ysum = np.concatenate([np.zeros((nseries, 1)), np.cumsum(y, axis=-1)], axis=-1)
+    xmean = np.append((xsum[edges[1:]] - xsum[edges[:-1]]) / sizes, x[-1])
+    ymean = np.concatenate([
+        (ysum[:, edges[1:]] - ysum[:, edges[:-1]]) / sizes, y[:, -1:],
+    ], axis=-1)
+
+    rows = np.arange(nseries)
+    selected = np.empty((nseries, max_points), dtype=np.intp)
+    selected[:, 0] = 0
+    selected[:, -1] = ndates - 1
+
+    # each bucket depends on the point selected in the previous one, so the
+    # buckets are looped over, with every series selected at once
+    ax = np.full(nseries, x[0])
+    ay = y[:, 0]
+    for ii in range(nbuckets):
+        bx = x[edges[ii]:edges[ii + 1]]
+        by = y[:, edges[ii]:edges[ii + 1]]
+        cx = xmean[ii + 1]
+        cy = ymean[:, ii + 1]
+
+        area = np.abs(
+            (ax - cx)[:, np.newaxis] * (by - ay[:, np.newaxis])
+            - (ax[:, np.newaxis] - bx) * (cy - ay)[:, np.newaxis]
+        )
+        best = edges[ii] + np.argmax(area, axis=-1)
+
+        selected[:, ii + 1] = best
+        ax = x[best]
+        ay = y[rows, best]
+
+    return selected
+
+def _minmax(y, max_points):
+    """
+    Hidden function for selecting the points of each series (row) of `y`
+    with the minimum and maximum of each bucket.
+
+    """
+
+    nseries, ndates = y.shape
+    nbuckets = (max_points - 2) // 2
+    edges = _bucket_edges(ndates, nbuckets)
+    sizes = np.diff(edges)
+
+    # the buckets are padded to the same size by repeating their last point,
+    # which never changes their minimum or maximum
+    padded = edges[:-1, np.newaxis] + np.minimum(
+        np.arange(sizes.max()), sizes[:, np.newaxis] - 1,
+    )
+    values = y[:, padded]
+
+    extrema = np.sort(np.stack([
+        edges[:-1] + np.argmin(values, axis=-1),
+        edges[:-1] + np.argmax(values, axis=-1),
+    ], axis=-1), axis=-1).reshape(nseries, 2 * nbuckets)
+
+    return np.concatenate([
+        np.zeros((nseries, 1), dtype=np.intp),
+        extrema,
+        np.full((nseries, 1), ndates - 1, dtype=np.intp),
+    ], axis=-1)
+
+def decimate_series(y, max_points, x=None, method='lttb'):
+    """
+    Function for selecting at most `max_points` points of many time
+    series at once, such that the decimated series look the same as the
+    full ones when plotted, e.g. for faster plots or smaller exports.
+
+    Parameters
+    ----------
+    y : array_like
+        The values of the time series, either a single series with shape
+        (dates,), or many series with shape (series, dates), which must
+        not contain NaN.
+    max_points : int
+        The maximum number of points to select from each series. Must be
+        at least 3 for "lttb" and at least 4 for "minmax".
+    x : array_like, NoneType, optional
+        The positions of the dates, with shape (dates,), e.g. the number
+        of days since the first date. If set to None (default), the dates
+        are assumed to be evenly spaced.
+    method : str, optional
+        The decimation method. Can be either "lttb" (default) for the
+        largest-triangle-three-buckets algorithm, which keeps the points
+        that change the shape of the series the most, or "minmax" for
+        the minimum and maximum of evenly sized buckets, which keeps
+        every peak and trough.
+
+    Returns
+    -------
+    indices : ndarray
+        The sorted indices of the selected dates, with shape (points,) or
+        (series, points). The first and last dates are always selected.
+        If there are no more than `max_points` dates, every date is
+        selected. With "minmax", a date is selected twice if it is both
+        the minimum and the maximum of its bucket.
+
+    Examples
+    --------
+    >>> indices = covid.decimate_series(cases, 200)
+    >>> decimated = np.take_along_axis(cases, indices, axis=-1)
+
+    """
+
+    if method not in ['lttb', 'minmax']:
+        raise ValueError("method should be either 'lttb' or 'minmax'.")
+    min_points = 3 if method == 'lttb' else 4
+    if max_points < min_points:
+        raise ValueError(f"max_points should be at least {min_points} for '{method}'.")
+
+    y = np.asarray(y, dtype=np.float64)
+    if y.ndim not in [1, 2]:
+        raise ValueError("y should be either 1-D or 2-D.")
+    ndates = y.shape[-1]
+
+    if x is None:
+        x = np.arange(ndates, dtype=np.float64)
+    else:
+        x = np.asarray(x, dtype=np.float64)
+        if x.shape != (ndates,):
+            raise ValueError("x should have the same number of dates as y.")
+
+    if ndates <= max_points:
+        return np.broadcast_to(np.arange(ndates), y.shape).copy()
+
+    series = np.atleast_2d(y)
+    if method == 'lttb':
+        indices = _lttb(x, series, max_points)
+    else:
+        indices = _minmax(series, max_points)
+
+    return indices if y.ndim == 2 else indices[0]
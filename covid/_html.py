@@ -0,0 +1,514 @@
+import json
+import html
+import base64
+import numpy as np
+
+from ._io import BAYAREA_COUNTIES, get_bay_data, get_cube, _county_rows
+from ._metrics import _derive_reported
+from ._decimate import decimate_series
+
+
+__all__ = [
+    'export_dashboard',
+]
+
+DASHBOARD_METRICS = [
+    'cases',
+    'deaths',
+    'new_cases',
+    'new_cases_filt',
+    'new_deaths',
+    'new_deaths_filt',
+]
+DASHBOARD_SOURCES = {
+    'jhu': "JHU",
+    'nytimes': "NY Times",
+}
+
+_DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>__TITLE__</title>
+<style>
+body { font-family: sans-serif; margin: 1em; color: #222; }
+h1 { font-size: 1.4em; }
+#controls { margin-bottom: 1em; }
+#controls label { margin-right: 1em; }
+#counties { display: grid; grid-template-columns: repeat(3, 1fr); }
+.panel { position: relative; }
+.panel canvas { display: block; width: 100%; }
+.tooltip {
+  position: absolute; display: none; pointer-events: none; white-space: nowrap;
+  background: rgba(255, 255, 255, 0.9); border: 1px solid #888; padding: 2px 4px; font-size: 11px;
+}
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<div id="controls">
+<label><input type="radio" name="view" value="cumulative" checked> Cumulative</label>
+<label><input type="radio" name="view" value="new"> New Per Day</label>
+<label><input type="checkbox" id="show-cases" checked> Cases</label>
+<label><input type="checkbox" id="show-deaths" checked> Deaths</label>
+<label><input type="checkbox" id="log-scale" checked> Log Scale</label>
+</div>
+<div id="total"></div>
+<div id="counties"></div>
+<script type="application/json" id="covid-data">__DATA__</script>
+<script>
+(function () {
+  "use strict";
+
+  var DAY = 86400000;
+  var LOG_FLOOR = 0.8;
+  var VIEWS = {
+    cumulative: [
+      ["cases", "#d62728", 1, "Cases"],
+      ["deaths", "#000000", 1, "Deaths"]
+    ],
+    "new": [
+      ["new_cases", "#d62728", 0.3, null],
+      ["new_cases_filt", "#d62728", 1, "Cases"],
+      ["new_deaths", "#000000", 0.3, null],
+      ["new_deaths_filt", "#000000", 1, "Deaths"]
+    ]
+  };
+
+  var data = JSON.parse(document.getElementById("covid-data").textContent);
+
+  function decode(encoded, Type) {
+    var raw = atob(encoded);
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) {
+      bytes[i] = raw.charCodeAt(i);
+    }
+    return new Type(bytes.buffer);
+  }
+
+  // every series is a view of the same two buffers
+  var values = decode(data.values, Float32Array);
+  var offsets = decode(data.offsets, Uint16Array);
+  var origin = Date.parse(data.origin);
+
+  function series(line) {
+    if (!line.series) {
+      var days;
+      if (line.o === null) {
+        days = new Uint16Array(line.n);
+        for (var i = 0; i < line.n; i++) {
+          days[i] = line.d + i;
+        }
+      } else {
+        days = offsets.subarray(line.o, line.o + line.n);
+      }
+      line.series = {days: days, values: values.subarray(line.v, line.v + line.n)};
+    }
+    return line.series;
+  }
+
+  function formatDate(day) {
+    return new Date(origin + day * DAY).toISOString().slice(0, 10);
+  }
+
+  function formatValue(value) {
+    return Math.round(value).toLocaleString();
+  }
+
+  function niceTicks(lo, hi, count) {
+    var step = Math.pow(10, Math.floor(Math.log10((hi - lo) / count)));
+    var error = (hi - lo) / count / step;
+    if (error >= 7.5) {
+      step *= 10;
+    } else if (error >= 3.5) {
+      step *= 5;
+    } else if (error >= 1.5) {
+      step *= 2;
+    }
+    var ticks = [];
+    for (var tick = Math.ceil(lo / step) * step; tick <= hi + step * 1e-9; tick += step) {
+      ticks.push(tick);
+    }
+    return ticks;
+  }
+
+  function options() {
+    return {
+      view: document.querySelector("input[name=view]:checked").value,
+      cases: document.getElementById("show-cases").checked,
+      deaths: document.getElementById("show-deaths").checked,
+      log: document.getElementById("log-scale").checked
+    };
+  }
+
+  function visibleLines(panel, opts) {
+    return VIEWS[opts.view].filter(function (style) {
+      return style[0].indexOf("cases") >= 0 ? opts.cases : opts.deaths;
+    }).map(function (style) {
+      return {style: style, series: series(panel.lines[style[0]])};
+    });
+  }
+
+  // the panels of a group share their axes, as in `plot_bay_cases`
+  function groupRange(panels, opts) {
+    var range = {x0: Infinity, x1: -Infinity, y0: opts.log ? LOG_FLOOR : 0, y1: -Infinity};
+    panels.forEach(function (panel) {
+      visibleLines(panel, opts).forEach(function (line) {
+        var s = line.series;
+        if (s.days.length === 0) {
+          return;
+        }
+        range.x0 = Math.min(range.x0, s.days[0]);
+        range.x1 = Math.max(range.x1, s.days[s.days.length - 1]);
+        for (var i = 0; i < s.values.length; i++) {
+          range.y1 = Math.max(range.y1, s.values[i]);
+        }
+      });
+    });
+    if (!isFinite(range.x0)) {
+      range.x0 = 0;
+      range.x1 = 1;
+    }
+    if (range.x1 === range.x0) {
+      range.x1 = range.x0 + 1;
+    }
+    if (!(range.y1 > range.y0)) {
+      range.y1 = range.y0 + 1;
+    }
+    return range;
+  }
+
+  function makePanel(container, panel, height) {
+    var element = document.createElement("div");
+    element.className = "panel";
+    var canvas = document.createElement("canvas");
+    var tooltip = document.createElement("div");
+    tooltip.className = "tooltip";
+    element.appendChild(canvas);
+    element.appendChild(tooltip);
+    container.appendChild(element);
+
+    var view = {panel: panel, canvas: canvas, tooltip: tooltip, height: height};
+    canvas.addEventListener("mousemove", function (event) {
+      hover(view, event);
+    });
+    canvas.addEventListener("mouseleave", function () {
+      tooltip.style.display = "none";
+    });
+    return view;
+  }
+
+  function draw(view, range, opts) {
+    var canvas = view.canvas;
+    var ratio = window.devicePixelRatio || 1;
+    var width = canvas.clientWidth;
+    var height = view.height;
+    canvas.width = width * ratio;
+    canvas.height = height * ratio;
+    canvas.style.height = height + "px";
+
+    var ctx = canvas.getContext("2d");
+    ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+    ctx.clearRect(0, 0, width, height);
+
+    var box = {left: 60, right: width - 10, top: 20, bottom: height - 25};
+    var ty = opts.log ? function (v) { return Math.log10(Math.max(v, LOG_FLOOR)); } : function (v) { return v; };
+    var y0 = ty(range.y0);
+    var y1 = ty(range.y1);
+    var px = function (day) {
+      return box.left + (day - range.x0) / (range.x1 - range.x0) * (box.right - box.left);
+    };
+    var py = function (value) {
+      return box.bottom - (ty(value) - y0) / (y1 - y0) * (box.bottom - box.top);
+    };
+    view.px = px;
+    view.box = box;
+    view.range = range;
+    view.opts = opts;
+
+    ctx.font = "11px sans-serif";
+    ctx.strokeStyle = "#999";
+    ctx.fillStyle = "#222";
+    ctx.setLineDash([1, 2]);
+    ctx.lineWidth = 1;
+
+    var yticks;
+    if (opts.log) {
+      yticks = [];
+      for (var e = Math.ceil(y0); e <= y1; e++) {
+        yticks.push(Math.pow(10, e));
+      }
+    } else {
+      yticks = niceTicks(range.y0, range.y1, 5);
+    }
+    ctx.textAlign = "right";
+    ctx.textBaseline = "middle";
+    yticks.forEach(function (tick) {
+      var y = py(tick);
+      ctx.beginPath();
+      ctx.moveTo(box.left, y);
+      ctx.lineTo(box.right, y);
+      ctx.stroke();
+      ctx.fillText(formatValue(tick), box.left - 4, y);
+    });
+
+    ctx.textAlign = "center";
+    ctx.textBaseline = "top";
+    niceTicks(range.x0, range.x1, Math.max(2, Math.floor((box.right - box.left) / 120))).forEach(function (tick) {
+      var x = px(tick);
+      ctx.beginPath();
+      ctx.moveTo(x, box.top);
+      ctx.lineTo(x, box.bottom);
+      ctx.stroke();
+      ctx.fillText(formatDate(tick), x, box.bottom + 4);
+    });
+
+    ctx.setLineDash([]);
+    ctx.strokeStyle = "#000";
+    ctx.strokeRect(box.left, box.top, box.right - box.left, box.bottom - box.top);
+
+    ctx.textBaseline = "bottom";
+    ctx.fillText(view.panel.title, (box.left + box.right) / 2, box.top - 2);
+
+    ctx.save();
+    ctx.beginPath();
+    ctx.rect(box.left, box.top, box.right - box.left, box.bottom - box.top);
+    ctx.clip();
+    view.lines = visibleLines(view.panel, opts);
+    view.lines.forEach(function (line) {
+      var s = line.series;
+      ctx.strokeStyle = line.style[1];
+      ctx.globalAlpha = line.style[2];
+      ctx.lineWidth = 1.5;
+      ctx.beginPath();
+      for (var i = 0; i < s.days.length; i++) {
+        var x = px(s.days[i]);
+        var y = py(s.values[i]);
+        if (i === 0) {
+          ctx.moveTo(x, y);
+        } else {
+          ctx.lineTo(x, y);
+        }
+      }
+      ctx.stroke();
+    });
+    ctx.restore();
+  }
+
+  function nearest(days, day) {
+    var lo = 0;
+    var hi = days.length - 1;
+    while (hi - lo > 1) {
+      var mid = (lo + hi) >> 1;
+      if (days[mid] <= day) {
+        lo = mid;
+      } else {
+        hi = mid;
+      }
+    }
+    return Math.abs(days[hi] - day) < Math.abs(days[lo] - day) ? hi : lo;
+  }
+
+  function hover(view, event) {
+    if (!view.lines) {
+      return;
+    }
+    var rect = view.canvas.getBoundingClientRect();
+    var x = event.clientX - rect.left;
+    var range = view.range;
+    var box = view.box;
+    var day = Math.round(range.x0 + (x - box.left) / (box.right - box.left) * (range.x1 - range.x0));
+
+    var rows = [formatDate(day)];
+    view.lines.forEach(function (line) {
+      var s = line.series;
+      if (line.style[3] === null && view.opts.view === "new") {
+        rows.push((line.style[0].indexOf("cases") >= 0 ? "Cases" : "Deaths") + " (raw)");
+      } else {
+        rows.push(line.style[3]);
+      }
+      if (s.days.length === 0) {
+        rows[rows.length - 1] += ": -";
+        return;
+      }
+      var i = nearest(s.days, day);
+      rows[rows.length - 1] += (s.days[i] === day ? ": " : " (" + formatDate(s.days[i]) + "): ") + formatValue(s.values[i]);
+    });
+
+    view.tooltip.innerHTML = rows.join("<br>");
+    view.tooltip.style.display = "block";
+    view.tooltip.style.left = Math.min(x + 12, rect.width - view.tooltip.offsetWidth) + "px";
+    view.tooltip.style.top = (event.clientY - rect.top + 12) + "px";
+  }
+
+  var total = [makePanel(document.getElementById("total"), data.panels[0], 400)];
+  var counties = data.panels.slice(1).map(function (panel) {
+    return makePanel(document.getElementById("counties"), panel, 220);
+  });
+
+  function render() {
+    var opts = options();
+    [total, counties].forEach(function (group) {
+      var range = groupRange(group.map(function (view) { return view.panel; }), opts);
+      group.forEach(function (view) {
+        draw(view, range, opts);
+      });
+    });
+  }
+
+  document.getElementById("controls").addEventListener("change", render);
+  window.addEventListener("resize", render);
+  render();
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def _add_panel(blob, title, days, metrics, max_points):
+    """
+    Hidden function for appending the lines of a panel to the data blob
+    of the dashboard, where `days` are the offsets of the dates from the
+    origin and `metrics` the values of each line on those dates.
+
+    """
+
+    lines = {}
+    for metric in DASHBOARD_METRICS:
+        values = np.asarray(metrics[metric], dtype=np.float64)
+        reported = np.flatnonzero(~np.isnan(values))
+        if max_points is not None and len(reported) > max_points:
+            reported = reported[
+                decimate_series(values[reported], max_points, x=days[reported])
+            ]
+        line_days = days[reported]
+
+        line = {'v': blob['nvalues'], 'n': len(reported), 'd': None, 'o': None}
+        blob['values'].append(values[reported].astype('<f4'))
+        blob['nvalues'] += len(reported)
+
+        # lines on consecutive dates only store their first date
+        if len(reported) and line_days[-1] - line_days[0] == len(reported) - 1:
+            line['d'] = int(line_days[0])
+        else:
+            line['o'] = blob['noffsets']
+            blob['offsets'].append(line_days.astype('<u2'))
+            blob['noffsets'] += len(reported)
+
+        lines[metric] = line
+
+    blob['panels'].append({'title': title, 'lines': lines})
+
+def _encode_buffer(arrays, dtype):
+    """
+    Hidden function for concatenating arrays to a single little-endian
+    buffer, encoded as base64.
+
+    """
+
+    if not arrays:
+        return ""
+
+    return base64.b64encode(np.concatenate(arrays).astype(dtype).tobytes()).decode('ascii')
+
+def export_dashboard(path, data_source='jhu', max_points=None, title=None):
+    """
+    Function for writing a self-contained interactive HTML page of the
+    COVID-19 cases and deaths in the San Francisco Bay Area, with a
+    panel for the total Bay Area and a panel for each county.
+
+    Parameters
+    ----------
+    path : str
+        The path of the HTML file to write.
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the NY
+        Times dataset.
+    max_points : int, NoneType, optional
+        Option to store at most the specified number of points per line,
+        selected with `decimate_series`, to reduce the size of the page.
+        If set to None (default), every reported date is stored.
+    title : str, NoneType, optional
+        The title of the page. If set to None (default), a title naming
+        the data source is used.
+
+    Notes
+    -----
+    The page does not load any external resources. The cumulative and
+    new daily cases and deaths can be switched between, on a log or
+    linear scale, and hovering over a panel shows the values on each
+    date.
+
+    All panels are drawn from a single data blob embedded in the page,
+    in which the values of every line are stored in one base64-encoded
+    float32 buffer, and the dates as offsets in days from a single
+    origin date. Lines reported on consecutive dates only store the
+    offset of their first date, and the other lines store the offset of
+    each date in one base64-encoded uint16 buffer.
+
+    """
+
+    if data_source not in DASHBOARD_SOURCES:
+        raise ValueError("data_source should be either 'jhu' or 'nytimes'.")
+
+    bay_df = get_bay_data(data_source=data_source)
+    cases_cube, regions, dates = get_cube(
+        data_source=data_source, metric='cases', county=BAYAREA_COUNTIES,
+    )
+    deaths_cube = get_cube(
+        data_source=data_source, metric='deaths', county=BAYAREA_COUNTIES,
+    )[0]
+
+    rows = _county_rows(regions, BAYAREA_COUNTIES)
+    cases_cube = cases_cube[rows]
+    deaths_cube = deaths_cube[rows]
+    derived = _derive_reported(cases_cube, deaths_cube, ~np.isnan(cases_cube))
+
+    origin = dates[0]
+    days = np.asarray((dates - origin).days, dtype=np.int64)
+
+    blob = {
+        'values': [], 'nvalues': 0, 'offsets': [], 'noffsets': 0, 'panels': [],
+    }
+
+    _add_panel(
+        blob,
+        "Total SF Bay Area",
+        np.asarray((bay_df.index - origin).days, dtype=np.int64),
+        {m: bay_df[m].to_numpy() for m in DASHBOARD_METRICS},
+        max_points,
+    )
+
+    for ii, county in enumerate(BAYAREA_COUNTIES):
+        # as in the plots, only the dates on which the county reported cases are kept
+        reported = ~np.isnan(cases_cube[ii])
+        metrics = {'cases': cases_cube[ii], 'deaths': deaths_cube[ii]}
+        metrics.update({k: v[ii] for k, v in derived.items()})
+        _add_panel(
+            blob,
+            county,
+            days,
+            {m: np.where(reported, v, np.nan) for m, v in metrics.items()},
+            max_points,
+        )
+
+    data = {
+        'origin': origin.strftime('%Y-%m-%d'),
+        'values': _encode_buffer(blob['values'], '<f4'),
+        'offsets': _encode_buffer(blob['offsets'], '<u2'),
+        'panels': blob['panels'],
+    }
+
+    if title is None:
+        title = f"SF Bay Area COVID-19 Stats, Source: {DASHBOARD_SOURCES[data_source]}"
+
+    page = _DASHBOARD_TEMPLATE.replace('__TITLE__', html.escape(title)).replace(
+        # "</" is escaped so that the data cannot close the script element
+        '__DATA__', json.dumps(data, separators=(',', ':')).replace('</', '<\\/'),
+    )
+
+    with open(path, 'w') as f:
+        f.write(page)
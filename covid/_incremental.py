@@ -0,0 +1,353 @@
+import io
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+from ._cache import (
+    _clear_rolling, _fingerprint, _fingerprint_key, _load_stored_dataset, _replace_memoized,
+    _store_dataset,
+)
+from ._ingest import _read_jhu_header, _read_nytimes_csv
+from ._io import (
+    _get_jhu_cube, _jhu_paths, _nytimes_frame_to_cube, _nytimes_path,
+)
+
+
+__all__ = [
+    'update_data',
+]
+
+NYTIMES_DATE_LENGTH = len('2020-01-21')
+
+
+def _patch_dataset(dataset, patch):
+    """
+    Hidden function for replacing every date of the dataset `patch` in
+    `dataset`. Regions and dates of `patch` that are not in `dataset` are
+    added, and regions of `dataset` that are not in `patch` are set to
+    NaN on the patched dates.
+
+    """
+
+    regions, dates, metrics = dataset
+    patch_regions, patch_dates, patch_metrics = patch
+
+    keys = list(regions.columns)
+    region_ids = pd.concat(
+        [regions[keys], patch_regions[keys]], ignore_index=True,
+    ).groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    region_pos = pd.Index(region_ids[:len(regions)]).get_indexer(region_ids[len(regions):])
+
+    added = region_pos < 0
+    region_pos[added] = len(regions) + np.arange(np.sum(added))
+    new_regions = pd.concat(
+        [regions, patch_regions[keys][added]], ignore_index=True,
+    )
+
+    new_dates = dates.union(patch_dates)
+    old_cols = new_dates.get_indexer(dates)
+    patch_cols = new_dates.get_indexer(patch_dates)
+
+    new_metrics = {}
+    for metric, values in metrics.items():
+        new_values = np.full((len(new_regions), len(new_dates)), np.nan)
+        new_values[:len(regions), old_cols] = values
+        new_values[:, patch_cols] = np.nan
+        new_values[np.ix_(region_pos, patch_cols)] = patch_metrics[metric]
+        new_metrics[metric] = new_values
+
+    return new_regions, new_dates, new_metrics
+
+def _revised_dates(dataset, patch, check_dates):
+    """
+    Hidden function for returning the `check_dates` on which any value
+    of `patch` differs from the value in `dataset`, where both datasets
+    have the same regions.
+
+    """
+
+    regions, dates, metrics = dataset
+    patch_regions, patch_dates, patch_metrics = patch
+
+    revised = np.zeros(len(check_dates), dtype=bool)
+    for metric, values in metrics.items():
+        old = values[:, dates.get_indexer(check_dates)]
+        new = patch_metrics[metric][:, patch_dates.get_indexer(check_dates)]
+        same = (old == new) | (np.isnan(old) & np.isnan(new))
+        revised |= ~np.all(same, axis=0)
+
+    return check_dates[revised]
+
+def _jhu_lines_hash(raw, ndrop=0):
+    """
+    Hidden function for hashing the lines of the raw bytes of a JHU data
+    file without their last `ndrop` columns, i.e. the contents of the
+    file before `ndrop` dates were appended to it. Returns None if a line
+    has fewer than `ndrop` columns.
+
+    """
+
+    buffer = np.frombuffer(raw, dtype=np.uint8)
+
+    line_ends = np.flatnonzero(buffer == ord('\n'))
+    if len(raw) and raw[-1:] != b'\n':
+        line_ends = np.append(line_ends, len(raw))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    nonempty = line_ends > line_starts
+    line_starts, line_ends = line_starts[nonempty], line_ends[nonempty]
+
+    if ndrop == 0:
+        cuts = line_ends - (buffer[line_ends - 1] == ord('\r'))
+    else:
+        # the dropped date columns only hold numbers, so the columns can be
+        # counted from the end of the line, whatever the quoting of the others
+        commas = np.flatnonzero(buffer == ord(','))
+        comma_idx = np.searchsorted(commas, line_ends) - ndrop
+        if np.any(comma_idx < 0):
+            return None
+        cuts = commas[comma_idx]
+        if np.any(cuts < line_starts):
+            return None
+
+    sha = hashlib.sha1()
+    for start, stop in zip(line_starts.tolist(), cuts.tolist()):
+        sha.update(raw[start:stop])
+        sha.update(b'\n')
+
+    return sha.hexdigest()
+
+def _jhu_hashes(raws):
+    """
+    Hidden function for returning the number of columns and the hash of
+    the lines of each JHU data file, given the raw bytes of each file
+    keyed on its path, which are stored to check the files for revisions
+    when they are next updated.
+
+    """
+
+    return {
+        os.path.basename(path): {
+            'ncolumns': len(_read_jhu_header(path)[0]), 'sha1': _jhu_lines_hash(raw),
+        }
+        for path, raw in raws.items()
+    }
+
+def _jhu_unrevised(raws, old_hashes):
+    """
+    Hidden function for checking whether the JHU data files only had
+    dates appended since their hashes `old_hashes` were stored, i.e.
+    whether every stored value and region is unchanged.
+
+    """
+
+    if old_hashes is None or set(old_hashes) != set(os.path.basename(p) for p in raws):
+        return False
+
+    for path, raw in raws.items():
+        old = old_hashes[os.path.basename(path)]
+        ndrop = len(_read_jhu_header(path)[0]) - old['ncolumns']
+        if ndrop < 0 or _jhu_lines_hash(raw, ndrop) != old['sha1']:
+            return False
+
+    return True
+
+def _update_jhu(dataset, raws, old_hashes):
+    """
+    Hidden function for updating the stored JHU dataset, given the raw
+    bytes `raws` of each data file, keyed on its path. If the files only
+    had dates appended since the hashes `old_hashes` were stored, only
+    the new dates are read, otherwise every date is read and compared
+    with the stored values. Returns None if the dataset must be rebuilt,
+    i.e. if dates were removed or the regions changed.
+
+    """
+
+    regions, dates, metrics = dataset
+
+    available = pd.DatetimeIndex([])
+    for path in raws:
+        timestamps = _read_jhu_header(path)[1]
+        available = available.union(timestamps[~timestamps.isna()])
+
+    if not dates.isin(available).all():
+        return None
+
+    new_dates = available.difference(dates)
+
+    if _jhu_unrevised(raws, old_hashes):
+        if len(new_dates) == 0:
+            return dataset, new_dates, pd.DatetimeIndex([])
+        check_dates = pd.DatetimeIndex([])
+        patch = _get_jhu_cube(dates=new_dates)
+    else:
+        # any stored value may have been revised, so every date is checked
+        check_dates = dates
+        patch = _get_jhu_cube()
+
+    if not patch[0].equals(regions):
+        return None
+
+    revised_dates = _revised_dates(dataset, patch, check_dates)
+    patch_cols = patch[1].get_indexer(new_dates.union(revised_dates))
+    patch = (
+        patch[0],
+        patch[1][patch_cols],
+        {m: values[:, patch_cols] for m, values in patch[2].items()},
+    )
+
+    return _patch_dataset(dataset, patch), new_dates, revised_dates
+
+def _nytimes_blocks(raw):
+    """
+    Hidden function for splitting the raw bytes of the NYTimes data file
+    into the blocks of rows for each date. Returns the length of the
+    header, and a dictionary mapping each date string to the (start, stop)
+    byte offsets of its block, or None if the rows are not grouped by date.
+
+    """
+
+    header_length = raw.index(b'\n') + 1
+    buffer = np.frombuffer(raw, dtype=np.uint8)
+
+    line_starts = np.flatnonzero(buffer[header_length:-1] == ord('\n')) + header_length + 1
+    line_starts = np.concatenate(([header_length], line_starts))
+
+    # the date is the first column of every line, with a fixed width
+    line_dates = buffer[
+        line_starts[:, np.newaxis] + np.arange(NYTIMES_DATE_LENGTH)
+    ].view(f'S{NYTIMES_DATE_LENGTH}').ravel()
+
+    block_starts = np.concatenate(([0], np.flatnonzero(line_dates[1:] != line_dates[:-1]) + 1))
+    block_dates = [d.decode() for d in line_dates[block_starts]]
+    if len(set(block_dates)) != len(block_dates):
+        return header_length, None
+
+    offsets = np.append(line_starts[block_starts], len(raw))
+
+    return header_length, {
+        d: (int(start), int(stop)) for d, start, stop in zip(block_dates, offsets[:-1], offsets[1:])
+    }
+
+def _update_nytimes(dataset, raw, header_length, blocks, old_hashes, hashes):
+    """
+    Hidden function for updating the stored NYTimes dataset, reading only
+    the blocks of dates whose rows are new or have changed since the
+    dataset was stored. Returns None if the dataset must be rebuilt, i.e.
+    if dates were removed.
+
+    """
+
+    regions, dates, metrics = dataset
+
+    if any(d not in hashes for d in old_hashes):
+        return None
+
+    changed = [d for d, h in hashes.items() if old_hashes.get(d) != h]
+    if not changed:
+        return dataset, pd.DatetimeIndex([]), pd.DatetimeIndex([])
+
+    patch_csv = raw[:header_length] + b''.join(
+        raw[blocks[d][0]:blocks[d][1]] for d in changed
+    )
+    patch = _nytimes_frame_to_cube(_read_nytimes_csv(io.BytesIO(patch_csv)))
+
+    revised = patch[1].isin(dates)
+
+    return _patch_dataset(dataset, patch), patch[1][~revised], patch[1][revised]
+
+def update_data(data_source='jhu'):
+    """
+    Function for incrementally updating the stored copy of a dataset
+    after its source files have changed, e.g. after the data submodules
+    have been pulled, by reading only the new and revised dates.
+
+    Parameters
+    ----------
+    data_source : str, optional
+        The source to update. Can be either "jhu" for the John Hopkins
+        University dataset or "nytimes" for the NY Times dataset.
+
+    Returns
+    -------
+    summary : dict
+        A dictionary with the keys "new_dates" and "revised_dates", the
+        DatetimeIndex of the dates that were added and of the stored
+        dates whose values were replaced, and "rebuilt", which is True
+        if the whole dataset was read again.
+
+    Notes
+    -----
+    The dataset is stored in the on-disk cache used by `get_data`, and
+    the in-process cache is updated as well. If there is no stored copy
+    yet, or if dates were removed (or, for the JHU dataset, the regions
+    changed), the whole dataset is read again.
+
+    For the NY Times dataset, the rows of each date are compared with
+    their hash at the time the dataset was stored, so that any revised
+    date is detected and re-read. As every line of the JHU files changes
+    when a date is added, each line is instead hashed without the new
+    date columns and compared with the hash of the files at the time the
+    dataset was stored. If they match, only the new dates are read,
+    otherwise every date is read again and compared with the stored
+    values, so that the revised dates can be reported.
+
+    """
+
+    if data_source == "jhu":
+        paths = _jhu_paths('us') + _jhu_paths('global')
+    elif data_source == "nytimes":
+        paths = [_nytimes_path()]
+    else:
+        raise ValueError("data_source should be either 'jhu' or 'nytimes'.")
+
+    files = _fingerprint(data_source, paths)[0]
+    manifest, dataset = _load_stored_dataset(data_source)
+
+    extra = {}
+    result = None
+
+    if data_source == "nytimes":
+        with open(paths[0], 'rb') as f:
+            raw = f.read()
+        header_length, blocks = _nytimes_blocks(raw)
+        if blocks is not None:
+            extra['blocks'] = {
+                d: hashlib.sha1(raw[start:stop]).hexdigest() for d, (start, stop) in blocks.items()
+            }
+            if dataset is not None and 'blocks' in manifest:
+                result = _update_nytimes(
+                    dataset, raw, header_length, blocks, manifest['blocks'], extra['blocks'],
+                )
+    else:
+        raws = {}
+        for path in paths:
+            with open(path, 'rb') as f:
+                raws[path] = f.read()
+        extra['hashes'] = _jhu_hashes(raws)
+        if dataset is not None:
+            if manifest['key'] == _fingerprint_key(files):
+                result = dataset, pd.DatetimeIndex([]), pd.DatetimeIndex([])
+            else:
+                result = _update_jhu(dataset, raws, manifest.get('hashes'))
+
+    if result is None:
+        if data_source == "nytimes":
+            dataset = _nytimes_frame_to_cube(_read_nytimes_csv(io.BytesIO(raw)))
+        else:
+            dataset = _get_jhu_cube()
+        new_dates, revised_dates = dataset[1], pd.DatetimeIndex([])
+    else:
+        dataset, new_dates, revised_dates = result
+
+    _store_dataset(data_source, files, dataset, extra=extra)
+    _replace_memoized(data_source, dataset)
+    # the rolling statistics are only extended when no stored date changed
+    if result is None or len(revised_dates):
+        _clear_rolling(data_source)
+
+    return {
+        'new_dates': new_dates,
+        'revised_dates': revised_dates,
+        'rebuilt': result is None,
+    }
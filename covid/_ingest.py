@@ -0,0 +1,391 @@
+import os
+import csv
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from ._instrument import _stage
+
+
+__all__ = [
+    'set_csv_engine',
+    'set_parallel_load',
+]
+
+JHU_US_COLUMNS = {
+    "FIPS": "fips",
+    "Admin2": "county",
+    "Province_State": "state",
+    "Country_Region": "country",
+}
+JHU_GLOBAL_COLUMNS = {
+    "Province/State": "state",
+    "Country/Region": "country",
+}
+JHU_DTYPES = {
+    "fips": np.float64,
+    "county": object,
+    "state": object,
+    "country": object,
+}
+JHU_DATE_FORMAT = '%m/%d/%y'
+
+NYTIMES_DTYPES = {
+    "date": object,
+    "county": object,
+    "state": object,
+    "fips": np.float64,
+    "cases": np.float64,
+    "deaths": np.float64,
+}
+NYTIMES_DATE_FORMAT = '%Y-%m-%d'
+NYTIMES_CHUNKSIZE = 500000
+
+_CSV_ENGINES = ['c', 'pyarrow']
+# the pyarrow parser of `pd.read_csv` was added in Pandas 1.4
+_PYARROW_MIN_PANDAS = (1, 4)
+_CSV_ENGINE = 'c'
+
+_LOAD_EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+_LOAD_EXECUTOR = None
+_LOAD_MAX_WORKERS = None
+
+
+def set_csv_engine(engine='c'):
+    """
+    Function for setting the Pandas CSV parser used to read the source
+    files of the COVID-19 datasets.
+
+    Parameters
+    ----------
+    engine : str, optional
+        The CSV parser to use. Can be "c" (default) for the default
+        Pandas parser, or "pyarrow" for the multithreaded PyArrow parser,
+        which requires the optional pyarrow package and Pandas 1.4 or
+        later.
+
+    """
+
+    global _CSV_ENGINE
+
+    if engine not in _CSV_ENGINES:
+        raise ValueError(f"engine should be one of {', '.join(repr(e) for e in _CSV_ENGINES)}.")
+    if engine == 'pyarrow':
+        pandas_version = tuple(int(v) for v in pd.__version__.split('.')[:2])
+        if pandas_version < _PYARROW_MIN_PANDAS:
+            raise ImportError(
+                "The pyarrow CSV engine requires Pandas 1.4 or later, "
+                f"but Pandas {pd.__version__} is installed."
+            )
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("The pyarrow CSV engine requires the pyarrow package.")
+
+    _CSV_ENGINE = engine
+
+def set_parallel_load(executor=None, max_workers=None):
+    """
+    Function for setting whether the JHU source files are read
+    concurrently, and with which kind of worker pool.
+
+    Parameters
+    ----------
+    executor : str, NoneType, optional
+        The kind of worker pool to read the files with. Can be "thread"
+        for a thread pool, "process" for a process pool, or None
+        (default) to read the files one after another.
+    max_workers : int, NoneType, optional
+        The maximum number of workers in the pool. If set to None
+        (default), one worker per file is used. The JHU dataset has five
+        source files, so more than five workers are never used.
+
+    """
+
+    global _LOAD_EXECUTOR, _LOAD_MAX_WORKERS
+
+    if executor is not None and executor not in _LOAD_EXECUTORS:
+        raise ValueError("executor should be either 'thread', 'process', or None.")
+    if max_workers is not None and max_workers < 1:
+        raise ValueError("max_workers should be a positive integer.")
+
+    _LOAD_EXECUTOR = executor
+    _LOAD_MAX_WORKERS = max_workers
+
+def _region_selection(county=None, state=None, country=None, fips=None):
+    """
+    Hidden function for normalizing a region selection to a dictionary
+    mapping each selected column to a tuple of the selected values.
+
+    """
+
+    selection = {}
+    for column, values in [('county', county), ('state', state), ('country', country), ('fips', fips)]:
+        if values is None:
+            continue
+        if np.isscalar(values):
+            values = [values]
+        selection[column] = tuple(values)
+
+    return selection
+
+def _selection_mask(frame, selection):
+    """
+    Hidden function for returning a boolean mask of the rows of `frame`
+    that match every column of the region `selection`. If `frame` does
+    not have one of the selected columns, no rows match.
+
+    """
+
+    mask = np.ones(len(frame), dtype=bool)
+    for column, values in selection.items():
+        if column not in frame.columns:
+            return np.zeros(len(frame), dtype=bool)
+        mask &= frame[column].isin(values).to_numpy()
+
+    return mask
+
+def _read_jhu_files(sources, selection=None, dates=None):
+    """
+    Hidden function for reading several JHU data files, returning the
+    output of `_read_jhu_csv` for each (path, us_or_global) pair in
+    `sources`, using the worker pool set by `set_parallel_load`.
+
+    """
+
+    paths = [p for p, _ in sources]
+    us_or_globals = [g for _, g in sources]
+    engines = [_CSV_ENGINE] * len(sources)
+    selections = [selection] * len(sources)
+    date_selections = [dates] * len(sources)
+
+    if _LOAD_EXECUTOR is None:
+        return list(map(
+            _read_jhu_csv, paths, us_or_globals, engines, selections, date_selections,
+        ))
+
+    max_workers = _LOAD_MAX_WORKERS
+    if max_workers is None or max_workers > len(sources):
+        max_workers = len(sources)
+
+    with _LOAD_EXECUTORS[_LOAD_EXECUTOR](max_workers=max_workers) as pool:
+        return list(pool.map(
+            _read_jhu_csv, paths, us_or_globals, engines, selections, date_selections,
+        ))
+
+def _read_jhu_header(path):
+    """
+    Hidden function for reading the header of a JHU data file, returning
+    the column names and the date of each column (NaT for the columns
+    that are not dates).
+
+    """
+
+    with open(path, newline='') as f:
+        header = pd.Index(next(csv.reader(f)))
+
+    # all of the date headers are parsed at once, the other columns
+    # (e.g. Lat, Long, Population) do not match the format and are NaT
+    timestamps = pd.to_datetime(header, format=JHU_DATE_FORMAT, errors='coerce')
+
+    return header, timestamps
+
+def _read_jhu_regions(path, us_or_global, engine='c'):
+    """
+    Hidden function for reading only the region columns of a JHU data
+    file, returning the region metadata of each row.
+
+    """
+
+    if us_or_global == "us":
+        jhu_columns = JHU_US_COLUMNS
+    elif us_or_global == 'global':
+        jhu_columns = JHU_GLOBAL_COLUMNS
+
+    dtypes = {col: JHU_DTYPES[name] for col, name in jhu_columns.items()}
+
+    with _stage('read_jhu_regions', detail=os.path.basename(path)) as stats:
+        jhu_regions = pd.read_csv(
+            path, usecols=list(jhu_columns), dtype=dtypes, engine=engine,
+        ).rename(columns=jhu_columns)
+        stats['rows_out'] = len(jhu_regions)
+
+    return jhu_regions
+
+def _read_jhu_csv(path, us_or_global, engine='c', selection=None, dates=None):
+    """
+    Hidden function for reading an individual JHU data file and returning
+    the region metadata, the dates, and a 2-D array of the values with
+    shape (regions, dates). If a region `selection` is given, only the
+    region columns are read first, and the rows of the regions that do
+    not match are skipped when reading the values. If `dates` is given,
+    only the columns of those dates are read.
+
+    """
+
+    if us_or_global == "us":
+        jhu_columns = JHU_US_COLUMNS
+    elif us_or_global == 'global':
+        jhu_columns = JHU_GLOBAL_COLUMNS
+
+    header, timestamps = _read_jhu_header(path)
+    datecut = ~timestamps.isna()
+    if dates is not None:
+        datecut &= timestamps.isin(dates)
+    date_columns = list(header[datecut])
+
+    dtypes = {col: JHU_DTYPES[name] for col, name in jhu_columns.items()}
+
+    skiprows = None
+    if selection:
+        jhu_regions = _read_jhu_regions(path, us_or_global, engine=engine)
+        keep = _selection_mask(jhu_regions, selection)
+        if not keep.all():
+            # line 0 is the header, so region i is on line i + 1
+            keep_lines = set((np.flatnonzero(keep) + 1).tolist())
+            skiprows = lambda line: line != 0 and line not in keep_lines
+            # only the C parser supports skipping rows with a callable
+            engine = 'c'
+
+    dtypes.update({col: np.float64 for col in date_columns})
+
+    with _stage('read_jhu_csv', detail=os.path.basename(path)) as stats:
+        jhu_csv = pd.read_csv(
+            path,
+            usecols=list(jhu_columns) + date_columns,
+            dtype=dtypes,
+            skiprows=skiprows,
+            engine=engine,
+        )
+        stats['rows_out'] = len(jhu_csv)
+
+    regions = jhu_csv[list(jhu_columns)].rename(columns=jhu_columns)
+    dates = pd.DatetimeIndex(timestamps[datecut])
+    values = jhu_csv[date_columns].to_numpy(dtype=np.float64)
+
+    return regions, dates, values
+
+def _parse_nytimes_dates(nytimes_data):
+    """
+    Hidden function for parsing the date column of NYTimes data in place.
+
+    """
+
+    # the dates repeat for every county, so only the unique strings are parsed
+    date_codes, date_strings = pd.factorize(nytimes_data['date'])
+    nytimes_data['date'] = pd.to_datetime(
+        date_strings, format=NYTIMES_DATE_FORMAT,
+    ).take(date_codes)
+
+    return nytimes_data
+
+def _iter_nytimes_chunks(path, selection=None, chunksize=NYTIMES_CHUNKSIZE):
+    """
+    Hidden function for reading the NYTimes data file in chunks of at
+    most `chunksize` rows, yielding each chunk as a Pandas DataFrame with
+    the date column parsed and the rows of the regions that do not match
+    the region `selection` dropped. Empty chunks are not yielded.
+
+    """
+
+    for chunk in pd.read_csv(
+        path,
+        usecols=list(NYTIMES_DTYPES),
+        dtype=NYTIMES_DTYPES,
+        chunksize=chunksize,
+    ):
+        if selection:
+            chunk = chunk[_selection_mask(chunk, selection)]
+        if len(chunk):
+            yield _parse_nytimes_dates(chunk.reset_index(drop=True))
+
+def _group_chunks_by_date(chunks):
+    """
+    Hidden function for regrouping chunks of NYTimes data, in which the
+    rows are ordered by date, into one (date, DataFrame) pair per date.
+    The rows of the last date of each chunk are held back until the next
+    chunk, as they may continue there.
+
+    """
+
+    seen = set()
+    pending = None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        boundaries = np.flatnonzero(chunk['date'].to_numpy()[1:] != chunk['date'].to_numpy()[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        stops = np.concatenate((boundaries, [len(chunk)]))
+        for start, stop in zip(starts[:-1], stops[:-1]):
+            date = chunk['date'].iat[start]
+            if date in seen:
+                raise ValueError("The rows of the NYTimes data file are not ordered by date.")
+            seen.add(date)
+            yield date, chunk.iloc[start:stop].reset_index(drop=True)
+        pending = chunk.iloc[starts[-1]:].reset_index(drop=True)
+
+    if pending is not None:
+        date = pending['date'].iat[0]
+        if date in seen:
+            raise ValueError("The rows of the NYTimes data file are not ordered by date.")
+        yield date, pending
+
+def _nytimes_totals(chunks):
+    """
+    Hidden function for summing the cases and deaths of chunks of NYTimes
+    data over the regions on each date, keeping only the running totals
+    in memory. Returns a Pandas DataFrame indexed by date.
+
+    """
+
+    totals = None
+    for chunk in chunks:
+        chunk_totals = chunk.groupby('date')[['cases', 'deaths']].sum()
+        if totals is None:
+            totals = chunk_totals
+        else:
+            # a date may span two chunks, so the totals are added together
+            totals = totals.add(chunk_totals, fill_value=0)
+
+    if totals is None:
+        totals = pd.DataFrame(
+            {'cases': [], 'deaths': []}, index=pd.DatetimeIndex([], name='date'),
+        )
+
+    return totals.sort_index()
+
+def _read_nytimes_csv(path, selection=None):
+    """
+    Hidden function for reading the NYTimes data file and returning a
+    Pandas DataFrame with the date column parsed. If a region `selection`
+    is given, the file is read in chunks and the rows of the regions that
+    do not match are dropped from each chunk.
+
+    """
+
+    if selection:
+        with _stage('read_nytimes_chunks') as stats:
+            chunks = list(_iter_nytimes_chunks(path, selection=selection))
+            stats['rows_out'] = sum(len(c) for c in chunks)
+        if not chunks:
+            return _parse_nytimes_dates(pd.DataFrame(
+                {c: pd.Series(dtype=d) for c, d in NYTIMES_DTYPES.items()},
+            ))
+        return pd.concat(chunks, ignore_index=True)
+
+    with _stage('read_nytimes_csv') as stats:
+        nytimes_data = pd.read_csv(
+            path,
+            usecols=list(NYTIMES_DTYPES),
+            dtype=NYTIMES_DTYPES,
+            engine=_CSV_ENGINE,
+        )
+        stats['rows_out'] = len(nytimes_data)
+
+    with _stage('parse_nytimes_dates', rows_in=len(nytimes_data)) as stats:
+        nytimes_data = _parse_nytimes_dates(nytimes_data)
+        stats['rows_out'] = len(nytimes_data)
+
+    return nytimes_data
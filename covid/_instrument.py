@@ -0,0 +1,195 @@
+import time
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+__all__ = [
+    'set_instrumentation',
+    'record_stages',
+]
+
+_LOGGER = logging.getLogger('covid')
+
+_STAGE_CALLBACK = None
+_STAGE_LOG = False
+_TRACE_MEMORY = False
+
+_RECORDERS = []
+_RECORDERS_LOCK = threading.Lock()
+_STAGE_STACK = threading.local()
+
+
+def set_instrumentation(callback=None, log=False, trace_memory=False):
+    """
+    Function for enabling the instrumentation of the stages of the data
+    loading pipeline, e.g. reading each source file, aligning the
+    regions, reading and writing the on-disk cache, and deriving the
+    daily and smoothed metrics.
+
+    Parameters
+    ----------
+    callback : callable, NoneType, optional
+        A function that is called with the stats of each stage as it
+        finishes, see `record_stages` for the keys of the stats. If set
+        to None (default), no function is called.
+    log : bool, optional
+        Whether or not to log the stats of each stage at the INFO level of
+        the "covid" logger. Default is False.
+    trace_memory : bool, optional
+        Whether or not to record the peak memory allocated by each stage,
+        using `tracemalloc`, which slows down the stages considerably.
+        Default is False.
+
+    Notes
+    -----
+    With the default arguments, the instrumentation is disabled and has
+    no overhead. Stages run in worker processes, see `set_parallel_load`,
+    are not recorded.
+
+    """
+
+    global _STAGE_CALLBACK, _STAGE_LOG, _TRACE_MEMORY
+
+    if callback is not None and not callable(callback):
+        raise ValueError("callback should be callable or None.")
+
+    _STAGE_CALLBACK = callback
+    _STAGE_LOG = log
+    _TRACE_MEMORY = trace_memory
+
+@contextmanager
+def record_stages(trace_memory=False):
+    """
+    Function for recording the stats of every stage of the data loading
+    pipeline that runs within a `with` block.
+
+    Parameters
+    ----------
+    trace_memory : bool, optional
+        Whether or not to record the peak memory allocated by each stage,
+        using `tracemalloc`, which slows down the stages considerably.
+        Default is False.
+
+    Yields
+    ------
+    stages : list of dict
+        The list to which the stats of each stage are appended as it
+        finishes, with the keys "stage" (the name of the stage), "detail"
+        (e.g. the file that was read, or None), "seconds" (the wall
+        time), "rows_in" and "rows_out" (the number of rows or regions
+        going in and out, or None if not applicable), and "peak_memory"
+        (the peak memory in bytes allocated during the stage, or None if
+        memory is not traced). Nested stages are appended before the
+        stages containing them.
+
+    Examples
+    --------
+    >>> with covid.record_stages() as stages:
+    ...     covid.get_data('jhu', use_cache=False)
+    >>> pd.DataFrame(stages)
+
+    """
+
+    stages = []
+    recorder = (stages, trace_memory)
+
+    with _RECORDERS_LOCK:
+        _RECORDERS.append(recorder)
+    try:
+        yield stages
+    finally:
+        with _RECORDERS_LOCK:
+            _RECORDERS.remove(recorder)
+
+def _instrumented():
+    """
+    Hidden function for returning whether or not any stats are currently
+    being recorded.
+
+    """
+
+    return bool(_RECORDERS) or _STAGE_CALLBACK is not None or _STAGE_LOG
+
+@contextmanager
+def _stage(name, detail=None, rows_in=None):
+    """
+    Hidden function for recording the stats of a stage of the pipeline
+    that runs within a `with` block. Yields a dictionary in which the
+    "rows_out" of the stage can be set.
+
+    """
+
+    stats = {'stage': name, 'detail': detail, 'rows_in': rows_in, 'rows_out': None}
+
+    if not _instrumented():
+        yield stats
+        return
+
+    trace_memory = _TRACE_MEMORY or any(t for _, t in list(_RECORDERS))
+    started_tracing = False
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+
+    stack = getattr(_STAGE_STACK, 'frames', None)
+    if stack is None:
+        stack = _STAGE_STACK.frames = []
+
+    frame = {'start_memory': None, 'peak_memory': 0}
+    if trace_memory:
+        frame['start_memory'] = tracemalloc.get_traced_memory()[0]
+        # without reset_peak (before Python 3.9), the peak since tracing
+        # started is used, which is an upper bound on the peak of the stage
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+    stack.append(frame)
+
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats['seconds'] = time.perf_counter() - start
+        stack.pop()
+
+        stats['peak_memory'] = None
+        if frame['start_memory'] is not None:
+            # the peak is reset by nested stages, so their peaks are kept as well
+            peak = max(tracemalloc.get_traced_memory()[1], frame['peak_memory'])
+            stats['peak_memory'] = peak - frame['start_memory']
+            if stack:
+                stack[-1]['peak_memory'] = max(stack[-1]['peak_memory'], peak)
+        if started_tracing:
+            tracemalloc.stop()
+
+        stats = {
+            k: stats[k] for k in ['stage', 'detail', 'seconds', 'rows_in', 'rows_out', 'peak_memory']
+        }
+        _report(stats)
+
+def _report(stats):
+    """
+    Hidden function for passing the stats of a finished stage to every
+    recorder, the callback, and the logger.
+
+    """
+
+    with _RECORDERS_LOCK:
+        recorders = list(_RECORDERS)
+    for stages, _ in recorders:
+        stages.append(dict(stats))
+
+    if _STAGE_CALLBACK is not None:
+        _STAGE_CALLBACK(dict(stats))
+
+    if _STAGE_LOG:
+        _LOGGER.info(
+            "%s%s: %.4f s, rows in: %s, rows out: %s, peak memory: %s",
+            stats['stage'],
+            f" ({stats['detail']})" if stats['detail'] is not None else "",
+            stats['seconds'],
+            stats['rows_in'],
+            stats['rows_out'],
+            stats['peak_memory'],
+        )
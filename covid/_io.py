@@ -1,11 +1,28 @@
+import datetime
 import numpy as np
 import pandas as pd
-from scipy import signal
 import os
 
+from ._instrument import _stage
+from ._cache import (
+    _attached_dataset, _cached_dataset, _is_cached, _memoized, _memoized_dataset, clear_cache,
+)
+from ._metrics import derive_metrics, _derive_reported
+from ._ingest import (
+    JHU_US_COLUMNS, JHU_GLOBAL_COLUMNS, _iter_nytimes_chunks, _nytimes_totals, _read_jhu_files,
+    _read_jhu_regions, _read_nytimes_csv, _region_selection,
+)
+
 __all__ = [
     'get_data',
     'get_bay_data',
+    'get_cube',
+    'get_derived_data',
+    'get_region_coverage',
+    'get_region_index',
+    'get_region_series',
+    'memory_usage',
+    'refresh',
 ]
 
 FILE_PATH = os.path.dirname(os.path.realpath(__file__))
@@ -20,173 +37,657 @@ BAYAREA_COUNTIES = [
     'Solano',
     'Sonoma',
 ]
+JHU_METRICS = {
+    'confirmed': 'cases',
+    'deaths': 'deaths',
+    'recovered': 'recovered',
+}
 
-def _read_jhu_csv(path, datatype, us_or_global):
+def _jhu_paths(us_or_global):
     """
-    Function for reading an individual JHU data file and returning
-    a Pandas DataFrame with desired format.
+    Function for returning the paths to the JHU time series files for
+    either the US or global data.
 
     """
 
-    jhu_csv = pd.read_csv(path)
+    jhu_dir = f"{FILE_PATH}/data/jhu/csse_covid_19_data/csse_covid_19_time_series"
 
     if us_or_global == "us":
+        datatypes = ['confirmed', 'deaths']
+        region = 'US'
+    elif us_or_global == 'global':
+        datatypes = ['confirmed', 'deaths', 'recovered']
+        region = 'global'
 
-        jhu_us_remove_columns = [
-            'UID', 'iso2', 'iso3', 'code3', 'Combined_Key', "Lat", "Long_",
-        ]
-        if 'Population' in jhu_csv.keys():
-            jhu_us_remove_columns.append('Population')
-        jhu_csv.drop(columns=jhu_us_remove_columns, inplace=True)
-
-        jhu_us_rename_columns = {
-            "FIPS": "fips",
-            "Admin2": "county",
-            "Province_State": "state",
-            "Country_Region": "country",
-        }
+    return [f"{jhu_dir}/time_series_covid19_{d}_{region}.csv" for d in datatypes]
 
-        jhu_csv.rename(columns=jhu_us_rename_columns, inplace=True)
+def _nytimes_path():
+    """
+    Function for returning the path to the NYTimes county data file.
 
-        timestamp = {d: pd.to_datetime(
-            d,
-            errors='ignore',
-        ) for d in jhu_csv.keys() if d not in jhu_us_rename_columns.values()}
+    """
 
-        jhu_csv.rename(columns=timestamp, inplace=True)
+    return f"{FILE_PATH}/data/nytimes/us-counties.csv"
 
-        jhu_us_keep_columns = ['fips', 'county', 'state', 'country']
+def _align_regions(region_frames):
+    """
+    Function for aligning the regions of the `region_frames` on all of
+    their columns, returning every region found in any of the frames (in
+    order of first appearance), the row position of each region in each
+    frame (-1 where a frame does not have the region), and a boolean
+    array with shape (regions, frames) of which frames have each region.
 
-        if datatype == 'confirmed':
-            jhu_csv = pd.melt(
-                jhu_csv,
-                id_vars=jhu_us_keep_columns,
-                var_name='date',
-                value_name='cases',
-            )
-        elif datatype == 'deaths':
-            jhu_csv = pd.melt(
-                jhu_csv,
-                id_vars=jhu_us_keep_columns,
-                var_name='date',
-                value_name='deaths',
-            )
+    """
 
-    elif us_or_global == 'global':
-        jhu_global_rename_columns = {
-            "Province/State": "state",
-            "Country/Region": "country",
-        }
+    keys = list(region_frames[0].columns)
+    region_ids = pd.concat(region_frames, ignore_index=True).groupby(
+        keys, sort=False, dropna=False,
+    ).ngroup().to_numpy()
+    file_ids = np.split(region_ids, np.cumsum([len(r) for r in region_frames])[:-1])
 
-        jhu_csv.rename(columns=jhu_global_rename_columns, inplace=True)
+    # the groups are numbered in order of first appearance, so the
+    # first row of each group gives the metadata of every region
+    nregions = region_ids.max() + 1 if len(region_ids) else 0
+    first_rows = np.unique(region_ids, return_index=True)[1]
+    regions = pd.concat(region_frames, ignore_index=True).iloc[first_rows].reset_index(drop=True)
 
-        timestamp = {
-            d: pd.to_datetime(
-                d, errors='ignore',
-            ) for d in jhu_csv.keys() if d not in jhu_global_rename_columns.values()
-        }
+    positions = [pd.Index(ids).get_indexer(np.arange(nregions)) for ids in file_ids]
+    presence = np.stack([pos >= 0 for pos in positions], axis=1)
 
-        jhu_csv.rename(columns=timestamp, inplace=True)
-        jhu_global_keep_columns = ['state', 'country']
-        if datatype == 'confirmed':
-            jhu_csv = pd.melt(
-                jhu_csv,
-                id_vars=jhu_global_keep_columns,
-                var_name='date',
-                value_name='cases',
-            )
-        elif datatype == 'deaths':
-            jhu_csv = pd.melt(
-                jhu_csv,
-                id_vars=jhu_global_keep_columns,
-                var_name='date',
-                value_name='deaths',
-            )
-        elif datatype == 'recovered':
-            jhu_csv = pd.melt(
-                jhu_csv,
-                id_vars=jhu_global_keep_columns,
-                var_name='date',
-                value_name='recovered',
+    return regions, positions, presence
+
+def _merge_jhu_data(us_or_global, jhu_files):
+    """
+    Function for merging the JHU data to combine different source
+    files, returning the region metadata, the dates, a dictionary of 2-D
+    arrays with shape (regions, dates) for each metric, and the boolean
+    array of which files have each region (see `_align_regions`). The
+    files are aligned on their regions, and the values of a region that
+    is missing from a file are set to NaN for that metric. Only the dates
+    that are present in every file are kept. The `jhu_files` are the
+    outputs of `_read_jhu_csv` for each of the paths returned by
+    `_jhu_paths`.
+
+    """
+
+    jhu_metrics = [
+        JHU_METRICS[p.lower().split('.')[-2].split('_')[-2]] for p in _jhu_paths(us_or_global)
+    ]
+
+    with _stage(
+        'merge_jhu_data', detail=us_or_global, rows_in=sum(len(f[0]) for f in jhu_files),
+    ) as stats:
+        regions, region_positions, presence = _align_regions([f[0] for f in jhu_files])
+
+        dates = jhu_files[0][1]
+        for f in jhu_files[1:]:
+            dates = dates[dates.isin(f[1])]
+
+        # the metrics are stacked by position, with the rows aligned on the regions
+        metrics = {}
+        for metric, f, rpos in zip(jhu_metrics, jhu_files, region_positions):
+            dpos = f[1].get_indexer(dates)
+            values = np.full((len(regions), len(dates)), np.nan)
+            values[rpos >= 0] = f[2][np.ix_(rpos[rpos >= 0], dpos)]
+            metrics[metric] = values
+        stats['rows_out'] = len(regions)
+
+    return regions, dates, metrics, presence
+
+def _get_jhu_cube(selection=None, dates=None):
+    """
+    Function for reading all JHU data and returning the region metadata,
+    the dates, and a dictionary of 2-D arrays with shape (regions, dates)
+    for each metric. If a region `selection` is given, only the matching
+    regions are read, and the global files are skipped entirely if the
+    selection uses columns that only the US files have (county or fips).
+    If `dates` is given, only those dates are read.
+
+    """
+
+    jhu_columns = {'us': JHU_US_COLUMNS, 'global': JHU_GLOBAL_COLUMNS}
+    us_or_globals = [
+        g for g in ['us', 'global'] if set(selection or {}) <= set(jhu_columns[g].values())
+    ]
+
+    jhu_sources = [(p, g) for g in us_or_globals for p in _jhu_paths(g)]
+    jhu_files = _read_jhu_files(jhu_sources, selection=selection, dates=dates)
+
+    parts = []
+    for g in us_or_globals:
+        nfiles = len(_jhu_paths(g))
+        parts.append(_merge_jhu_data(g, jhu_files[:nfiles])[:3])
+        jhu_files = jhu_files[nfiles:]
+
+    regions = pd.concat([p[0] for p in parts], ignore_index=True, sort=False)
+    regions = regions[['fips', 'county', 'state', 'country']]
+
+    dates = parts[0][1]
+    for p in parts[1:]:
+        dates = dates.union(p[1])
+
+    metrics = {}
+    for metric in JHU_METRICS.values():
+        values = np.full((len(regions), len(dates)), np.nan)
+        start = 0
+        for p in parts:
+            stop = start + len(p[0])
+            if metric in p[2]:
+                dpos = dates.get_indexer(p[1])
+                values[start:stop, dpos] = p[2][metric]
+            start = stop
+        metrics[metric] = values
+
+    return regions, dates, metrics
+
+def _get_nytimes_cube(selection=None):
+    """
+    Function for reading the NYTimes data and returning the region
+    metadata, the dates, and a dictionary of 2-D arrays with shape
+    (regions, dates) for each metric. If a region `selection` is given,
+    only the rows of the matching regions are kept.
+
+    """
+
+    return _nytimes_frame_to_cube(
+        _read_nytimes_csv(_nytimes_path(), selection=selection),
+    )
+
+def _nytimes_frame_to_cube(nytimes_data):
+    """
+    Function for converting the NYTimes data in its original long format
+    to the region metadata, the dates, and a dictionary of 2-D arrays
+    with shape (regions, dates) for each metric. Dates without a
+    reported value for a county are set to NaN.
+
+    """
+
+    with _stage('nytimes_frame_to_cube', rows_in=len(nytimes_data)) as stats:
+        # the counties are identified by their county and state, which are
+        # factorized separately and combined into a single integer key
+        county_idx = pd.factorize(nytimes_data['county'])[0]
+        state_idx, states = pd.factorize(nytimes_data['state'])
+        region_idx = pd.factorize(
+            (county_idx + 1) * (len(states) + 1) + (state_idx + 1),
+        )[0]
+        first_rows = np.unique(region_idx, return_index=True)[1]
+        regions = nytimes_data[['fips', 'county', 'state']].iloc[first_rows].reset_index(drop=True)
+
+        date_idx, dates = pd.factorize(nytimes_data['date'], sort=True)
+        dates = pd.DatetimeIndex(dates)
+
+        metrics = {}
+        for metric in ['cases', 'deaths']:
+            values = np.full((len(regions), len(dates)), np.nan)
+            values[region_idx, date_idx] = nytimes_data[metric].to_numpy(dtype=np.float64)
+            metrics[metric] = values
+        stats['rows_out'] = len(regions)
+
+    return regions, dates, metrics
+
+def _load_cube(data_source, use_cache=True, county=None, state=None, country=None, fips=None):
+    """
+    Function for loading the region metadata, dates, and metric arrays
+    of a dataset, using the in-process and on-disk caches if `use_cache`
+    is True. If a region selection is given and the full dataset is not
+    cached, only the matching regions are read from the source files.
+
+    """
+
+    if data_source == "jhu":
+        paths = _jhu_paths('us') + _jhu_paths('global')
+        loader = _get_jhu_cube
+    elif data_source == "nytimes":
+        paths = [_nytimes_path()]
+        loader = _get_nytimes_cube
+        if country is not None:
+            raise ValueError("country is not available for this dataset.")
+    else:
+        raise ValueError("data_source should be either 'jhu' or 'nytimes'.")
+
+    selection = _region_selection(county=county, state=state, country=country, fips=fips)
+    selection_key = (data_source, tuple(selection.items()))
+
+    if not use_cache:
+        return loader(selection=selection)
+
+    attached = _attached_dataset(data_source)
+
+    # a memoized selection is returned before fingerprinting the source
+    # files, which hashes every file without an on-disk cache manifest
+    if attached is None and selection:
+        memoized = _memoized_dataset(selection_key)
+        if memoized is not None:
+            return memoized
+
+    if attached is not None or not selection or _is_cached(data_source, paths):
+        if attached is not None:
+            regions, dates, metrics = attached
+        else:
+            regions, dates, metrics = _memoized(
+                data_source, lambda: _cached_dataset(data_source, paths, loader),
             )
+        if not selection:
+            return regions, dates, metrics
+
+        rows = _region_rows(regions, county=county, state=state, country=country, fips=fips)
+        return (
+            regions.iloc[rows].reset_index(drop=True),
+            dates,
+            {m: values[rows] for m, values in metrics.items()},
+        )
 
-    return jhu_csv
+    return _memoized(selection_key, lambda: loader(selection=selection))
 
-def _merge_jhu_data(us_or_global):
+def _cube_to_frame(regions, dates, metrics, compact=False):
     """
-    Function for merging the JHU data to combine different source
-    files.
+    Function for converting the region metadata, dates, and metric arrays
+    of a dataset to the long format with one row per region and date. The
+    rows are ordered by region, then by date, so that the metric columns
+    are views of the metric arrays, unless these are read-only (e.g.
+    shared with the in-process cache), in which case they are copied so
+    that the returned DataFrame can be modified. If `compact` is True,
+    the string columns are stored as categoricals and the fips codes as
+    nullable 32-bit integers.
 
     """
 
-    if us_or_global == "us":
-        jhu_paths = [
-            f"{FILE_PATH}/data/jhu/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_confirmed_US.csv",
-            f"{FILE_PATH}/data/jhu/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_deaths_US.csv",
-        ]
-
-        jhu_datainfo = [
-            p.lower().split('.')[-2].split('_')[-2:] for p in jhu_paths
-        ]
-
-        jhu_data = pd.merge(
-            *[_read_jhu_csv(
-                p,
-                *datainfo,
-            ) for p, datainfo in zip(
-                jhu_paths,
-                jhu_datainfo,
-            )],
+    nregions, ndates = len(regions), len(dates)
+
+    data = {}
+    for col in regions.columns:
+        values = regions[col].to_numpy()
+        if not compact:
+            data[col] = np.repeat(values, ndates)
+        elif col == 'fips':
+            data[col] = pd.array(np.repeat(values, ndates), dtype='Int32')
+        else:
+            codes, categories = pd.factorize(values)
+            data[col] = pd.Categorical.from_codes(np.repeat(codes, ndates), categories)
+    data['date'] = np.tile(dates.to_numpy(), nregions)
+    for metric, values in metrics.items():
+        values = values.reshape(-1)
+        if not values.flags.writeable:
+            values = values.copy()
+        data[metric] = values
+
+    return pd.DataFrame(data, copy=False)
+
+def _format_frame(data_source, regions, dates, metrics, compact=False):
+    """
+    Function for converting (a selection of) a dataset to the long format
+    returned by `get_data` for the specified `data_source`.
+
+    """
+
+    with _stage('format_frame', detail=data_source, rows_in=len(regions)) as stats:
+        df_data = _cube_to_frame(regions, dates, metrics, compact=compact)
+
+        if data_source == "nytimes":
+            # only keep the dates on which each county has reported data
+            df_data = df_data[~np.isnan(metrics['cases'].reshape(-1))]
+            df_data = df_data[['date', 'county', 'state', 'fips', 'cases', 'deaths']]
+            df_data.reset_index(drop=True, inplace=True)
+            count_dtype = np.int64
+        else:
+            count_dtype = None
+
+        if compact:
+            count_dtype = np.int32
+
+        if count_dtype is not None:
+            for metric in metrics:
+                if not df_data[metric].isna().any():
+                    df_data[metric] = df_data[metric].to_numpy().astype(count_dtype)
+                elif compact:
+                    df_data[metric] = pd.array(df_data[metric].to_numpy(), dtype='Int32')
+        stats['rows_out'] = len(df_data)
+
+    return df_data
+
+def memory_usage(data_sources=('jhu', 'nytimes'), use_cache=True):
+    """
+    Function for summarizing the memory used by each COVID-19 dataset,
+    in its dense (`get_cube`) representation and as the DataFrames
+    returned by `get_data` with and without `compact=True`.
+
+    Parameters
+    ----------
+    data_sources : tuple of str, optional
+        The sources to summarize. Default is both "jhu" and "nytimes".
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed datasets. See `get_data` for more information. Default is
+        True.
+
+    Returns
+    -------
+    usage : Pandas.DataFrame
+        The memory usage in bytes, with one row per source and the
+        columns "cube", "frame", and "compact_frame". The string columns
+        of the DataFrames are included in their usage.
+
+    """
+
+    usage = {}
+    for data_source in data_sources:
+        regions, dates, metrics = _load_cube(data_source, use_cache=use_cache)
+        usage[data_source] = {
+            'cube': (
+                regions.memory_usage(index=False, deep=True).sum()
+                + dates.nbytes
+                + sum(values.nbytes for values in metrics.values())
+            ),
+            'frame': _format_frame(
+                data_source, regions, dates, metrics,
+            ).memory_usage(index=False, deep=True).sum(),
+            'compact_frame': _format_frame(
+                data_source, regions, dates, metrics, compact=True,
+            ).memory_usage(index=False, deep=True).sum(),
+        }
+
+    return pd.DataFrame.from_dict(usage, orient='index')
+
+def get_cube(data_source='jhu', metric='cases', use_cache=True, county=None, state=None,
+             country=None, fips=None):
+    """
+    Function for returning a single COVID-19 metric as a dense 2-D array
+    with one row per region and one column per date.
+
+    Parameters
+    ----------
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the
+        NY Times dataset. See `get_data` for more information on these
+        datasets.
+    metric : str, optional
+        The metric to return. Can be "cases" or "deaths" for either
+        dataset, or "recovered" for the JHU dataset (which is NaN for
+        the US counties). Default is "cases".
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed dataset. See `get_data` for more information. Default is
+        True.
+    county, state, country, fips : str, int, list, NoneType, optional
+        Option to only return the specified regions. See `get_data` for
+        more information.
+
+    Returns
+    -------
+    values : ndarray
+        A C-contiguous array of shape (regions, dates) containing the
+        cumulative values of `metric`, which is read-only if no regions
+        are selected. Missing values are NaN.
+    regions : Pandas.DataFrame
+        The region metadata (fips, county, state, and, for the JHU
+        dataset, country) for each row of `values`.
+    dates : Pandas.DatetimeIndex
+        The dates for each column of `values`.
+
+    """
+
+    regions, dates, metrics = _load_cube(
+        data_source, use_cache=use_cache, county=county, state=state, country=country, fips=fips,
+    )
+
+    if metric not in metrics:
+        raise ValueError(
+            f"metric should be one of {', '.join(repr(m) for m in metrics)}."
         )
-    elif us_or_global == 'global':
-        jhu_paths = [
-            f"{FILE_PATH}/data/jhu/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_confirmed_global.csv",
-            f"{FILE_PATH}/data/jhu/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_deaths_global.csv",
-            f"{FILE_PATH}/data/jhu/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_recovered_global.csv",
-        ]
 
-        jhu_datainfo = [
-            p.lower().split('.')[-2].split('_')[-2:] for p in jhu_paths
-        ]
+    return metrics[metric], regions, dates
 
-        for ii in range(len(jhu_paths)):
-            if ii == 0:
-                jhu_data = _read_jhu_csv(jhu_paths[ii], *jhu_datainfo[ii])
-            elif ii > 0:
-                jhu_data = pd.merge(
-                    jhu_data,
-                    _read_jhu_csv(jhu_paths[ii], *jhu_datainfo[ii]),
-                )
-    
-    return jhu_data
+def get_derived_data(data_source='jhu', window_length=15, polyorder=3, use_cache=True):
+    """
+    Function for computing the daily new cases and deaths, and their
+    Savitzky-Golay filtered versions, for every region of a dataset at
+    once.
+
+    Parameters
+    ----------
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the
+        NY Times dataset. See `get_data` for more information on these
+        datasets.
+    window_length : int, optional
+        The length of the Savitzky-Golay filter window, in days. Default
+        is 15.
+    polyorder : int, optional
+        The order of the polynomial used by the Savitzky-Golay filter.
+        Default is 3.
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed dataset. See `get_data` for more information. Default is
+        True.
 
-def _get_jhu_data():
+    Returns
+    -------
+    derived : dict
+        A dictionary of arrays of shape (regions, dates), with keys
+        "new_cases", "new_deaths", "new_cases_filt", and
+        "new_deaths_filt". See `derive_metrics`. As in the plots, the
+        metrics of each region are derived over the dates on which it
+        has reported data only, and are NaN on the other dates.
+    regions : Pandas.DataFrame
+        The region metadata for each row of the arrays in `derived`.
+    dates : Pandas.DatetimeIndex
+        The dates for each column of the arrays in `derived`.
+
+    """
+
+    regions, dates, metrics = _load_cube(data_source, use_cache=use_cache)
+    derived = _derive_reported(
+        metrics['cases'], metrics['deaths'], ~np.isnan(metrics['cases']),
+        window_length=window_length, polyorder=polyorder,
+    )
+
+    return derived, regions, dates
+
+def _region_lookup(regions, column):
+    """
+    Function for building a lookup table from each value of `column` in
+    the region metadata to the row positions of the matching regions.
+
+    """
+
+    return regions.groupby(column, sort=False).indices
+
+def _region_rows(regions, county=None, state=None, country=None, fips=None):
+    """
+    Function for returning the sorted row positions of the regions that
+    match all of the specified selections. Each selection can be a
+    single value or a list of values, and None means no selection.
+
+    """
+
+    rows = np.arange(len(regions))
+    selections = {'county': county, 'state': state, 'country': country, 'fips': fips}
+
+    for column, selection in selections.items():
+        if selection is None:
+            continue
+        if column not in regions.columns:
+            raise ValueError(f"{column} is not available for this dataset.")
+        if np.isscalar(selection):
+            selection = [selection]
+
+        lookup = _region_lookup(regions, column)
+        matches = [lookup[s] for s in selection if s in lookup]
+        matches = np.concatenate(matches) if matches else np.array([], dtype=np.intp)
+        rows = np.intersect1d(rows, matches)
+
+    return rows
+
+def _county_rows(regions, counties):
+    """
+    Function for returning the row position of each of `counties` in the
+    region metadata of a dataset.
+
+    """
+
+    lookup = _region_lookup(regions, 'county')
+    rows = []
+    for county in counties:
+        if county not in lookup:
+            raise ValueError(f"{county} was not found in the dataset.")
+        rows.append(lookup[county][0])
+
+    return np.array(rows)
+
+def _lastnumdays_start(dates, lastnumdays):
+    """
+    Function for returning the position of the first of the sorted `dates`
+    within the specified last number of days, or 0 if `lastnumdays` is
+    None.
+
+    """
+
+    if lastnumdays is None:
+        return 0
+
+    cutoff = pd.Timestamp(datetime.date.today() - datetime.timedelta(days=lastnumdays))
+
+    return dates.searchsorted(cutoff, side='right')
+
+def get_region_coverage():
     """
-    Function for reading all JHU data and returning a Pandas DataFrame.
+    Function for reporting the regions of the John Hopkins University
+    dataset that are missing from some of its source files, e.g. regions
+    with confirmed cases but no recovered cases.
+
+    Returns
+    -------
+    coverage : Pandas.DataFrame
+        A DataFrame with the region metadata of each region that is
+        missing from at least one of the source files of the US or global
+        data, and a boolean column for each metric of whether its source
+        file has the region. The "recovered" column is missing (NA) for
+        the US regions, which do not have a recovered source file.
+
+    Notes
+    -----
+    In `get_data` and the other functions, these regions are kept, with
+    NaN values for the metrics of the files that do not have them.
 
     """
 
-    jhu_data = pd.concat(
-        (_merge_jhu_data('us'), _merge_jhu_data('global')),
-        ignore_index=True,
-        sort=False,
+    parts = []
+    for us_or_global, jhu_columns in [('us', JHU_US_COLUMNS), ('global', JHU_GLOBAL_COLUMNS)]:
+        paths = _jhu_paths(us_or_global)
+        regions, _, presence = _align_regions(
+            [_read_jhu_regions(p, us_or_global) for p in paths]
+        )
+        partial = ~presence.all(axis=1)
+
+        part = regions[partial].reset_index(drop=True)
+        for ii, p in enumerate(paths):
+            metric = JHU_METRICS[p.lower().split('.')[-2].split('_')[-2]]
+            part[metric] = pd.array(presence[partial, ii], dtype='boolean')
+        parts.append(part)
+
+    coverage = pd.concat(parts, ignore_index=True, sort=False)
+    coverage = coverage.reindex(
+        columns=['fips', 'county', 'state', 'country'] + list(JHU_METRICS.values()),
     )
+    coverage['recovered'] = coverage['recovered'].astype('boolean')
 
-    return jhu_data
+    return coverage
 
-def _get_nytimes_data():
+def get_region_index(data_source='jhu', use_cache=True):
     """
-    Function for reading the NYTimes data and returning a Pandas
-    DataFrame.
+    Function for returning the index of the regions in the dataset
+    returned by `get_data`, i.e. the range of rows holding each region.
 
+    Parameters
+    ----------
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the
+        NY Times dataset. See `get_data` for more information on these
+        datasets.
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed dataset. See `get_data` for more information. Default is
+        True.
+
+    Returns
+    -------
+    region_index : Pandas.DataFrame
+        The region metadata, with "start" and "stop" columns giving the
+        rows of each region in the DataFrame returned by `get_data`,
+        i.e. `df_data.iloc[start:stop]`. Within each region, the rows
+        are sorted by date.
+
+    """
+
+    regions, dates, metrics = _load_cube(data_source, use_cache=use_cache)
+
+    if data_source == "nytimes":
+        counts = np.sum(~np.isnan(metrics['cases']), axis=1)
+    else:
+        counts = np.full(len(regions), len(dates))
+
+    region_index = regions.copy()
+    region_index['stop'] = np.cumsum(counts)
+    region_index['start'] = region_index['stop'] - counts
+
+    return region_index[list(regions.columns) + ['start', 'stop']]
+
+def get_region_series(data_source='jhu', county=None, state=None, country=None,
+                      fips=None, lastnumdays=None, use_cache=True, compact=False):
     """
+    Function for returning the COVID-19 data for a selection of regions
+    and for only the last number of days. If the full dataset has not
+    been cached, only the selected regions are read from the source
+    files, see `get_data`.
+
+    Parameters
+    ----------
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the
+        NY Times dataset. See `get_data` for more information on these
+        datasets.
+    county, state, country, fips : str, int, list, NoneType, optional
+        The regions to select, either as a single value or a list of
+        values. Regions must match every selection that is not None.
+        The country selection is only available for the JHU dataset.
+    lastnumdays : int, NoneType, optional
+        Option to return only the specified last number of days. If set
+        to None, then the full date range is returned.
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed dataset. See `get_data` for more information. Default is
+        True.
+    compact : bool, optional
+        Whether or not to use compact dtypes for the returned DataFrame.
+        See `get_data` for more information. Default is False.
+
+    Returns
+    -------
+    df_data : Pandas.DataFrame
+        A DataFrame with the same columns as returned by `get_data`, for
+        only the selected regions and dates.
 
-    nytimes_data = pd.read_csv(f"{FILE_PATH}/data/nytimes/us-counties.csv")
-    nytimes_data['date'] = pd.to_datetime(nytimes_data['date'])
+    """
 
-    return nytimes_data
+    regions, dates, metrics = _load_cube(
+        data_source, use_cache=use_cache, county=county, state=state, country=country, fips=fips,
+    )
+    start = _lastnumdays_start(dates, lastnumdays)
+
+    return _format_frame(
+        data_source,
+        regions,
+        dates[start:],
+        {m: np.ascontiguousarray(values[:, start:]) for m, values in metrics.items()},
+        compact=compact,
+    )
 
-def get_data(data_source='jhu'):
+def get_data(data_source='jhu', use_cache=True, compact=False, county=None, state=None,
+             country=None, fips=None):
     """
     Function for parsing and returning a dataset on COVID-19.
 
@@ -197,12 +698,36 @@ def get_data(data_source='jhu'):
         for the John Hopkins University dataset or "nytimes" for the
         NY Times dataset. See Notes for more information on these
         datasets.
+    use_cache : bool, optional
+        If True (default), the dataset is returned from the in-process
+        cache if it has already been loaded, otherwise it is read from
+        the on-disk cache when the source files have not changed since
+        it was last parsed, and is written to both caches. If False, the
+        source files are always parsed and the caches are left untouched.
+    compact : bool, optional
+        If True, the county, state and country columns are stored as
+        categoricals, the fips codes as nullable 32-bit integers, and the
+        counts as 32-bit integers (nullable if any are missing), which
+        greatly reduces the memory usage, see `memory_usage`. Default is
+        False.
+    county, state, country, fips : str, int, list, NoneType, optional
+        Option to only return the specified regions, either as a single
+        value or a list of values. Regions must match every selection
+        that is not None. The country selection is only available for
+        the JHU dataset. If the full dataset has not been cached, only
+        the selected regions are read from the source files, see Notes.
 
     Returns
     -------
     df_data : Pandas.DataFrame
         A DataFrame containing all the relevant information from the
-        specified `data_source` on COVID-19.
+        specified `data_source` on COVID-19, with one row per region and
+        date. The DataFrame can be modified without changing the cached
+        dataset. When the dataset is read from the in-process or on-disk
+        cache, or from datasets attached with `attach_shared`, every call
+        makes a full private copy of the metric arrays for its metric
+        columns. Use `get_cube` to access the cached metric arrays
+        without copying them.
 
     Notes
     -----
@@ -212,17 +737,52 @@ def get_data(data_source='jhu'):
     The NY Times dataset can be found here:
         - https://github.com/nytimes/covid-19-data
 
+    The on-disk cache is stored in the directory given by the
+    `COVID_CACHE_DIR` environment variable, or `~/.cache/covid` if it is
+    not set. It is keyed on the size, modification time and hash of the
+    source files, and is rebuilt automatically when they change. The
+    in-process cache holds a bounded number of datasets with least
+    recently used eviction, see `set_cache_size`, and can be emptied
+    with `clear_cache` or updated with `refresh`.
+
+    When regions are selected and the full dataset is not already in
+    either cache, the rows of the other regions are skipped while
+    reading the source files, and the JHU global files are not read at
+    all if the county or fips codes are selected. Such region selections
+    are only kept in the in-process cache.
+
     """
 
-    if data_source == "jhu":
-        return _get_jhu_data()
-    elif data_source == "nytimes":
-        return _get_nytimes_data()
+    regions, dates, metrics = _load_cube(
+        data_source, use_cache=use_cache, county=county, state=state, country=country, fips=fips,
+    )
+
+    return _format_frame(data_source, regions, dates, metrics, compact=compact)
 
-    raise ValueError("data_source should be either 'jhu' or 'nytimes'.")
+def refresh(data_source='jhu'):
+    """
+    Function for discarding the in-process cache of a dataset and
+    reloading it, e.g. after the data submodules have been updated.
 
+    Parameters
+    ----------
+    data_source : str, optional
+        The source to reload. Can be either "jhu" for the John Hopkins
+        University dataset or "nytimes" for the NY Times dataset.
+
+    Returns
+    -------
+    df_data : Pandas.DataFrame
+        The reloaded dataset, see `get_data`.
 
-def get_bay_data(data_source='jhu'):
+    """
+
+    clear_cache(data_source)
+
+    return get_data(data_source=data_source)
+
+
+def get_bay_data(data_source='jhu', use_cache=True, streaming=False):
     """
     Function for parsing and returning a dataset on COVID-19 for the
     entire San Francisco Bay Area. See Notes for the included counties.
@@ -234,6 +794,15 @@ def get_bay_data(data_source='jhu'):
         for the John Hopkins University dataset or "nytimes" for the NY
         Times dataset. See Notes for more information on these
         datasets.
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed dataset. See `get_data` for more information. Default is
+        True.
+    streaming : bool, optional
+        Whether or not to sum the counties while streaming the source
+        file in chunks, so that the full dataset is never held in memory.
+        Only available for the NY Times dataset, and the caches are not
+        used. Default is False.
 
     Returns
     -------
@@ -255,17 +824,29 @@ def get_bay_data(data_source='jhu'):
 
     """
 
-    df = get_data(data_source=data_source)
+    if streaming:
+        if data_source != "nytimes":
+            raise ValueError("streaming is only available for the 'nytimes' data_source.")
+        bay_df = _nytimes_totals(_iter_nytimes_chunks(
+            _nytimes_path(), selection=_region_selection(county=BAYAREA_COUNTIES),
+        ))
+    else:
+        regions, dates, metrics = _load_cube(
+            data_source, use_cache=use_cache, county=BAYAREA_COUNTIES,
+        )
 
-    bayarea_cut = np.logical_or.reduce(
-        [df.county == bac for bac in BAYAREA_COUNTIES]
-    )
-    bay_df = df[bayarea_cut].groupby('date').sum()
-    bay_df.drop(['fips'], axis='columns', inplace=True)
+        with _stage('bay_aggregation', detail=data_source, rows_in=len(regions)) as stats:
+            # only keep the dates on which at least one county has reported data
+            datecut = ~np.all(np.isnan(metrics['cases']), axis=0)
+
+            bay_df = pd.DataFrame(
+                {m: np.nansum(metrics[m][:, datecut], axis=0) for m in ['cases', 'deaths']},
+                index=pd.Index(dates[datecut], name='date'),
+            )
+            stats['rows_out'] = len(bay_df)
 
-    bay_df['new_cases'] = np.concatenate(([0], np.diff(bay_df.cases)))
-    bay_df['new_deaths'] = np.concatenate(([0], np.diff(bay_df.deaths)))
-    bay_df['new_cases_filt'] = signal.savgol_filter(bay_df.new_cases, 15, 3)
-    bay_df['new_deaths_filt'] = signal.savgol_filter(bay_df.new_deaths, 15, 3)
+    derived = derive_metrics(bay_df.cases.to_numpy(), bay_df.deaths.to_numpy())
+    for metric, values in derived.items():
+        bay_df[metric] = values
 
     return bay_df
@@ -0,0 +1,161 @@
+import numpy as np
+
+from ._instrument import _stage
+
+
+__all__ = [
+    'derive_metrics',
+]
+
+
+def _fill_missing(values):
+    """
+    Hidden function for filling the missing (NaN) values of cumulative
+    time series along the last axis. Gaps are filled with the previous
+    value and dates before the first reported value with the first
+    reported value, so that they do not contribute any new counts.
+
+    """
+
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+
+    ndates = values.shape[-1]
+    last_valid = np.where(missing, 0, np.arange(ndates))
+    np.maximum.accumulate(last_valid, axis=-1, out=last_valid)
+    filled = np.take_along_axis(values, last_valid, axis=-1)
+
+    first_valid = np.argmax(~missing, axis=-1)[..., np.newaxis]
+    leading = np.arange(ndates) < first_valid
+
+    return np.where(
+        leading, np.take_along_axis(values, first_valid, axis=-1), filled,
+    )
+
+def _daily(values):
+    """
+    Hidden function for converting cumulative time series to daily new
+    counts along the last axis, with the first day set to zero, unless
+    it is missing.
+
+    """
+
+    daily = np.zeros_like(values, dtype=np.float64)
+    daily[..., 0][np.isnan(values[..., 0])] = np.nan
+    np.subtract(values[..., 1:], values[..., :-1], out=daily[..., 1:])
+
+    return daily
+
+def _savgol(values, window_length, polyorder):
+    """
+    Hidden function for applying the Savitzky-Golay filter along the
+    last axis, leaving the series without any reported value NaN.
+
+    """
+
+    # scipy is only imported when needed, as it is slow to import
+    from scipy import signal
+
+    reported = ~np.isnan(values).any(axis=-1)
+    if reported.all():
+        return signal.savgol_filter(values, window_length, polyorder, axis=-1)
+
+    filt = np.full_like(values, np.nan)
+    if reported.any():
+        filt[reported] = signal.savgol_filter(
+            values[reported], window_length, polyorder, axis=-1,
+        )
+
+    return filt
+
+def derive_metrics(cases, deaths, window_length=15, polyorder=3):
+    """
+    Function for computing the daily new cases and deaths, and their
+    Savitzky-Golay filtered versions, for many time series at once.
+
+    Parameters
+    ----------
+    cases : array_like
+        The cumulative cases, with dates along the last axis, e.g. an
+        array of shape (regions, dates) as returned by `get_cube`.
+    deaths : array_like
+        The cumulative deaths, with the same shape as `cases`.
+    window_length : int, optional
+        The length of the Savitzky-Golay filter window, in days. Must be
+        odd and no longer than the number of dates. Default is 15.
+    polyorder : int, optional
+        The order of the polynomial used by the Savitzky-Golay filter.
+        Must be less than `window_length`. Default is 3.
+
+    Returns
+    -------
+    derived : dict
+        A dictionary of arrays with the same shape as `cases`, with keys
+        "new_cases", "new_deaths", "new_cases_filt", and
+        "new_deaths_filt".
+
+    Notes
+    -----
+    Missing (NaN) cumulative values are treated as no new counts, i.e.
+    they are filled with the previous value, or with the first reported
+    value if they precede it. Time series that are entirely missing
+    remain NaN.
+
+    """
+
+    derived = {}
+    for metric, values in [('cases', cases), ('deaths', deaths)]:
+        values = np.asarray(values, dtype=np.float64)
+        nseries = values.size // values.shape[-1] if values.ndim else 0
+        with _stage('daily_counts', detail=metric, rows_in=nseries) as stats:
+            daily = _daily(_fill_missing(values))
+            stats['rows_out'] = nseries
+        with _stage('savgol_filter', detail=metric, rows_in=nseries) as stats:
+            derived[f'new_{metric}'] = daily
+            derived[f'new_{metric}_filt'] = _savgol(daily, window_length, polyorder)
+            stats['rows_out'] = nseries
+
+    return {
+        k: derived[k] for k in ['new_cases', 'new_deaths', 'new_cases_filt', 'new_deaths_filt']
+    }
+
+def _derive_reported(cases, deaths, reported, window_length=15, polyorder=3):
+    """
+    Hidden function for computing the metrics of `derive_metrics` for
+    arrays of shape (regions, dates) over only the dates on which each
+    region has reported values, given by the boolean array `reported`,
+    and NaN on the other dates. The filtered metrics of the regions that
+    have reported fewer dates than `window_length` are NaN, as there are
+    too few dates for the filter.
+
+    """
+
+    derived = {
+        k: np.full(np.shape(cases), np.nan)
+        for k in ['new_cases', 'new_deaths', 'new_cases_filt', 'new_deaths_filt']
+    }
+
+    # the regions are batched by their pattern of reported dates
+    patterns, pattern_idx = np.unique(reported, axis=0, return_inverse=True)
+    pattern_idx = np.ravel(pattern_idx)
+    for ii, datecut in enumerate(patterns):
+        if not datecut.any():
+            continue
+        rows = np.flatnonzero(pattern_idx == ii)
+        if datecut.sum() < window_length:
+            for metric, values in [('cases', cases), ('deaths', deaths)]:
+                derived[f'new_{metric}'][np.ix_(rows, datecut)] = _daily(_fill_missing(
+                    np.asarray(values[np.ix_(rows, datecut)], dtype=np.float64),
+                ))
+            continue
+        batch = derive_metrics(
+            cases[np.ix_(rows, datecut)],
+            deaths[np.ix_(rows, datecut)],
+            window_length=window_length,
+            polyorder=polyorder,
+        )
+        for metric, values in batch.items():
+            derived[metric][np.ix_(rows, datecut)] = values
+
+    return derived
@@ -1,37 +1,91 @@
-import datetime
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
-from scipy import signal
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-from ._io import BAYAREA_COUNTIES, get_data, get_bay_data
+from ._io import BAYAREA_COUNTIES, get_bay_data, get_cube, _county_rows, _lastnumdays_start
+from ._metrics import _derive_reported
+from ._decimate import decimate_series
+from ._rt import estimate_rt
 
 
 __all__ = [
     'plot_bay_cases',
+    'make_county_template',
+    'update_county_template',
+    'animate_county_cases',
+    'render_figures',
 ]
 
+PLOT_DEFAULTS = {
+    'cumulative': True,
+    'cases': True,
+    'deaths': False,
+    'groupcounties': True,
+    'lastnumdays': None,
+    'data_source': 'jhu',
+    'max_points': None,
+    'rt': False,
+}
+SAVE_DEFAULTS = {
+    'dpi': 200,
+    'bbox_inches': 'tight',
+    'title': None,
+}
+
+_RENDER_DATA = {}
+
+
+def _decimated(positions, values, max_points):
+    """
+    Hidden function for selecting at most `max_points` of the `positions`
+    of a series of `values` to plot, see `decimate_series`, or every
+    position if `max_points` is None.
+
+    """
+
+    if max_points is None:
+        return positions
+
+    return positions[decimate_series(values[positions], max_points, x=positions)]
+
+def _decimated_frame(bay_df, column, max_points):
+    """
+    Hidden function for selecting the rows of the DataFrame returned by
+    `get_bay_data` to plot for `column`, see `_decimated`.
+
+    """
+
+    if max_points is None:
+        return bay_df
+
+    values = bay_df[column].to_numpy(dtype=np.float64)
+    positions = np.flatnonzero(~np.isnan(values))
+
+    return bay_df.iloc[_decimated(positions, values, max_points)]
 
-def _plot_cumulative_bay_cases(cases, deaths, lastnumdays, data_source):
+def _plot_cumulative_bay_cases(fig, bay_df, cases, deaths, lastnumdays, max_points=None):
     """
     Hidden function for plotting the cumulative cases and/or deaths for
-    the total Bay Area.
+    the total Bay Area on the Figure `fig`, from the DataFrame returned
+    by `get_bay_data`.
 
     """
 
-    bay_df = get_bay_data(data_source=data_source)
+    ax = fig.subplots()
 
-    if lastnumdays is not None:
-        bay_cut = bay_df.index > pd.Timestamp(datetime.date.today() - datetime.timedelta(days=lastnumdays))
-        bay_df = bay_df[bay_cut]
+    bay_df = bay_df.iloc[_lastnumdays_start(bay_df.index, lastnumdays):]
 
     if cases and deaths:
-        ax = bay_df.plot(y='cases', marker='.', color='r')
-        ax = bay_df.plot(y='deaths', marker='.', ax=ax, color='k')
+        ax = _decimated_frame(bay_df, 'cases', max_points).plot(y='cases', marker='.', ax=ax, color='r')
+        ax = _decimated_frame(bay_df, 'deaths', max_points).plot(y='deaths', marker='.', ax=ax, color='k')
     elif cases and not deaths:
-        ax = bay_df.plot(y='cases', marker='.', color='r')
+        ax = _decimated_frame(bay_df, 'cases', max_points).plot(y='cases', marker='.', ax=ax, color='r')
     else:
-        ax = bay_df.plot(y='deaths', marker='.', color='k')
+        ax = _decimated_frame(bay_df, 'deaths', max_points).plot(y='deaths', marker='.', ax=ax, color='k')
 
     labels = ["Cases", "Deaths"]
     for line, label in zip(ax.lines, labels):
@@ -50,37 +104,35 @@ def _plot_cumulative_bay_cases(cases, deaths, lastnumdays, data_source):
         ax.set_ylabel('Cumulative Deaths')
     ax.set_xlabel('Date')
     ax.set_title("Total SF Bay Area")
-    fig = plt.gcf()
     fig.tight_layout()
 
     return fig, ax
 
-def _plot_new_bay_cases(cases, deaths, lastnumdays, data_source):
+def _plot_new_bay_cases(fig, bay_df, cases, deaths, lastnumdays, max_points=None):
     """
     Hidden function for plotting the new daily cases and/or deaths for
-    the total Bay Area.
+    the total Bay Area on the Figure `fig`, from the DataFrame returned
+    by `get_bay_data`.
 
     """
 
-    bay_df = get_bay_data(data_source=data_source)
+    ax = fig.subplots()
 
-    if lastnumdays is not None:
-        bay_cut = bay_df.index > pd.Timestamp(datetime.date.today() - datetime.timedelta(days=lastnumdays))
-        bay_df = bay_df[bay_cut]
+    bay_df = bay_df.iloc[_lastnumdays_start(bay_df.index, lastnumdays):]
 
     if cases and deaths:
-        ax = bay_df.plot(y='new_cases', marker='', color='r', alpha=0.3)
-        ax = bay_df.plot(y='new_cases_filt', marker='', ax=ax, color='r')
-        ax = bay_df.plot(y='new_deaths', marker='', ax=ax, color='k', alpha=0.3)
-        ax = bay_df.plot(y='new_deaths_filt', marker='', ax=ax, color='k')
+        ax = _decimated_frame(bay_df, 'new_cases', max_points).plot(y='new_cases', marker='', ax=ax, color='r', alpha=0.3)
+        ax = _decimated_frame(bay_df, 'new_cases_filt', max_points).plot(y='new_cases_filt', marker='', ax=ax, color='r')
+        ax = _decimated_frame(bay_df, 'new_deaths', max_points).plot(y='new_deaths', marker='', ax=ax, color='k', alpha=0.3)
+        ax = _decimated_frame(bay_df, 'new_deaths_filt', max_points).plot(y='new_deaths_filt', marker='', ax=ax, color='k')
         labels = [None, "Cases", None,  "Deaths"]
     elif cases and not deaths:
-        ax = bay_df.plot(y='new_cases', marker='', color='r', alpha=0.3)
-        ax = bay_df.plot(y='new_cases_filt', marker='', ax=ax, color='r')
+        ax = _decimated_frame(bay_df, 'new_cases', max_points).plot(y='new_cases', marker='', ax=ax, color='r', alpha=0.3)
+        ax = _decimated_frame(bay_df, 'new_cases_filt', max_points).plot(y='new_cases_filt', marker='', ax=ax, color='r')
         labels = [None, "Cases"]
     else:
-        ax = bay_df.plot(y='new_deaths', marker='', color='k', alpha=0.3)
-        ax = bay_df.plot(y='new_deaths_filt', marker='', ax=ax, color='k')
+        ax = _decimated_frame(bay_df, 'new_deaths', max_points).plot(y='new_deaths', marker='', ax=ax, color='k', alpha=0.3)
+        ax = _decimated_frame(bay_df, 'new_deaths_filt', max_points).plot(y='new_deaths_filt', marker='', ax=ax, color='k')
         labels = [None,  "Deaths"]
 
     for line, label in zip(ax.lines, labels):
@@ -99,97 +151,279 @@ def _plot_new_bay_cases(cases, deaths, lastnumdays, data_source):
         ax.set_ylabel('New Deaths Per Day')
     ax.set_xlabel('Date')
     ax.set_title("Total SF Bay Area")
-    fig = plt.gcf()
     fig.tight_layout()
 
     return fig, ax
 
-def _plot_cumulative_county_cases(cases, deaths, lastnumdays, data_source):
+def _plot_rt(ax, dates, rt, cut, max_points):
     """
-    Hidden function for plotting the cumulative cases and/or deaths for
-    the each county in the Bay Area.
+    Hidden function for plotting an estimate of Rt returned by
+    `estimate_rt` for a single series, with its credible interval, on the
+    Axes `ax`, at the positions `cut` of the dates.
 
     """
 
-    df = get_data(data_source=data_source)
+    cut = cut[~np.isnan(rt['rt'][cut])]
+    cut = _decimated(cut, rt['rt'], max_points)
 
-    fig, ax = plt.subplots(3, 3, sharey=True, sharex=True)
+    ax.fill_between(dates[cut], rt['rt_lower'][cut], rt['rt_upper'][cut], color='r', alpha=0.3, linewidth=0)
+    ax.plot(dates[cut], rt['rt'][cut], color='r')
+    ax.axhline(1, color='k', linestyle='--', linewidth=1)
 
-    for ii, county in enumerate(BAYAREA_COUNTIES):
-        plotcut = df.county == county
-        if lastnumdays is not None:
-            plotcut = plotcut & (df.date > pd.Timestamp(datetime.date.today() - datetime.timedelta(days=lastnumdays)))
+def _plot_bay_rt(fig, bay_df, lastnumdays, max_points=None):
+    """
+    Hidden function for plotting the effective reproduction number Rt of
+    the cases of the total Bay Area on the Figure `fig`, from the
+    DataFrame returned by `get_bay_data`.
+
+    """
+
+    ax = fig.subplots()
 
-        if cases:
-            ax[ii//3, np.mod(ii, 3)].plot(df[plotcut].date, df[plotcut].cases, color='r')
+    rt = estimate_rt(bay_df['cases'].to_numpy())
+    start = _lastnumdays_start(bay_df.index, lastnumdays)
+    _plot_rt(ax, bay_df.index, rt, np.arange(start, len(bay_df)), max_points)
 
-        if deaths:
-            ax[ii//3, np.mod(ii, 3)].plot(df[plotcut].date, df[plotcut].deaths, color='k')
+    ax.set_ylim(0)
+    ax.tick_params(which='both', direction='in', top=True, right=True)
+    ax.grid(linestyle='dotted', color='k')
+    ax.set_ylabel('Effective Reproduction Number $R_t$')
+    ax.set_xlabel('Date')
+    ax.set_title("Total SF Bay Area")
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+    return fig, ax
+
+def _plot_county_rt(fig, county_data, lastnumdays, max_points=None):
+    """
+    Hidden function for plotting the effective reproduction number Rt of
+    the cases of each county in the Bay Area on the Figure `fig`, from
+    the data returned by `_load_county_data`.
+
+    """
+
+    cases_cube, _, regions, dates = county_data
+
+    rows = _county_rows(regions, BAYAREA_COUNTIES)
+    rt = estimate_rt(cases_cube[rows])
+
+    start = _lastnumdays_start(dates, lastnumdays)
+
+    ax = fig.subplots(3, 3, sharey=True, sharex=True)
+
+    for ii, county in enumerate(BAYAREA_COUNTIES):
+        plotcut = start + np.flatnonzero(~np.isnan(cases_cube[rows[ii], start:]))
+        _plot_rt(ax[ii//3, np.mod(ii, 3)], dates, {k: v[ii] for k, v in rt.items()}, plotcut, max_points)
 
         ax[ii//3, np.mod(ii, 3)].set_title(county, fontsize=8, pad=2)
         ax[ii//3, np.mod(ii, 3)].tick_params(which='both', direction='in', top=True, right=True)
         ax[ii//3, np.mod(ii, 3)].grid(linestyle='dotted', color='k')
         ax[ii//3, np.mod(ii, 3)].tick_params(labelsize=8)
 
-    ax[0, 0].set_yscale('log')
-    ax[0, 0].set_ylim(0.8)
-    if cases and deaths:
-        ax[1, 0].set_ylabel('Cumulative Cases/Deaths')
-    elif cases and not deaths:
-        ax[1, 0].set_ylabel('Cumulative Cases')
-    else:
-        ax[1, 0].set_ylabel('Cumulative Deaths')
+    ax[0, 0].set_ylim(0)
+    ax[1, 0].set_ylabel('Effective Reproduction Number $R_t$')
     fig.autofmt_xdate(rotation=90, ha='center')
 
     return fig, ax
 
-def _plot_new_county_cases(cases, deaths, lastnumdays, data_source):
+def _county_series(county_data, counties, cumulative):
     """
-    Hidden function for plotting the daily new cases and/or deaths for
-    the each county in the Bay Area.
+    Hidden function for returning the values of each line of the county
+    plots, as arrays with shape (counties, dates), and whether each
+    county has reported cases on each date.
 
     """
 
-    df = get_data(data_source=data_source)
+    cases_cube, deaths_cube, regions, dates = county_data
 
-    fig, ax = plt.subplots(3, 3, sharey=True, sharex=True)
+    rows = _county_rows(regions, counties)
+    reported = ~np.isnan(cases_cube[rows])
+    if cumulative:
+        series = {'cases': cases_cube[rows], 'deaths': deaths_cube[rows]}
+    else:
+        # as in `get_bay_data`, the metrics are derived over the reported dates only
+        series = _derive_reported(cases_cube[rows], deaths_cube[rows], reported)
 
-    for ii, county in enumerate(BAYAREA_COUNTIES):
-        filtercut = (df.county == county)
-        cases_per_day = np.concatenate(([0], np.diff(df[filtercut].cases)))
-        filtered_cases = signal.savgol_filter(cases_per_day, 15, 3)
-        deaths_per_day = np.concatenate(([0], np.diff(df[filtercut].deaths)))
-        filtered_deaths = signal.savgol_filter(deaths_per_day, 15, 3)
-
-        if lastnumdays is not None:
-            plotcut = df[filtercut].date > pd.Timestamp(datetime.date.today() - datetime.timedelta(days=lastnumdays))
-        else:
-            plotcut = np.ones(np.sum(filtercut), dtype=bool)
+    return series, reported
+
+def _county_lines(cumulative, cases, deaths):
+    """
+    Hidden function for returning the key, color, and alpha of each line
+    of the county plots, in the order in which they are drawn.
 
-        if cases:
-            ax[ii//3, np.mod(ii, 3)].plot(df[filtercut][plotcut].date, cases_per_day[plotcut], color='r', alpha=0.3)
-            ax[ii//3, np.mod(ii, 3)].plot(df[filtercut][plotcut].date, filtered_cases[plotcut], color='r')
-        if deaths:
-            ax[ii//3, np.mod(ii, 3)].plot(df[filtercut][plotcut].date, deaths_per_day[plotcut], color='k', alpha=0.3)
-            ax[ii//3, np.mod(ii, 3)].plot(df[filtercut][plotcut].date, filtered_deaths[plotcut], color='k')
+    """
+
+    if cumulative:
+        lines = [('cases', 'r', None), ('deaths', 'k', None)]
+    else:
+        lines = [
+            ('new_cases', 'r', 0.3),
+            ('new_cases_filt', 'r', None),
+            ('new_deaths', 'k', 0.3),
+            ('new_deaths_filt', 'k', None),
+        ]
+
+    return [line for line in lines if (cases if 'cases' in line[0] else deaths)]
+
+def _county_cuts(template, ii, start, stop):
+    """
+    Hidden function for returning the positions of the dates to plot of
+    each line of a panel of a county template, between `start` and
+    `stop`.
+
+    """
+
+    # as in the original plots, every line is cut to the dates with reported cases
+    plotcut = start + np.flatnonzero(template['reported'][ii, start:stop])
+
+    return [
+        _decimated(plotcut, template['series'][key][ii], template['max_points'])
+        for key, _, _ in _county_lines(template['cumulative'], template['cases'], template['deaths'])
+    ]
+
+def _county_template(fig, county_data, cumulative, cases, deaths, lastnumdays, max_points=None,
+                     counties=BAYAREA_COUNTIES):
+    """
+    Hidden function for plotting the cumulative or daily new cases and/or
+    deaths for each of up to 9 counties in a grid of subplots on the
+    Figure `fig`, from the data returned by `_load_county_data`, and
+    returning the template of the plot, see `make_county_template`.
+
+    """
+
+    series, reported = _county_series(county_data, counties, cumulative)
+    dates = county_data[3]
+
+    template = {
+        'fig': fig,
+        'ax': fig.subplots(3, 3, sharey=True, sharex=True),
+        'lines': [],
+        'county_data': county_data,
+        'counties': list(counties),
+        'series': series,
+        'reported': reported,
+        'cumulative': cumulative,
+        'cases': cases,
+        'deaths': deaths,
+        'max_points': max_points,
+    }
+    ax = template['ax']
+
+    start = _lastnumdays_start(dates, lastnumdays)
+    styles = _county_lines(cumulative, cases, deaths)
+
+    for ii, county in enumerate(template['counties']):
+        cuts = _county_cuts(template, ii, start, len(dates))
+        template['lines'].append([
+            ax[ii//3, np.mod(ii, 3)].plot(dates[cut], series[key][ii, cut], color=color, alpha=alpha)[0]
+            for (key, color, alpha), cut in zip(styles, cuts)
+        ])
 
         ax[ii//3, np.mod(ii, 3)].set_title(county, fontsize=8, pad=2)
         ax[ii//3, np.mod(ii, 3)].tick_params(which='both', direction='in', top=True, right=True)
         ax[ii//3, np.mod(ii, 3)].grid(linestyle='dotted', color='k')
         ax[ii//3, np.mod(ii, 3)].tick_params(labelsize=8)
 
-    ax[0, 0].set_ylim(0)
+    for ii in range(len(template['counties']), 9):
+        ax[ii//3, np.mod(ii, 3)].set_visible(False)
+
+    if cumulative:
+        ax[0, 0].set_yscale('log')
+        ax[0, 0].set_ylim(0.8)
+        kind = 'Cumulative {}'
+    else:
+        ax[0, 0].set_ylim(0)
+        kind = 'New {} Per Day'
     if cases and deaths:
-        ax[1, 0].set_ylabel('New Cases/Deaths Per Day')
+        ax[1, 0].set_ylabel(kind.format('Cases/Deaths'))
     elif cases and not deaths:
-        ax[1, 0].set_ylabel('New Cases Per Day')
+        ax[1, 0].set_ylabel(kind.format('Cases'))
     else:
-        ax[1, 0].set_ylabel('New Deaths Per Day')
+        ax[1, 0].set_ylabel(kind.format('Deaths'))
     fig.autofmt_xdate(rotation=90, ha='center')
 
-    return fig, ax
+    # the panels above the hidden ones label their own dates
+    for ii in range(len(template['counties'])):
+        if ii + 3 < len(template['counties']) or ii >= 6:
+            continue
+        ax[ii//3, np.mod(ii, 3)].tick_params(labelbottom=True)
+        for label in ax[ii//3, np.mod(ii, 3)].get_xticklabels():
+            label.set_rotation(90)
+            label.set_horizontalalignment('center')
+
+    return template
+
+def _plot_cumulative_county_cases(fig, county_data, cases, deaths, lastnumdays,
+                                  max_points=None):
+    """
+    Hidden function for plotting the cumulative cases and/or deaths for
+    the each county in the Bay Area on the Figure `fig`, from the data
+    returned by `_load_county_data`.
 
-def plot_bay_cases(cumulative=True, cases=True, deaths=False, groupcounties=True, lastnumdays=None, data_source='jhu'):
+    """
+
+    template = _county_template(fig, county_data, True, cases, deaths, lastnumdays, max_points)
+
+    return fig, template['ax']
+
+def _plot_new_county_cases(fig, county_data, cases, deaths, lastnumdays,
+                           max_points=None):
+    """
+    Hidden function for plotting the daily new cases and/or deaths for
+    the each county in the Bay Area on the Figure `fig`, from the data
+    returned by `_load_county_data`.
+
+    """
+
+    template = _county_template(fig, county_data, False, cases, deaths, lastnumdays, max_points)
+
+    return fig, template['ax']
+
+def _load_county_data(data_source, counties=BAYAREA_COUNTIES):
+    """
+    Hidden function for loading the cumulative cases and deaths of the
+    Bay Area counties (or of `counties`), returning the cases and deaths
+    arrays with shape (regions, dates), the region metadata, and the
+    dates.
+
+    """
+
+    cases_cube, regions, dates = get_cube(
+        data_source=data_source, metric='cases', county=counties,
+    )
+    deaths_cube = get_cube(
+        data_source=data_source, metric='deaths', county=counties,
+    )[0]
+
+    return cases_cube, deaths_cube, regions, dates
+
+def _draw_bay_cases(fig, plot_data, cumulative, cases, deaths, groupcounties, lastnumdays,
+                    max_points=None, rt=False):
+    """
+    Hidden function for drawing one of the Bay Area plots on the Figure
+    `fig`, from either the DataFrame returned by `get_bay_data` (if
+    `groupcounties` is True) or the data returned by `_load_county_data`.
+
+    """
+
+    if rt and groupcounties:
+        ax = _plot_bay_rt(fig, plot_data, lastnumdays, max_points)[1]
+    elif rt and not groupcounties:
+        ax = _plot_county_rt(fig, plot_data, lastnumdays, max_points)[1]
+    elif cumulative and groupcounties:
+        ax = _plot_cumulative_bay_cases(fig, plot_data, cases, deaths, lastnumdays, max_points)[1]
+    elif not cumulative and groupcounties:
+        ax = _plot_new_bay_cases(fig, plot_data, cases, deaths, lastnumdays, max_points)[1]
+    elif cumulative and not groupcounties:
+        ax = _plot_cumulative_county_cases(fig, plot_data, cases, deaths, lastnumdays, max_points)[1]
+    elif not cumulative and not groupcounties:
+        ax = _plot_new_county_cases(fig, plot_data, cases, deaths, lastnumdays, max_points)[1]
+
+    return ax
+
+def plot_bay_cases(cumulative=True, cases=True, deaths=False, groupcounties=True, lastnumdays=None, data_source='jhu',
+                   max_points=None, rt=False):
     """
     Function for plotting various pertinent plots for COVID-19
     cases/deaths in the San Francisco Bay Area.
@@ -216,6 +450,16 @@ def plot_bay_cases(cumulative=True, cases=True, deaths=False, groupcounties=True
         The source to use for the COVID-19 data. Can be either "jhu"
         for the John Hopkins University dataset or "nytimes" for the NY
         Times dataset.
+    max_points : int, NoneType, optional
+        Option to plot at most the specified number of points per line,
+        selected with `decimate_series` so that the peaks are kept, which
+        speeds up plotting long time series. If set to None (default),
+        every point is plotted.
+    rt : bool, optional
+        Boolean value for plotting the effective reproduction number Rt
+        of the cases, estimated with `estimate_rt`, and its 95% credible
+        interval, instead of the cases/deaths. If True, `cumulative`,
+        `cases`, and `deaths` are ignored. Default is False.
 
     Returns
     -------
@@ -227,13 +471,336 @@ def plot_bay_cases(cumulative=True, cases=True, deaths=False, groupcounties=True
 
     """
 
-    if cumulative and groupcounties:
-        fig, ax = _plot_cumulative_bay_cases(cases, deaths, lastnumdays, data_source)
-    elif not cumulative and groupcounties:
-        fig, ax = _plot_new_bay_cases(cases, deaths, lastnumdays, data_source)
-    elif cumulative and not groupcounties:
-        fig, ax = _plot_cumulative_county_cases(cases, deaths, lastnumdays, data_source)
-    elif not cumulative and not groupcounties:
-        fig, ax = _plot_new_county_cases(cases, deaths, lastnumdays, data_source)
+    if groupcounties:
+        plot_data = get_bay_data(data_source=data_source)
+    else:
+        plot_data = _load_county_data(data_source)
+
+    fig = plt.figure()
+    ax = _draw_bay_cases(
+        fig, plot_data, cumulative, cases, deaths, groupcounties, lastnumdays, max_points, rt,
+    )
 
     return fig, ax
+
+def _rescale_county_axes(template):
+    """
+    Hidden function for rescaling the axes of a county template to its
+    current lines, as if they had been plotted anew.
+
+    """
+
+    ax = template['ax']
+    for panel in ax.flat:
+        panel.relim()
+        panel.set_autoscaley_on(True)
+    for panel in ax.flat:
+        panel.autoscale_view()
+
+    ax[0, 0].set_ylim(0.8 if template['cumulative'] else 0)
+
+def make_county_template(cumulative=True, cases=True, deaths=False, lastnumdays=None, data_source='jhu',
+                         counties=None, max_points=None, fig=None):
+    """
+    Function for creating the grid of county plots of `plot_bay_cases`
+    as a reusable template, which can be updated to other date windows
+    or counties with `update_county_template` without rebuilding the
+    figure.
+
+    Parameters
+    ----------
+    cumulative : bool, optional
+        Boolean value for plotting the cumulative cases/deaths (True)
+        or the daily new cases/deaths (False). Default is True.
+    cases : bool, optional
+        Boolean value for whether or not to plot the confirmed cases
+        data. Default is True.
+    deaths : bool, optional
+        Boolean value for whether or not to plot the confirmed deaths
+        data. Default is False.
+    lastnumdays : int, NoneType, optional
+        Option to plot only the specified last number of days. If set
+        to None, then the full date range is plotted.
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the NY
+        Times dataset.
+    counties : list of str, NoneType, optional
+        The counties to plot, at most 9. If set to None (default), the
+        Bay Area counties are plotted.
+    max_points : int, NoneType, optional
+        Option to plot at most the specified number of points per line,
+        see `plot_bay_cases`.
+    fig : matplotlib.Figure, NoneType, optional
+        The figure to plot on. If set to None (default), a new pyplot
+        figure is created.
+
+    Returns
+    -------
+    template : dict
+        The template, with the keys "fig" (the Figure), "ax" (the 3x3
+        array of Axes), and "lines" (the list of the Line2D objects of
+        each county), as well as the data and options of the plot.
+
+    """
+
+    if counties is None:
+        counties = BAYAREA_COUNTIES
+    if not 1 <= len(counties) <= 9:
+        raise ValueError("counties should have between 1 and 9 counties.")
+
+    if fig is None:
+        fig = plt.figure()
+
+    template = _county_template(
+        fig,
+        _load_county_data(data_source, counties),
+        cumulative,
+        cases,
+        deaths,
+        lastnumdays,
+        max_points=max_points,
+        counties=counties,
+    )
+    template['data_source'] = data_source
+
+    return template
+
+def update_county_template(template, counties=None, lastnumdays=None, end=None, rescale=True):
+    """
+    Function for updating the lines of a template created by
+    `make_county_template` to another date window or other counties,
+    reusing the figure, axes, and lines.
+
+    Parameters
+    ----------
+    template : dict
+        The template to update, which is modified in place.
+    counties : list of str, NoneType, optional
+        The counties to plot instead, with the same number of counties
+        as the template. If set to None (default), the counties of the
+        template are kept.
+    lastnumdays : int, NoneType, optional
+        Option to plot only the specified last number of days. If set
+        to None, then the full date range is plotted.
+    end : str, datetime-like, NoneType, optional
+        Option to plot only the dates up to and including `end`, e.g. for
+        each frame of an animation. If set to None (default), the dates
+        up to the last date are plotted.
+    rescale : bool, optional
+        Whether or not to rescale the axes to the updated lines. Set this
+        to False to keep the axes fixed, e.g. when blitting the lines of
+        an animation. Default is True.
+
+    Returns
+    -------
+    lines : list of matplotlib.Line2D
+        The updated lines, e.g. to be returned by the update function of
+        a blitted `matplotlib.animation.FuncAnimation`.
+
+    """
+
+    if counties is not None:
+        if len(counties) != len(template['counties']):
+            raise ValueError("counties should have the same number of counties as the template.")
+        template['county_data'] = _load_county_data(template['data_source'], counties)
+        template['counties'] = list(counties)
+        template['series'], template['reported'] = _county_series(
+            template['county_data'], counties, template['cumulative'],
+        )
+        for ii, county in enumerate(counties):
+            template['ax'][ii//3, np.mod(ii, 3)].set_title(county, fontsize=8, pad=2)
+
+    dates = template['county_data'][3]
+    start = _lastnumdays_start(dates, lastnumdays)
+    stop = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), side='right')
+
+    styles = _county_lines(template['cumulative'], template['cases'], template['deaths'])
+    updated = []
+    for ii, lines in enumerate(template['lines']):
+        cuts = _county_cuts(template, ii, start, stop)
+        for line, (key, _, _), cut in zip(lines, styles, cuts):
+            line.set_data(dates[cut], template['series'][key][ii, cut])
+            updated.append(line)
+
+    if rescale:
+        _rescale_county_axes(template)
+
+    return updated
+
+def animate_county_cases(path, cumulative=True, cases=True, deaths=False, lastnumdays=None,
+                         data_source='jhu', counties=None, max_points=None, step=1, fps=10, dpi=100):
+    """
+    Function for saving an animated GIF of the grid of county plots of
+    `plot_bay_cases`, in which the curves grow date by date.
+
+    Parameters
+    ----------
+    path : str
+        The output path of the GIF.
+    cumulative, cases, deaths, lastnumdays, data_source, counties, max_points
+        The options of the plot, see `make_county_template`.
+    step : int, optional
+        The number of dates added in each frame. Default is 1.
+    fps : float, optional
+        The number of frames per second. Default is 10.
+    dpi : float, optional
+        The resolution of the frames, in dots per inch. Default is 100.
+
+    Notes
+    -----
+    The axes are fixed to the full date window, and the figure without
+    the lines is rendered only once. Each frame restores that background
+    and draws only the lines (blitting), so that the cost per frame is
+    mostly the rasterization of the lines. The GIF is encoded with
+    Pillow, which must be installed.
+
+    """
+
+    # Pillow is only imported when needed, as it is not required otherwise
+    from PIL import Image
+
+    if step < 1:
+        raise ValueError("step should be a positive integer.")
+
+    fig = Figure(dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+
+    template = make_county_template(
+        cumulative=cumulative,
+        cases=cases,
+        deaths=deaths,
+        lastnumdays=lastnumdays,
+        data_source=data_source,
+        counties=counties,
+        max_points=max_points,
+        fig=fig,
+    )
+
+    lines = [line for county_lines in template['lines'] for line in county_lines]
+    for line in lines:
+        line.set_animated(True)
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    dates = template['county_data'][3]
+    start = _lastnumdays_start(dates, lastnumdays)
+    ends = list(range(start, len(dates), step))
+    if not ends:
+        raise ValueError("There are no dates to animate.")
+    if ends[-1] != len(dates) - 1:
+        ends.append(len(dates) - 1)
+
+    def _frames():
+        for end in ends:
+            update_county_template(template, lastnumdays=lastnumdays, end=dates[end], rescale=False)
+            canvas.restore_region(background)
+            for line in lines:
+                line.axes.draw_artist(line)
+            yield Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB')
+
+    # the frames are encoded as they are drawn, so that they are never all held in memory
+    frames = _frames()
+    next(frames).save(
+        path, save_all=True, append_images=frames, duration=1000 / fps, loop=0,
+    )
+
+def _init_render_worker(render_data):
+    """
+    Hidden function for initializing a worker process of `render_figures`
+    with the data of every figure to render, and the Agg backend.
+
+    """
+
+    global _RENDER_DATA
+
+    matplotlib.use('Agg')
+    _RENDER_DATA = render_data
+
+def _render_figure(spec):
+    """
+    Hidden function for rendering and saving a single figure spec, on a
+    standalone Agg figure so that no pyplot state is used.
+
+    """
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+
+    plot_data = _RENDER_DATA[(spec['data_source'], spec['groupcounties'])]
+    ax = _draw_bay_cases(
+        fig,
+        plot_data,
+        spec['cumulative'],
+        spec['cases'],
+        spec['deaths'],
+        spec['groupcounties'],
+        spec['lastnumdays'],
+        spec['max_points'],
+        spec['rt'],
+    )
+
+    if spec['title'] is not None:
+        if spec['groupcounties']:
+            ax.set_title(spec['title'])
+        else:
+            # the county plots are a grid of axes, which each have the
+            # title of their county, so the title is set for the figure
+            fig.suptitle(spec['title'])
+
+    fig.savefig(spec['path'], dpi=spec['dpi'], bbox_inches=spec['bbox_inches'])
+
+    return spec['path']
+
+def render_figures(specs, max_workers=None):
+    """
+    Function for rendering and saving many of the plots of
+    `plot_bay_cases` at once, loading each data source only once and
+    rendering the figures in parallel.
+
+    Parameters
+    ----------
+    specs : list of dict
+        The figures to render. Each figure is a dictionary with the
+        output "path" of the image, and optionally any of the arguments of
+        `plot_bay_cases` ("cumulative", "cases", "deaths", "groupcounties",
+        "lastnumdays", "data_source", "max_points", and "rt", with the
+        same defaults), the
+        "dpi" (default 200) and "bbox_inches" (default "tight") passed to
+        `savefig`, and a "title" to replace the default title of the
+        Bay Area plots, or to add above the grid of county plots.
+    max_workers : int, NoneType, optional
+        The maximum number of worker processes. If set to None (default),
+        the number of processors is used.
+
+    Returns
+    -------
+    paths : list of str
+        The output path of each rendered figure, in the order of `specs`.
+
+    Notes
+    -----
+    The figures are rendered with the Agg backend on standalone figures,
+    without the pyplot state, so that they can be rendered concurrently.
+
+    """
+
+    specs = [{**PLOT_DEFAULTS, **SAVE_DEFAULTS, **spec} for spec in specs]
+    for spec in specs:
+        if 'path' not in spec:
+            raise ValueError("Every figure spec should have an output path.")
+
+    render_data = {}
+    for spec in specs:
+        key = (spec['data_source'], spec['groupcounties'])
+        if key in render_data:
+            continue
+        if spec['groupcounties']:
+            render_data[key] = get_bay_data(data_source=spec['data_source'])
+        else:
+            render_data[key] = _load_county_data(spec['data_source'])
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_render_worker, initargs=(render_data,),
+    ) as pool:
+        return list(pool.map(_render_figure, specs))
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from ._io import _load_cube, _region_lookup
+from ._metrics import _derive_reported
+
+
+__all__ = [
+    'get_region_data',
+]
+
+
+def _membership_matrix(regions, custom_regions):
+    """
+    Hidden function for building the sparse (custom regions, regions)
+    membership matrix, with a one wherever a region of the dataset is a
+    member of a custom region. String members are matched to the county
+    column, and numeric members to the FIPS column.
+
+    """
+
+    # scipy is only imported when needed, as it is slow to import
+    from scipy import sparse
+
+    lookups = {
+        'county': _region_lookup(regions, 'county'),
+        'fips': _region_lookup(regions, 'fips'),
+    }
+
+    rows = []
+    cols = []
+    for ii, (name, members) in enumerate(custom_regions.items()):
+        if np.isscalar(members):
+            members = [members]
+        for member in members:
+            lookup = lookups['county' if isinstance(member, str) else 'fips']
+            if member not in lookup:
+                raise ValueError(f"{member} of {name} was not found in the dataset.")
+            matches = lookup[member]
+            rows.append(np.full(len(matches), ii))
+            cols.append(matches)
+
+    rows = np.concatenate(rows) if rows else np.array([], dtype=np.intp)
+    cols = np.concatenate(cols) if cols else np.array([], dtype=np.intp)
+
+    # a region listed twice (e.g. by county and by FIPS) is only counted once
+    pairs = np.unique(rows * len(regions) + cols)
+
+    return sparse.csr_matrix(
+        (np.ones(len(pairs)), (pairs // len(regions), pairs % len(regions))),
+        shape=(len(custom_regions), len(regions)),
+    )
+
+def get_region_data(custom_regions, data_source='jhu', use_cache=True, window_length=15,
+                    polyorder=3):
+    """
+    Function for returning the COVID-19 data summed over any number of
+    custom regions, e.g. metro areas, health districts, or states, which
+    are all computed together.
+
+    Parameters
+    ----------
+    custom_regions : dict
+        A dictionary mapping the name of each custom region to a list of
+        its member counties. Each member is either a county name (str),
+        which matches the counties of that name in every state, or a
+        FIPS code (int or float).
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the NY
+        Times dataset.
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches of the
+        parsed dataset. See `get_data` for more information. Default is
+        True.
+    window_length : int, optional
+        The length of the Savitzky-Golay filter window, in days. See
+        `derive_metrics`. Default is 15.
+    polyorder : int, optional
+        The order of the polynomial used by the Savitzky-Golay filter.
+        See `derive_metrics`. Default is 3.
+
+    Returns
+    -------
+    region_df : Pandas.DataFrame
+        A DataFrame with a (region, date) MultiIndex and the same columns
+        as the DataFrame returned by `get_bay_data`, so that each custom
+        region is selected with e.g. `region_df.loc['Bay Area']`.
+
+    Notes
+    -----
+    As in `get_bay_data`, each custom region only has the dates on which
+    at least one of its members has reported data, and the counts of
+    members that have not reported on a date are treated as zero.
+
+    """
+
+    members = [
+        m for ms in custom_regions.values() for m in ([ms] if np.isscalar(ms) else ms)
+    ]
+    selection = {}
+    if all(isinstance(m, str) for m in members):
+        selection['county'] = members
+    elif not any(isinstance(m, str) for m in members):
+        selection['fips'] = members
+
+    regions, dates, metrics = _load_cube(data_source, use_cache=use_cache, **selection)
+    membership = _membership_matrix(regions, custom_regions)
+
+    # one sparse product sums the members of every custom region at once
+    reported = membership @ (~np.isnan(metrics['cases'])).astype(np.float64) > 0
+    totals = {
+        m: membership @ np.nan_to_num(metrics[m], nan=0.0) for m in ['cases', 'deaths']
+    }
+
+    # the metrics are derived over the reported dates of each custom region only
+    derived = _derive_reported(
+        totals['cases'], totals['deaths'], reported,
+        window_length=window_length, polyorder=polyorder,
+    )
+
+    region_idx, date_idx = np.nonzero(reported)
+
+    region_df = pd.DataFrame(
+        {m: totals[m][region_idx, date_idx] for m in ['cases', 'deaths']},
+        index=pd.MultiIndex.from_arrays(
+            [pd.Index(list(custom_regions)).take(region_idx), dates.take(date_idx)],
+            names=['region', 'date'],
+        ),
+    )
+    for metric in ['new_cases', 'new_deaths', 'new_cases_filt', 'new_deaths_filt']:
+        region_df[metric] = derived[metric][region_idx, date_idx]
+
+    return region_df
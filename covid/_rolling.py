@@ -0,0 +1,406 @@
+import numpy as np
+
+from ._cache import _pop_rolling, _store_rolling
+from ._io import _load_cube
+from ._metrics import _daily, _fill_missing, _savgol
+
+
+__all__ = [
+    'ROLLING_METRICS',
+    'compute_rolling_metrics',
+    'update_rolling_metrics',
+    'get_rolling_data',
+]
+
+ROLLING_METRICS = [
+    'new_cases',
+    'new_deaths',
+    'new_cases_filt',
+    'new_deaths_filt',
+    'new_cases_avg',
+    'new_deaths_avg',
+    'cases_growth_rate',
+    'deaths_growth_rate',
+    'cases_doubling_time',
+    'deaths_doubling_time',
+]
+
+
+def _trailing_mean(values, average_days):
+    """
+    Hidden function for computing the trailing mean over `average_days`
+    along the last axis, which is NaN for the first `average_days - 1`
+    values.
+
+    """
+
+    csum = np.cumsum(values, axis=-1)
+    mean = np.full_like(values, np.nan)
+    mean[..., average_days - 1:] = csum[..., average_days - 1:]
+    mean[..., average_days:] -= csum[..., :-average_days]
+
+    return mean / average_days
+
+def _growth_rates(filled, average, average_days):
+    """
+    Hidden function for computing the daily exponential growth rate of
+    cumulative counts over the last `average_days`, and the corresponding
+    doubling time in days, from the filled cumulative counts and the
+    trailing mean of the daily counts.
+
+    """
+
+    # the cumulative count `average_days` earlier is recovered from the
+    # trailing mean, so that only the dates being computed are needed
+    earlier = filled - average_days * average
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.log(filled / earlier) / average_days
+        growth[~(earlier > 0)] = np.nan
+        doubling = np.log(2) / growth
+        doubling[~(growth > 0)] = np.nan
+
+    return growth, doubling
+
+def compute_rolling_metrics(cases, deaths, window_length=15, polyorder=3, average_days=7):
+    """
+    Function for computing the rolling statistics of many cumulative time
+    series at once, which can then be extended to new dates with
+    `update_rolling_metrics`.
+
+    Parameters
+    ----------
+    cases : array_like
+        The cumulative cases, with shape (regions, dates), e.g. as
+        returned by `get_cube`.
+    deaths : array_like
+        The cumulative deaths, with the same shape as `cases`.
+    window_length : int, optional
+        The length of the Savitzky-Golay filter window, in days. See
+        `derive_metrics`. Default is 15.
+    polyorder : int, optional
+        The order of the polynomial used by the Savitzky-Golay filter.
+        Default is 3.
+    average_days : int, optional
+        The number of days of the trailing averages, growth rates, and
+        doubling times. Default is 7.
+
+    Returns
+    -------
+    rolling : dict
+        A dictionary of arrays with the same shape as `cases`, with keys
+        "new_cases", "new_deaths", "new_cases_filt", and
+        "new_deaths_filt" (as returned by `derive_metrics`),
+        "new_cases_avg" and "new_deaths_avg" (the trailing averages of
+        the daily counts), "cases_growth_rate" and "deaths_growth_rate"
+        (the daily exponential growth rates of the cumulative counts),
+        and "cases_doubling_time" and "deaths_doubling_time" (in days,
+        NaN if not growing), as well as the 1-D arrays "last_cases" and
+        "last_deaths" of the last reported cumulative count of each
+        series.
+
+    Notes
+    -----
+    The averages and growth rates are NaN for the first `average_days - 1`
+    dates, where there is not enough history. Missing (NaN) cumulative
+    values are treated as in `derive_metrics`.
+
+    """
+
+    rolling = {}
+    for metric, values in [('cases', cases), ('deaths', deaths)]:
+        filled = _fill_missing(np.atleast_2d(np.asarray(values, dtype=np.float64)))
+        daily = _daily(filled)
+        average = _trailing_mean(daily, average_days)
+        growth, doubling = _growth_rates(filled, average, average_days)
+
+        rolling[f'new_{metric}'] = daily
+        rolling[f'new_{metric}_filt'] = _savgol(daily, window_length, polyorder)
+        rolling[f'new_{metric}_avg'] = average
+        rolling[f'{metric}_growth_rate'] = growth
+        rolling[f'{metric}_doubling_time'] = doubling
+        rolling[f'last_{metric}'] = filled[:, -1]
+
+    return {k: rolling[k] for k in ROLLING_METRICS + ['last_cases', 'last_deaths']}
+
+def _rolling_buffers(rolling, capacity):
+    """
+    Hidden function for copying rolling statistics into new arrays with
+    room for `capacity` dates, which can be extended in place with
+    `_extend_rolling`.
+
+    """
+
+    buffers = {}
+    for key, values in rolling.items():
+        if values.ndim == 1:
+            buffers[key] = values.copy()
+        else:
+            buffers[key] = np.empty((len(values), capacity))
+            buffers[key][:, :values.shape[-1]] = values
+
+    return buffers
+
+def _rolling_views(buffers, ndates):
+    """
+    Hidden function for returning read-only views of the first `ndates`
+    dates of the rolling statistics in `buffers`.
+
+    """
+
+    rolling = {}
+    for key in ROLLING_METRICS + ['last_cases', 'last_deaths']:
+        if buffers[key].ndim == 1:
+            rolling[key] = buffers[key].copy()
+        else:
+            rolling[key] = buffers[key][:, :ndates]
+            rolling[key].flags.writeable = False
+
+    return rolling
+
+def _unshared_buffers(buffers, ndates, nnew, started):
+    """
+    Hidden function for returning buffers in which the rolling statistics
+    of the first `ndates` dates in `buffers` can be extended in place to
+    `nnew` new dates, without changing the read-only views of them that
+    were returned before. Only the filtered statistics, whose last values
+    change, are copied, unless a series `started` reporting, which changes
+    its history, or there is no room for the new dates.
+
+    """
+
+    capacity = buffers['new_cases'].shape[-1]
+    if started.any() or ndates + nnew > capacity:
+        # the room for new dates grows geometrically, so that the copies
+        # are amortized over the updates
+        return _rolling_buffers(
+            _rolling_views(buffers, ndates), ndates + nnew + max((ndates + nnew) // 8, 1),
+        )
+
+    buffers = dict(buffers)
+    for key in ['new_cases_filt', 'new_deaths_filt']:
+        filt = np.empty_like(buffers[key])
+        filt[:, :ndates] = buffers[key][:, :ndates]
+        buffers[key] = filt
+
+    return buffers
+
+def _extend_rolling(buffers, ndates, new_cases, new_deaths, window_length, polyorder,
+                    average_days):
+    """
+    Hidden function for extending the rolling statistics of the first
+    `ndates` dates in `buffers`, which must have room for the new dates,
+    in place to the new dates, recomputing only the dates that depend on
+    them.
+
+    """
+
+    half_window = window_length // 2
+
+    for metric, values in [('cases', new_cases), ('deaths', new_deaths)]:
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        nnew = values.shape[-1]
+        total = ndates + nnew
+        last = buffers[f'last_{metric}']
+
+        # the previous filled count continues the forward fill of the new dates
+        filled = _fill_missing(np.concatenate([last[:, np.newaxis], values], axis=-1))
+        daily = buffers[f'new_{metric}']
+        daily[:, ndates:total] = _daily(filled)[:, 1:]
+
+        # series without any previous value are filled backwards with their
+        # first value, so their history becomes that of a constant count
+        started = np.isnan(last) & ~np.isnan(filled[:, -1])
+        if started.any():
+            daily[started, :ndates] = 0
+            buffers[f'new_{metric}_avg'][started, average_days - 1:ndates] = 0
+            buffers[f'{metric}_growth_rate'][started, average_days - 1:ndates] = np.where(
+                filled[started, :1] > 0, 0, np.nan,
+            )
+            buffers[f'{metric}_doubling_time'][started, average_days - 1:ndates] = np.nan
+
+        filt = buffers[f'new_{metric}_filt']
+        start = ndates - 2 * half_window
+        if start < 0:
+            filt[:, :total] = _savgol(daily[:, :total], window_length, polyorder)
+        else:
+            filt[:, ndates - half_window:total] = _savgol(
+                daily[:, start:total], window_length, polyorder,
+            )[:, half_window:]
+            if started.any():
+                filt[started, :total] = _savgol(daily[started, :total], window_length, polyorder)
+
+        context = max(ndates - average_days + 1, 0)
+        average = _trailing_mean(daily[:, context:total], average_days)[:, -nnew:]
+        growth, doubling = _growth_rates(filled[:, 1:], average, average_days)
+
+        buffers[f'new_{metric}_avg'][:, ndates:total] = average
+        buffers[f'{metric}_growth_rate'][:, ndates:total] = growth
+        buffers[f'{metric}_doubling_time'][:, ndates:total] = doubling
+        last[:] = filled[:, -1]
+
+def update_rolling_metrics(rolling, new_cases, new_deaths, window_length=15, polyorder=3,
+                           average_days=7):
+    """
+    Function for extending the rolling statistics returned by
+    `compute_rolling_metrics` to new dates, recomputing only the dates
+    that depend on the new ones.
+
+    Parameters
+    ----------
+    rolling : dict
+        The rolling statistics to extend, as returned by
+        `compute_rolling_metrics` or `update_rolling_metrics`. It is not
+        modified.
+    new_cases : array_like
+        The cumulative cases of only the new dates, with shape (regions,
+        new dates), for the same regions as `rolling`.
+    new_deaths : array_like
+        The cumulative deaths of only the new dates, with the same shape
+        as `new_cases`.
+    window_length, polyorder, average_days : int, optional
+        The same parameters as used to compute `rolling`, see
+        `compute_rolling_metrics`.
+
+    Returns
+    -------
+    rolling : dict
+        The rolling statistics for the previous and the new dates.
+
+    Notes
+    -----
+    Only the last `window_length // 2` filtered values, which are fit to
+    the end of the series, change when dates are added, so the cost of
+    an update does not grow with the number of previous dates, apart
+    from copying the arrays. `get_rolling_data` avoids most of the copies
+    by extending its cached statistics in place.
+
+    """
+
+    ndates = rolling['new_cases'].shape[-1]
+    nnew = np.atleast_2d(np.asarray(new_cases)).shape[-1]
+
+    buffers = _rolling_buffers(
+        {k: rolling[k] for k in ROLLING_METRICS + ['last_cases', 'last_deaths']}, ndates + nnew,
+    )
+    _extend_rolling(
+        buffers, ndates, new_cases, new_deaths, window_length, polyorder, average_days,
+    )
+
+    return buffers
+
+def get_rolling_data(data_source='jhu', window_length=15, polyorder=3, average_days=7,
+                     use_cache=True):
+    """
+    Function for returning the rolling statistics of every region of a
+    dataset, see `compute_rolling_metrics`, which are kept in memory and
+    only extended to the new dates when the dataset is updated.
+
+    Parameters
+    ----------
+    data_source : str, optional
+        The source to use for the COVID-19 data. Can be either "jhu"
+        for the John Hopkins University dataset or "nytimes" for the NY
+        Times dataset.
+    window_length, polyorder, average_days : int, optional
+        The parameters of the rolling statistics, see
+        `compute_rolling_metrics`.
+    use_cache : bool, optional
+        Whether or not to use the caches of the parsed dataset and of the
+        rolling statistics. Default is True.
+
+    Returns
+    -------
+    rolling : dict
+        The rolling statistics, with read-only arrays of shape (regions,
+        dates), see `compute_rolling_metrics`.
+    regions : Pandas.DataFrame
+        The metadata of each region, i.e. of each row of the arrays.
+    dates : Pandas.DatetimeIndex
+        The date of each column of the arrays.
+
+    Notes
+    -----
+    The statistics are only extended if the regions are unchanged and the
+    values of the last `max(window_length, average_days)` previous dates
+    have not changed, otherwise they are computed again for every date.
+    Only these dates are checked, so that an update does not grow with
+    the number of previous dates. The statistics are discarded by
+    `clear_cache` and `refresh`, and by `update_data` if it revised any
+    previous date. As many statistics as datasets are kept, see
+    `set_cache_size`.
+
+    The statistics are extended in place, in arrays with room for more
+    dates, and the arrays returned before an update are not changed by
+    it. Only the two filtered statistics, whose last `window_length // 2`
+    values change, are copied by an update, as well as every statistic
+    when a series reports its first value, which changes its history.
+
+    Unlike `get_derived_data`, the plots, and the query service, which
+    derive the metrics of each region over the dates on which it has
+    reported data only, the missing values are filled as in
+    `derive_metrics`, so that the statistics can be extended date by
+    date. The "new_cases_filt" and "new_deaths_filt" of the NY Times
+    counties therefore differ from those of `get_derived_data` near the
+    first reported date of each county, and are not NaN before it.
+
+    """
+
+    regions, dates, metrics = _load_cube(data_source, use_cache=use_cache)
+    params = (data_source, window_length, polyorder, average_days)
+    overlap = max(window_length, average_days)
+
+    cached = _pop_rolling(params) if use_cache else None
+
+    buffers = None
+    if cached is not None:
+        ndates = cached['ndates']
+        check = slice(max(ndates - overlap, 0), ndates)
+        extendable = (
+            cached['regions'].equals(regions)
+            and len(dates) >= ndates
+            and dates[check].equals(cached['dates'])
+            and all(
+                np.array_equal(cached['tails'][m], metrics[m][:, check], equal_nan=True)
+                for m in ['cases', 'deaths']
+            )
+        )
+        if extendable:
+            buffers = cached['buffers']
+            if len(dates) > ndates:
+                started = np.zeros(len(regions), dtype=bool)
+                for m in ['cases', 'deaths']:
+                    started |= np.isnan(buffers[f'last_{m}']) & ~np.all(
+                        np.isnan(metrics[m][:, ndates:]), axis=-1,
+                    )
+                buffers = _unshared_buffers(buffers, ndates, len(dates) - ndates, started)
+                _extend_rolling(
+                    buffers,
+                    ndates,
+                    metrics['cases'][:, ndates:],
+                    metrics['deaths'][:, ndates:],
+                    window_length,
+                    polyorder,
+                    average_days,
+                )
+
+    if buffers is None:
+        buffers = compute_rolling_metrics(
+            metrics['cases'],
+            metrics['deaths'],
+            window_length=window_length,
+            polyorder=polyorder,
+            average_days=average_days,
+        )
+
+    if use_cache:
+        check = slice(max(len(dates) - overlap, 0), len(dates))
+        _store_rolling(params, {
+            'regions': regions,
+            'dates': dates[check],
+            'ndates': len(dates),
+            'tails': {m: np.array(metrics[m][:, check]) for m in ['cases', 'deaths']},
+            'buffers': buffers,
+        })
+
+    return _rolling_views(buffers, len(dates)), regions, dates
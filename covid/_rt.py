@@ -0,0 +1,169 @@
+import numpy as np
+
+from ._metrics import _daily, _fill_missing
+
+
+__all__ = [
+    'estimate_rt',
+]
+
+# the shape of a gamma distribution above which its quantiles are
+# approximated with the Wilson-Hilferty transformation
+_WILSON_HILFERTY_SHAPE = 100
+
+
+def _serial_interval(si_mean, si_sd):
+    """
+    Hidden function for discretizing a gamma distributed serial interval
+    with mean `si_mean` and standard deviation `si_sd` (in days), which
+    returns the probability of an interval of 0, 1, 2, ... days, with
+    zero probability for 0 days.
+
+    """
+
+    # scipy is only imported when needed, as it is slow to import
+    from scipy import stats
+
+    shape = (si_mean / si_sd)**2
+    scale = si_sd**2 / si_mean
+
+    # each day takes the probability of the intervals rounding to it, up
+    # to the day by which almost every interval has passed
+    ndays = int(np.ceil(stats.gamma.ppf(0.999, shape, scale=scale))) + 1
+    cdf = stats.gamma.cdf(np.arange(ndays) + 0.5, shape, scale=scale)
+    weights = np.diff(cdf, prepend=0)
+    weights[0] = 0
+
+    return weights / weights.sum()
+
+def _trailing_sum(values, window_days):
+    """
+    Hidden function for computing the trailing sum over `window_days`
+    along the last axis, which is NaN for the first `window_days - 1`
+    values.
+
+    """
+
+    csum = np.cumsum(values, axis=-1)
+    total = np.full_like(values, np.nan)
+    total[..., window_days - 1:] = csum[..., window_days - 1:]
+    total[..., window_days:] -= csum[..., :-window_days]
+
+    return total
+
+def _gamma_quantile(shape, q):
+    """
+    Hidden function for computing the quantile `q` of gamma distributions
+    with unit scale and the given `shape` array. The Wilson-Hilferty
+    approximation, whose relative error is below 1e-3 for the quantiles
+    of credible intervals up to 99%, is used for large shapes, and the
+    exact inverse of the incomplete gamma function for the others.
+
+    """
+
+    # scipy is only imported when needed, as it is slow to import
+    from scipy import special
+
+    z = special.ndtri(q)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        quantile = shape * (1 - 1 / (9 * shape) + z / (3 * np.sqrt(shape)))**3
+
+    # the shapes of small counts repeat often, so each is inverted only once
+    small = shape < _WILSON_HILFERTY_SHAPE
+    shapes, inverse = np.unique(shape[small], return_inverse=True)
+    quantile[small] = special.gammaincinv(shapes, q)[inverse]
+
+    return quantile
+
+def estimate_rt(cases, window_days=7, si_mean=4.7, si_sd=2.9, prior_mean=5, prior_sd=5,
+                credible_interval=0.95):
+    """
+    Function for estimating the effective reproduction number Rt of many
+    time series of cumulative cases at once, using the renewal-equation
+    method of Cori et al. (2013).
+
+    Parameters
+    ----------
+    cases : array_like
+        The cumulative cases, with dates along the last axis, e.g. an
+        array of shape (regions, dates) as returned by `get_cube`.
+    window_days : int, optional
+        The number of days over which Rt is assumed to be constant, i.e.
+        the length of the trailing window of each estimate. Default is 7.
+    si_mean : float, optional
+        The mean of the gamma distributed serial interval, in days.
+        Default is 4.7, as estimated for COVID-19 by Nishiura et al.
+        (2020).
+    si_sd : float, optional
+        The standard deviation of the serial interval, in days. Default
+        is 2.9.
+    prior_mean : float, optional
+        The mean of the gamma prior of Rt. Default is 5.
+    prior_sd : float, optional
+        The standard deviation of the gamma prior of Rt. Default is 5.
+    credible_interval : float, optional
+        The probability contained in the credible interval of Rt.
+        Default is 0.95.
+
+    Returns
+    -------
+    rt : dict
+        A dictionary of arrays with the same shape as `cases`, with keys
+        "rt" (the posterior mean of Rt), "rt_lower" and "rt_upper" (the
+        bounds of the equal-tailed credible interval), which are NaN for
+        the first `window_days - 1` dates and while no cases have been
+        reported yet.
+
+    Notes
+    -----
+    The daily new cases are computed as in `derive_metrics`, with
+    negative counts (e.g. from corrections of the cumulative counts) set
+    to zero. The total infectiousness of each date, i.e. the past daily
+    cases weighted by the discretized serial interval distribution, is
+    computed for every series at once by FFT convolution. With a gamma
+    prior, the posterior of Rt over each window is a gamma distribution,
+    whose mean and quantiles are computed in closed form for every
+    series and date at once. The quantiles of posteriors with more than
+    about 100 cases in their window use the Wilson-Hilferty
+    approximation, with a relative error below 1e-3.
+
+    References
+    ----------
+    A. Cori, N. M. Ferguson, C. Fraser, and S. Cauchemez, "A New
+    Framework and Software to Estimate Time-Varying Reproduction Numbers
+    During Epidemics", American Journal of Epidemiology 178, 1505 (2013).
+
+    """
+
+    # scipy is only imported when needed, as it is slow to import
+    from scipy import signal
+
+    cases = np.asarray(cases, dtype=np.float64)
+    incidence = np.maximum(_daily(_fill_missing(cases)), 0)
+    ndates = incidence.shape[-1]
+
+    weights = _serial_interval(si_mean, si_sd)
+    weights = weights.reshape((1,) * (incidence.ndim - 1) + (-1,))
+
+    # the convolution is only taken along the dates, and the rounding errors
+    # of the FFT, relative to the total cases of each series, are removed
+    infectiousness = signal.fftconvolve(incidence, weights, axes=-1)[..., :ndates]
+    tolerance = 1e-9 * np.sum(incidence, axis=-1, keepdims=True)
+    infectiousness[~(infectiousness > tolerance)] = 0
+
+    prior_shape = (prior_mean / prior_sd)**2
+    prior_scale = prior_sd**2 / prior_mean
+
+    shape = prior_shape + _trailing_sum(incidence, window_days)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = 1 / (1 / prior_scale + _trailing_sum(infectiousness, window_days))
+    # without any infectiousness, the posterior is only the prior
+    scale[~(_trailing_sum(infectiousness, window_days) > 0)] = np.nan
+
+    tail = (1 - credible_interval) / 2
+
+    return {
+        'rt': shape * scale,
+        'rt_lower': _gamma_quantile(shape, tail) * scale,
+        'rt_upper': _gamma_quantile(shape, 1 - tail) * scale,
+    }
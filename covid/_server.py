@@ -0,0 +1,382 @@
+import json
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+
+from ._io import get_bay_data, _load_cube, _region_rows
+from ._metrics import _derive_reported
+
+
+__all__ = [
+    'start_server',
+    'serve',
+]
+
+SERVER_METRICS = [
+    'cases',
+    'deaths',
+    'recovered',
+    'new_cases',
+    'new_deaths',
+    'new_cases_filt',
+    'new_deaths_filt',
+]
+SERVER_REGION_COLUMNS = ['county', 'state', 'country', 'fips']
+
+_HTTP_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+
+def _load_server_data(data_source):
+    """
+    Hidden function for loading everything the service needs for a data
+    source: the dataset, its derived metrics for every region over the
+    dates on which it has reported data, as in the plots, and the Bay
+    Area totals.
+
+    """
+
+    regions, dates, metrics = _load_cube(data_source)
+    reported = ~np.isnan(metrics['cases'])
+    metrics = dict(metrics)
+    metrics.update(_derive_reported(metrics['cases'], metrics['deaths'], reported))
+
+    return {
+        'regions': regions,
+        'dates': dates,
+        'metrics': metrics,
+        'reported': reported,
+        'bay': get_bay_data(data_source),
+    }
+
+def _json_values(values):
+    """
+    Hidden function for converting an array of values to a list, with
+    NaN converted to None.
+
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+
+    return np.where(np.isnan(values), None, values).tolist()
+
+def _query_options(query, data):
+    """
+    Hidden function for parsing the data source, metric, and number of
+    last days of a query.
+
+    """
+
+    data_source = query.get('source', ['jhu'])[-1]
+    if data_source not in data:
+        raise ValueError(f"source should be one of {', '.join(repr(s) for s in data)}.")
+
+    metric = query.get('metric', ['cases'])[-1]
+    if metric not in SERVER_METRICS:
+        raise ValueError(f"metric should be one of {', '.join(repr(m) for m in SERVER_METRICS)}.")
+
+    last = query.get('last', [None])[-1]
+    if last is not None:
+        try:
+            last = int(last)
+        except ValueError:
+            raise ValueError("last should be a positive integer.") from None
+        if last < 1:
+            raise ValueError("last should be a positive integer.")
+
+    return data_source, metric, last
+
+def _query_series(data, query):
+    """
+    Hidden function for answering a query of the time series of the
+    regions matching the county, state, country, and fips selections of
+    the query.
+
+    """
+
+    data_source, metric, last = _query_options(query, data)
+    source = data[data_source]
+
+    selection = {}
+    for column in SERVER_REGION_COLUMNS:
+        if column in query:
+            selection[column] = query[column]
+    if not selection:
+        raise ValueError(f"At least one of {', '.join(SERVER_REGION_COLUMNS)} should be given.")
+    if 'fips' in selection:
+        try:
+            selection['fips'] = [float(f) for f in selection['fips']]
+        except ValueError:
+            raise ValueError("fips should be a number.") from None
+
+    if metric not in source['metrics']:
+        raise ValueError(f"{metric} is not available for this dataset.")
+
+    rows = _region_rows(source['regions'], **selection)
+    dates = source['dates']
+    start = 0 if last is None else max(len(dates) - last, 0)
+
+    series = []
+    for row in rows:
+        reported = source['reported'][row, start:]
+        region = source['regions'].iloc[row]
+        series.append({
+            **{c: (None if region[c] != region[c] else region[c]) for c in source['regions'].columns},
+            'dates': dates[start:][reported].strftime('%Y-%m-%d').tolist(),
+            'values': _json_values(source['metrics'][metric][row, start:][reported]),
+        })
+
+    return {'source': data_source, 'metric': metric, 'regions': series}
+
+def _query_bay(data, query):
+    """
+    Hidden function for answering a query of the time series of the
+    total Bay Area, see `get_bay_data`.
+
+    """
+
+    data_source, metric, last = _query_options(query, data)
+    if metric == 'recovered':
+        raise ValueError(f"{metric} is not available for the Bay Area.")
+
+    bay_df = data[data_source]['bay']
+    if last is not None:
+        bay_df = bay_df.iloc[max(len(bay_df) - last, 0):]
+
+    return {
+        'source': data_source,
+        'metric': metric,
+        'dates': bay_df.index.strftime('%Y-%m-%d').tolist(),
+        'values': _json_values(bay_df[metric].to_numpy()),
+    }
+
+_ROUTES = {
+    '/series': _query_series,
+    '/bay': _query_bay,
+}
+
+async def _response(state, method, target):
+    """
+    Hidden function for returning the status and the body of the
+    response to a request, encoded as JSON, from the response cache if
+    possible.
+
+    """
+
+    if method != 'GET':
+        return 405, json.dumps({'error': "Only GET requests are supported."}).encode()
+
+    url = urlsplit(target)
+    if url.path == '/health':
+        done = {s: task for s, task in state['data'].items() if task.done()}
+        failed = [s for s, task in done.items() if task.cancelled() or task.exception()]
+        loaded = [s for s in done if s not in failed]
+        return 200, json.dumps({'loaded': loaded, 'failed': failed}).encode()
+    if url.path not in _ROUTES:
+        return 404, json.dumps({'error': f"{url.path} was not found."}).encode()
+
+    query = parse_qs(url.query)
+    key = (url.path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+
+    cache = state['cache']
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    # the datasets are loaded in the background when the service starts,
+    # so requests wait here without blocking the other clients, and only
+    # for the dataset they query, so that a dataset that failed to load
+    # does not affect the queries of the others
+    data = dict.fromkeys(state['data'])
+    data_source = query.get('source', ['jhu'])[-1]
+    if data_source in data:
+        try:
+            data[data_source] = await asyncio.shield(state['data'][data_source])
+        except Exception as e:
+            return 500, json.dumps(
+                {'error': f"{data_source} could not be loaded: {e}"},
+            ).encode()
+
+    try:
+        response = 200, _ROUTES[url.path](data, query)
+    except ValueError as e:
+        response = 400, {'error': str(e)}
+
+    # the encoded body is cached, so that hot queries are not encoded again
+    response = response[0], json.dumps(response[1]).encode()
+
+    if state['cache_size'] > 0:
+        cache[key] = response
+        while len(cache) > state['cache_size']:
+            cache.popitem(last=False)
+
+    return response
+
+async def _handle_connection(state, reader, writer):
+    """
+    Hidden function for handling the HTTP/1.1 requests of a client
+    connection, until the client closes it.
+
+    """
+
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            # the body of a request is never used, but it is read so that it
+            # is not parsed as the next request of a kept-alive connection,
+            # which is closed instead if the length of the body is unknown
+            body_read = 'transfer-encoding' not in headers
+            if body_read and 'content-length' in headers:
+                try:
+                    length = int(headers['content-length'])
+                except ValueError:
+                    length = -1
+                if length >= 0:
+                    await reader.readexactly(length)
+                else:
+                    body_read = False
+
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                status, payload = 400, json.dumps({'error': "Malformed request."}).encode()
+                version = 'HTTP/1.0'
+            else:
+                status, payload = await _response(state, method, target)
+
+            keep_alive = (
+                body_read
+                and version == 'HTTP/1.1'
+                and headers.get('connection', '').lower() != 'close'
+            )
+
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {_HTTP_REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n"
+                ).encode() + payload
+            )
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def start_server(host='127.0.0.1', port=8000, data_sources=('jhu', 'nytimes'),
+                       cache_size=1024):
+    """
+    Function for starting a local HTTP service answering queries of the
+    COVID-19 time series from memory. Must be awaited in a running
+    asyncio event loop, see `serve` to run the service on its own.
+
+    Parameters
+    ----------
+    host : str, optional
+        The host to listen on. Default is "127.0.0.1", i.e. only local
+        clients can connect.
+    port : int, optional
+        The port to listen on. Default is 8000.
+    data_sources : list of str, optional
+        The datasets to serve, "jhu" for the John Hopkins University
+        dataset and/or "nytimes" for the NY Times dataset. Default is
+        both.
+    cache_size : int, optional
+        The maximum number of responses held in the cache of responses
+        to the most recent queries. Setting this to 0 disables the cache.
+        Default is 1024.
+
+    Returns
+    -------
+    server : asyncio.Server
+        The started server.
+
+    Notes
+    -----
+    The service answers GET requests with JSON, at the endpoints:
+        - /series?county=Santa Clara&metric=new_cases_filt&last=31
+          The time series of the regions matching every county, state,
+          country, and fips selection, each of which can be repeated
+          to select several values.
+        - /bay?metric=cases&last=31
+          The time series of the total Bay Area, see `get_bay_data`.
+        - /health
+          The datasets that have been loaded, and those that failed to
+          load.
+    Both /series and /bay take the optional "source" (default "jhu"),
+    "metric" (default "cases", or one of deaths, recovered, new_cases,
+    new_deaths, new_cases_filt, and new_deaths_filt), and "last" (the
+    number of last dates of the dataset to return, default all)
+    parameters. Only the dates on which a region has reported data are
+    returned.
+
+    The datasets are loaded once, in a background thread, when the
+    service starts, and requests received before they are loaded wait
+    for them without blocking the other clients.
+
+    """
+
+    loop = asyncio.get_running_loop()
+
+    state = {
+        'data': {
+            s: loop.run_in_executor(None, _load_server_data, s) for s in data_sources
+        },
+        'cache': OrderedDict(),
+        'cache_size': cache_size,
+    }
+
+    return await asyncio.start_server(
+        lambda reader, writer: _handle_connection(state, reader, writer), host, port,
+    )
+
+def serve(host='127.0.0.1', port=8000, data_sources=('jhu', 'nytimes'), cache_size=1024):
+    """
+    Function for running the local HTTP service of `start_server` until
+    interrupted.
+
+    Parameters
+    ----------
+    host : str, optional
+        The host to listen on. Default is "127.0.0.1".
+    port : int, optional
+        The port to listen on. Default is 8000.
+    data_sources : list of str, optional
+        The datasets to serve. Default is both "jhu" and "nytimes".
+    cache_size : int, optional
+        The maximum number of cached responses. Default is 1024.
+
+    """
+
+    async def _serve():
+        server = await start_server(
+            host=host, port=port, data_sources=data_sources, cache_size=cache_size,
+        )
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
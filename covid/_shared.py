@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+import tempfile
+
+from ._cache import (
+    _ATTACHED_DATASETS, _MEMORY_CACHE_LOCK, _load_dataset, _readonly_dataset, _save_dataset,
+)
+from ._io import _load_cube
+
+
+__all__ = [
+    'export_shared',
+    'attach_shared',
+    'detach_shared',
+]
+
+_SHARED_VERSION = 1
+
+
+def _read_shared_manifest(path):
+    """
+    Hidden function for reading the manifest of the shared datasets
+    exported to `path`, returning None if there is none.
+
+    """
+
+    try:
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('version') != _SHARED_VERSION:
+        return None
+
+    return manifest
+
+def export_shared(path, data_sources=('jhu', 'nytimes'), use_cache=True):
+    """
+    Function for exporting loaded datasets to a directory of
+    memory-mappable files, which any number of processes can attach to
+    with `attach_shared` without holding their own copy of the data.
+
+    Parameters
+    ----------
+    path : str
+        The directory to export the datasets to, which is created if it
+        does not exist. Datasets exported to it before are replaced.
+    data_sources : list of str, optional
+        The datasets to export, "jhu" for the John Hopkins University
+        dataset and/or "nytimes" for the NY Times dataset. Default is
+        both.
+    use_cache : bool, optional
+        Whether or not to use the in-process and on-disk caches when
+        loading the datasets to export. Default is True.
+
+    Notes
+    -----
+    Each dataset is written as fixed-width arrays: one 2-D float64 array
+    with shape (regions, dates) per metric, the dates, and the region
+    metadata, with the strings stored as integer codes. A new export
+    is written next to the previous one before the manifest is updated,
+    so that processes attached to the previous export are not affected.
+
+    """
+
+    if isinstance(data_sources, str):
+        data_sources = [data_sources]
+
+    os.makedirs(path, exist_ok=True)
+    manifest = _read_shared_manifest(path) or {'version': _SHARED_VERSION, 'datasets': {}}
+    stale = []
+
+    for data_source in data_sources:
+        dataset = _load_cube(data_source, use_cache=use_cache)
+
+        entry = tempfile.mkdtemp(dir=path, prefix=f"{data_source}-")
+        try:
+            _save_dataset(entry, dataset)
+        except OSError:
+            shutil.rmtree(entry, ignore_errors=True)
+            raise
+
+        if data_source in manifest['datasets']:
+            stale.append(manifest['datasets'][data_source])
+        manifest['datasets'][data_source] = os.path.basename(entry)
+
+    tmp_manifest = os.path.join(path, 'manifest.json.tmp')
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, os.path.join(path, 'manifest.json'))
+
+    # the files of the previous exports stay readable by the processes that
+    # have them memory-mapped after being removed
+    for entry in stale:
+        shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+def attach_shared(path, data_sources=None):
+    """
+    Function for attaching to the datasets exported with `export_shared`,
+    so that every function of this package uses them instead of loading
+    the source files or the caches.
+
+    Parameters
+    ----------
+    path : str
+        The directory the datasets were exported to.
+    data_sources : list of str, NoneType, optional
+        The datasets to attach to. If set to None (default), every
+        exported dataset is attached.
+
+    Returns
+    -------
+    attached : list of str
+        The names of the attached datasets.
+
+    Notes
+    -----
+    The metric arrays are memory-mapped read-only from the exported
+    files, so that every attached process shares the same physical
+    memory, and the resident memory per process stays flat. The arrays
+    returned by e.g. `get_cube` are views of the shared arrays, while
+    the DataFrames of `get_data` are built by each call, so that they
+    can be modified.
+
+    Attached datasets are used whenever `use_cache` is True, and are
+    not removed by `clear_cache`. Use `detach_shared` to stop using
+    them.
+
+    """
+
+    manifest = _read_shared_manifest(path)
+    if manifest is None:
+        raise ValueError(f"No shared datasets were exported to {path}.")
+
+    if data_sources is None:
+        data_sources = list(manifest['datasets'])
+    elif isinstance(data_sources, str):
+        data_sources = [data_sources]
+
+    for data_source in data_sources:
+        if data_source not in manifest['datasets']:
+            raise ValueError(f"{data_source} was not exported to {path}.")
+
+        dataset = _readonly_dataset(
+            _load_dataset(os.path.join(path, manifest['datasets'][data_source]))
+        )
+        with _MEMORY_CACHE_LOCK:
+            _ATTACHED_DATASETS[data_source] = dataset
+
+    return list(data_sources)
+
+def detach_shared(data_sources=None):
+    """
+    Function for detaching from the datasets attached with
+    `attach_shared`, after which they are loaded as usual.
+
+    Parameters
+    ----------
+    data_sources : list of str, NoneType, optional
+        The datasets to detach from. If set to None (default), every
+        attached dataset is detached.
+
+    """
+
+    if isinstance(data_sources, str):
+        data_sources = [data_sources]
+
+    with _MEMORY_CACHE_LOCK:
+        for data_source in list(data_sources or _ATTACHED_DATASETS):
+            _ATTACHED_DATASETS.pop(data_source, None)
@@ -0,0 +1,98 @@
+from ._ingest import (
+    NYTIMES_CHUNKSIZE, _group_chunks_by_date, _iter_nytimes_chunks, _nytimes_totals,
+    _region_selection,
+)
+from ._io import _nytimes_path
+
+
+__all__ = [
+    'iter_nytimes',
+    'get_nytimes_totals',
+]
+
+
+def iter_nytimes(by='chunk', chunksize=NYTIMES_CHUNKSIZE, county=None, state=None, fips=None):
+    """
+    Function for streaming the NY Times dataset from its source file,
+    holding at most one chunk of rows in memory at a time.
+
+    Parameters
+    ----------
+    by : str, optional
+        How the rows are yielded. Can be "chunk" (default) to yield one
+        DataFrame per chunk of rows read from the file, or "date" to yield
+        one (date, DataFrame) pair for each date, in order.
+    chunksize : int, optional
+        The number of rows read from the file at a time. Default is
+        500000.
+    county : str, list of str, NoneType, optional
+        If set, only the rows of these counties are yielded.
+    state : str, list of str, NoneType, optional
+        If set, only the rows of these states are yielded.
+    fips : float, list of float, NoneType, optional
+        If set, only the rows of these FIPS codes are yielded.
+
+    Yields
+    ------
+    chunk : Pandas.DataFrame, tuple
+        The rows of the dataset in the original long format of the NY
+        Times dataset, with the date column parsed, either as a DataFrame
+        or as a (date, DataFrame) pair, depending on `by`.
+
+    Notes
+    -----
+    Yielding the rows by region is not supported, as the rows of the NY
+    Times dataset are ordered by date, so that the rows of any region
+    are only complete once the whole file has been read. Use `get_data`
+    with a region selection instead.
+
+    The NY Times dataset can be found here:
+        - https://github.com/nytimes/covid-19-data
+
+    """
+
+    if by not in ['chunk', 'date']:
+        raise ValueError("by should be either 'chunk' or 'date'.")
+
+    chunks = _iter_nytimes_chunks(
+        _nytimes_path(),
+        selection=_region_selection(county=county, state=state, fips=fips),
+        chunksize=chunksize,
+    )
+
+    if by == 'date':
+        chunks = _group_chunks_by_date(chunks)
+
+    yield from chunks
+
+def get_nytimes_totals(chunksize=NYTIMES_CHUNKSIZE, county=None, state=None, fips=None):
+    """
+    Function for summing the cases and deaths of the NY Times dataset
+    over the selected regions on each date, while streaming the source
+    file, so that only the running totals and one chunk of rows are held
+    in memory.
+
+    Parameters
+    ----------
+    chunksize : int, optional
+        The number of rows read from the file at a time. Default is
+        500000.
+    county : str, list of str, NoneType, optional
+        If set, only the rows of these counties are summed.
+    state : str, list of str, NoneType, optional
+        If set, only the rows of these states are summed.
+    fips : float, list of float, NoneType, optional
+        If set, only the rows of these FIPS codes are summed.
+
+    Returns
+    -------
+    totals : Pandas.DataFrame
+        A DataFrame indexed by date, with the summed "cases" and "deaths"
+        on each date on which at least one selected region has reported
+        data.
+
+    """
+
+    return _nytimes_totals(iter_nytimes(
+        chunksize=chunksize, county=county, state=state, fips=fips,
+    ))
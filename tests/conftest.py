@@ -0,0 +1,29 @@
+import os
+import sys
+import pytest
+
+# the synthetic data generator of the benchmarks is imported from the
+# top-level directory of the repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import covid
+import covid._io
+from benchmarks.synthetic import write_synthetic_data
+
+
+@pytest.fixture
+def synthetic_data(tmp_path, monkeypatch):
+    """
+    Points the `covid` package to small synthetic source files, with an
+    empty cache directory, and returns the directory of the source files.
+
+    """
+
+    root = tmp_path / 'package'
+    write_synthetic_data(str(root), ncounties=20, ndates=40, ncountries=6)
+
+    monkeypatch.setattr(covid._io, 'FILE_PATH', str(root))
+    monkeypatch.setenv('COVID_CACHE_DIR', str(tmp_path / 'cache'))
+    covid.clear_cache()
+    yield root
+    covid.clear_cache()
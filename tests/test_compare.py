@@ -0,0 +1,20 @@
+import covid
+
+
+def test_compare_sources_synthetic(synthetic_data):
+    """
+    The synthetic datasets have the same values on the dates reported by
+    both, so the only discrepancies are the dates before a county starts
+    reporting to the NY Times.
+
+    """
+
+    discrepancies, summary = covid.compare_sources()
+    ndates = len(covid.get_cube('jhu')[2])
+
+    assert (summary['discrepancies'] == summary['dates_jhu_only']).all()
+    assert (summary['dates_nytimes_only'] == 0).all()
+    assert (summary['dates_both'] + summary['dates_jhu_only'] == ndates).all()
+    assert (summary['cases_max_abs_diff'] == 0).all()
+    assert discrepancies['cases_nytimes'].isna().all()
+    assert len(discrepancies) == summary['discrepancies'].sum()
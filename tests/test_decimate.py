@@ -0,0 +1,32 @@
+import numpy as np
+
+import covid
+
+
+def test_decimate_series_keeps_extremes():
+    """
+    The decimated series keep their first and last dates and their
+    spikes, with at most `max_points` sorted dates per series.
+
+    """
+
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=(3, 1000))
+    y[0, 500] = 100
+    y[1, 250] = -100
+
+    for method in ['lttb', 'minmax']:
+        indices = covid.decimate_series(y, 50, method=method)
+
+        assert indices.shape[0] == 3 and indices.shape[-1] <= 50
+        assert (np.diff(indices, axis=-1) >= 0).all()
+        assert (indices[:, 0] == 0).all() and (indices[:, -1] == 999).all()
+        assert 500 in indices[0] and 250 in indices[1]
+
+def test_decimate_series_short():
+    """
+    Every date of a series with no more than `max_points` dates is kept.
+
+    """
+
+    np.testing.assert_array_equal(covid.decimate_series(np.arange(10.0), 20), np.arange(10))
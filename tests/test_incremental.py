@@ -0,0 +1,203 @@
+import os
+import numpy as np
+import pandas as pd
+
+import covid
+from benchmarks.synthetic import JHU_DIR, NYTIMES_DIR
+
+
+def _source_paths(root):
+    """
+    Returns the paths to the synthetic JHU files and NY Times file.
+
+    """
+
+    jhu_dir = os.path.join(root, JHU_DIR)
+    jhu_paths = [os.path.join(jhu_dir, f) for f in sorted(os.listdir(jhu_dir))]
+
+    return jhu_paths, os.path.join(root, NYTIMES_DIR, 'us-counties.csv')
+
+def _drop_last_dates(root, ndrop):
+    """
+    Rewrites the synthetic source files without their last `ndrop` dates,
+    returning the original contents of each file.
+
+    """
+
+    jhu_paths, nytimes_path = _source_paths(root)
+
+    originals = {}
+    for path in jhu_paths:
+        with open(path) as f:
+            originals[path] = f.read()
+        lines = originals[path].splitlines()
+        with open(path, 'w') as f:
+            f.writelines(line.rsplit(',', ndrop)[0] + '\n' for line in lines)
+
+    with open(nytimes_path) as f:
+        originals[nytimes_path] = f.read()
+    lines = originals[nytimes_path].splitlines()
+    last_dates = sorted(set(line.split(',')[0] for line in lines[1:]))[-ndrop:]
+    with open(nytimes_path, 'w') as f:
+        f.writelines(
+            line + '\n' for line in lines if line.split(',')[0] not in last_dates
+        )
+
+    return originals
+
+def _write_files(contents):
+    """
+    Writes the contents of each source file.
+
+    """
+
+    for path, content in contents.items():
+        with open(path, 'w') as f:
+            f.write(content)
+
+def _assert_matches_sources(data_source):
+    """
+    Checks that the cached dataset matches the source files.
+
+    """
+
+    pd.testing.assert_frame_equal(
+        covid.get_data(data_source), covid.get_data(data_source, use_cache=False),
+    )
+
+
+def test_update_data_appended_dates(synthetic_data):
+    """
+    Dates appended to the source files are read without rebuilding the
+    stored dataset.
+
+    """
+
+    originals = _drop_last_dates(synthetic_data, 5)
+    for data_source in ['jhu', 'nytimes']:
+        assert covid.update_data(data_source)['rebuilt']
+
+    _write_files(originals)
+    for data_source in ['jhu', 'nytimes']:
+        summary = covid.update_data(data_source)
+        assert not summary['rebuilt']
+        assert len(summary['new_dates']) == 5
+        assert len(summary['revised_dates']) == 0
+
+        covid.clear_cache()
+        _assert_matches_sources(data_source)
+
+def test_update_data_unchanged(synthetic_data):
+    """
+    Updating an up to date dataset neither adds nor revises any dates.
+
+    """
+
+    for data_source in ['jhu', 'nytimes']:
+        covid.update_data(data_source)
+        summary = covid.update_data(data_source)
+        assert not summary['rebuilt']
+        assert len(summary['new_dates']) == 0
+        assert len(summary['revised_dates']) == 0
+
+def test_update_data_revised_dates(synthetic_data):
+    """
+    Revisions of any stored date are detected, including dates long
+    before the most recent ones, and the stored dataset matches the
+    revised source files.
+
+    """
+
+    jhu_paths, nytimes_path = _source_paths(synthetic_data)
+    for data_source in ['jhu', 'nytimes']:
+        covid.update_data(data_source)
+
+    # the fifth date, on which every county has reported, of the first
+    # county is revised in both datasets
+    revised = pd.DatetimeIndex(['2020-01-26'])
+
+    jhu_path = [p for p in jhu_paths if p.endswith('confirmed_US.csv')][0]
+    with open(jhu_path) as f:
+        lines = f.read().splitlines()
+    ndates = sum(1 for c in lines[0].split(',') if c.count('/') == 2)
+    fields = lines[1].rsplit(',', ndates)
+    fields[-ndates + 4] = str(float(fields[-ndates + 4]) + 1000)
+    lines[1] = ','.join(fields)
+    with open(jhu_path, 'w') as f:
+        f.writelines(line + '\n' for line in lines)
+
+    nytimes = pd.read_csv(nytimes_path)
+    first = np.flatnonzero(nytimes['date'] == '2020-01-26')[0]
+    nytimes.loc[first, 'cases'] += 1000
+    nytimes.to_csv(nytimes_path, index=False)
+
+    for data_source in ['jhu', 'nytimes']:
+        summary = covid.update_data(data_source)
+        assert not summary['rebuilt']
+        assert len(summary['new_dates']) == 0
+        assert summary['revised_dates'].equals(revised)
+
+        covid.clear_cache()
+        _assert_matches_sources(data_source)
+
+def test_update_data_changed_regions(synthetic_data):
+    """
+    The JHU dataset is rebuilt when its regions change, while new NY
+    Times counties are added to the stored dataset.
+
+    """
+
+    jhu_paths, nytimes_path = _source_paths(synthetic_data)
+    for data_source in ['jhu', 'nytimes']:
+        covid.update_data(data_source)
+
+    # the last county is removed from both US files
+    for path in jhu_paths:
+        if path.endswith('_US.csv'):
+            with open(path) as f:
+                lines = f.read().splitlines()
+            with open(path, 'w') as f:
+                f.writelines(line + '\n' for line in lines[:-1])
+
+    with open(nytimes_path, 'a') as f:
+        f.write("2020-03-01,New County,California,6999,10,1\n")
+
+    summary = covid.update_data('jhu')
+    assert summary['rebuilt']
+
+    summary = covid.update_data('nytimes')
+    assert not summary['rebuilt']
+    assert summary['revised_dates'].equals(pd.DatetimeIndex(['2020-03-01']))
+
+    for data_source in ['jhu', 'nytimes']:
+        covid.clear_cache()
+        _assert_matches_sources(data_source)
+
+def test_rolling_data_extended_after_update(synthetic_data):
+    """
+    The rolling statistics are extended to the appended dates, without
+    changing the arrays returned before the update.
+
+    """
+
+    # the statistics are extended by one date at a time, so that the
+    # arrays of an update can have room for the dates of the next one
+    originals = _drop_last_dates(synthetic_data, 10)
+    covid.update_data('nytimes')
+    covid.get_rolling_data('nytimes')
+
+    for ndrop in [9, 8]:
+        _write_files(originals)
+        _drop_last_dates(synthetic_data, ndrop)
+        covid.update_data('nytimes')
+        if ndrop == 9:
+            before = covid.get_rolling_data('nytimes')[0]
+            before_copy = {k: np.array(v) for k, v in before.items()}
+    after = covid.get_rolling_data('nytimes')[0]
+
+    expected = covid.compute_rolling_metrics(
+        covid.get_cube('nytimes')[0], covid.get_cube('nytimes', metric='deaths')[0],
+    )
+    for key, values in before.items():
+        np.testing.assert_array_equal(values, before_copy[key])
+        np.testing.assert_allclose(after[key], expected[key], atol=1e-8)
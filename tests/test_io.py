@@ -0,0 +1,56 @@
+import numpy as np
+
+import covid
+
+
+def test_get_data_cached_frame_is_writable(synthetic_data):
+    """
+    The DataFrames returned from the in-process cache can be modified by
+    the caller, without changing the cached dataset.
+
+    """
+
+    expected = covid.get_data('jhu', use_cache=False)
+    df = covid.get_data('jhu')
+    df['cases'] *= 2
+    df.loc[0, 'deaths'] = -1
+
+    np.testing.assert_array_equal(covid.get_data('jhu')['cases'], expected['cases'])
+    np.testing.assert_array_equal(covid.get_data('jhu')['deaths'], expected['deaths'])
+
+def test_get_derived_data_reported_dates(synthetic_data):
+    """
+    The derived metrics of each region are computed over its reported
+    dates only, and are NaN on the other dates.
+
+    """
+
+    derived, regions, dates = covid.get_derived_data('nytimes')
+    cases = covid.get_cube('nytimes')[0]
+
+    for row in range(len(regions)):
+        reported = ~np.isnan(cases[row])
+        expected = covid.derive_metrics(
+            cases[row, reported], covid.get_cube('nytimes', metric='deaths')[0][row, reported],
+        )
+        for metric, values in expected.items():
+            assert np.isnan(derived[metric][row, ~reported]).all()
+            np.testing.assert_allclose(derived[metric][row, reported], values, atol=1e-8)
+
+def test_get_derived_data_short_county(synthetic_data):
+    """
+    A county that has reported fewer dates than the filter window does
+    not prevent deriving the metrics of the others.
+
+    """
+
+    nytimes_path = synthetic_data / 'data' / 'nytimes' / 'us-counties.csv'
+    with open(nytimes_path, 'a') as f:
+        f.write("2020-03-01,New County,California,6999,10,1\n")
+
+    derived, regions, dates = covid.get_derived_data('nytimes')
+    row = np.flatnonzero(regions['county'] == 'New County')[0]
+
+    assert derived['new_cases'][row, -1] == 0
+    assert np.isnan(derived['new_cases_filt'][row]).all()
+    assert not np.isnan(derived['new_cases_filt'][row - 1, -1])
@@ -0,0 +1,50 @@
+import numpy as np
+
+import covid
+from covid._metrics import _derive_reported
+
+
+def test_derive_metrics_all_nan_row():
+    """
+    Series without any reported value remain NaN, and do not change the
+    metrics of the other series.
+
+    """
+
+    cases = np.cumsum(np.arange(40, dtype=np.float64)).reshape(2, 20)
+    deaths = cases / 10
+    cases[1] = np.nan
+    deaths[1] = np.nan
+
+    derived = covid.derive_metrics(cases, deaths)
+    expected = covid.derive_metrics(cases[:1], deaths[:1])
+
+    for metric, values in derived.items():
+        assert np.isnan(values[1]).all()
+        np.testing.assert_allclose(values[0], expected[metric][0])
+
+def test_derive_reported_short_series():
+    """
+    Series with fewer reported dates than the filter window have their
+    daily counts but no filtered values, and do not change the metrics
+    of the other series.
+
+    """
+
+    cases = np.cumsum(np.arange(40, dtype=np.float64)).reshape(2, 20)
+    deaths = cases / 10
+    cases[1, :15] = np.nan
+    deaths[1, :15] = np.nan
+    reported = ~np.isnan(cases)
+
+    derived = _derive_reported(cases, deaths, reported)
+    expected = covid.derive_metrics(cases, deaths)
+
+    for metric in ['new_cases', 'new_deaths']:
+        np.testing.assert_allclose(derived[metric][0], expected[metric][0])
+        np.testing.assert_allclose(derived[metric][1, 16:], expected[metric][1, 16:])
+        assert derived[metric][1, 15] == 0
+        assert np.isnan(derived[metric][1, :15]).all()
+    for metric in ['new_cases_filt', 'new_deaths_filt']:
+        np.testing.assert_allclose(derived[metric][0], expected[metric][0])
+        assert np.isnan(derived[metric][1]).all()
@@ -0,0 +1,21 @@
+import os
+
+import covid
+
+
+def test_render_figures_titles(synthetic_data, tmp_path):
+    """
+    Titles can be given for the Bay Area plots and the grids of county
+    plots.
+
+    """
+
+    specs = [
+        dict(path=str(tmp_path / f'{groupcounties}.png'), groupcounties=groupcounties, title='x')
+        for groupcounties in [True, False]
+    ]
+
+    paths = covid.render_figures(specs, max_workers=1)
+
+    assert paths == [spec['path'] for spec in specs]
+    assert all(os.path.getsize(path) > 0 for path in paths)
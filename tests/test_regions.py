@@ -0,0 +1,23 @@
+import numpy as np
+
+import covid
+from covid._io import BAYAREA_COUNTIES
+
+
+def test_get_region_data_matches_bay_data(synthetic_data):
+    """
+    A custom region of the Bay Area counties has the same data as
+    `get_bay_data`.
+
+    """
+
+    for data_source in ['jhu', 'nytimes']:
+        bay_df = covid.get_bay_data(data_source)
+        region_df = covid.get_region_data(
+            {'Bay Area': BAYAREA_COUNTIES, 'Marin': ['Marin']}, data_source=data_source,
+        )
+        bay_region = region_df.loc['Bay Area']
+
+        np.testing.assert_array_equal(bay_region.index, bay_df.index)
+        for metric in bay_df.columns:
+            np.testing.assert_allclose(bay_region[metric], bay_df[metric], atol=1e-8)
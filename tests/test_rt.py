@@ -0,0 +1,27 @@
+import numpy as np
+
+import covid
+
+
+def test_estimate_rt_exponential_growth():
+    """
+    The Rt of cases growing exponentially at a constant rate approaches
+    the value given by the moment generating function of the serial
+    interval, and is NaN until the first window is complete.
+
+    """
+
+    growth_rate = 0.05
+    daily = np.exp(growth_rate * np.arange(120))
+    cases = np.cumsum(np.stack([daily, 2 * daily]), axis=-1)
+
+    rt = covid.estimate_rt(cases, window_days=7, si_mean=4.7, si_sd=2.9)
+
+    shape = (4.7 / 2.9)**2
+    scale = 2.9**2 / 4.7
+    expected = (1 + growth_rate * scale)**shape
+
+    assert np.isnan(rt['rt'][:, :6]).all()
+    np.testing.assert_allclose(rt['rt'][:, -30:], expected, rtol=0.01)
+    assert (rt['rt_lower'][:, 6:] < rt['rt'][:, 6:]).all()
+    assert (rt['rt'][:, 6:] < rt['rt_upper'][:, 6:]).all()
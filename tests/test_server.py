@@ -0,0 +1,91 @@
+import json
+import asyncio
+import numpy as np
+
+import covid
+from covid._metrics import _derive_reported
+
+
+async def _request(server, request):
+    """
+    Sends the raw `request` bytes to the server on a single connection,
+    returning the raw response bytes once the server closes it.
+
+    """
+
+    reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    return response
+
+def _bodies(response):
+    """
+    Splits the raw bytes of several responses into their status codes and
+    JSON bodies.
+
+    """
+
+    bodies = []
+    while response:
+        head, _, rest = response.partition(b'\r\n\r\n')
+        lines = head.decode().split('\r\n')
+        length = int([l for l in lines if l.lower().startswith('content-length')][0].split(':')[1])
+        bodies.append((int(lines[0].split()[1]), json.loads(rest[:length])))
+        response = rest[length:]
+
+    return bodies
+
+def _serve(request):
+    """
+    Starts the service on a free port, waits for the datasets to load,
+    and returns the status codes and bodies of the responses to the raw
+    `request` bytes.
+
+    """
+
+    async def _run():
+        server = await covid.start_server(port=0)
+        async with server:
+            # the first request waits for the dataset it queries to load
+            await _request(server, b'GET /series?source=nytimes&county=Marin HTTP/1.0\r\n\r\n')
+            await _request(server, b'GET /series?county=Marin HTTP/1.0\r\n\r\n')
+            return _bodies(await _request(server, request))
+
+    return asyncio.run(_run())
+
+
+def test_series_matches_plots(synthetic_data):
+    """
+    The smoothed series are derived over the reported dates only, as in
+    the plots.
+
+    """
+
+    cases, regions, dates = covid.get_cube('nytimes', county='Marin')
+    deaths = covid.get_cube('nytimes', metric='deaths', county='Marin')[0]
+    reported = ~np.isnan(cases)
+    expected = _derive_reported(cases, deaths, reported)['new_cases_filt'][0][reported[0]]
+
+    (status, body), = _serve(
+        b'GET /series?source=nytimes&county=Marin&metric=new_cases_filt HTTP/1.0\r\n\r\n',
+    )
+
+    assert status == 200
+    np.testing.assert_allclose(body['regions'][0]['values'], expected)
+
+def test_keep_alive_request_body(synthetic_data):
+    """
+    The body of a request is not parsed as the next request of a
+    kept-alive connection.
+
+    """
+
+    responses = _serve(
+        b'POST /bay HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello'
+        b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n'
+    )
+
+    assert [status for status, _ in responses] == [405, 200]
@@ -0,0 +1,27 @@
+import pandas as pd
+
+import covid
+
+
+def test_attach_shared(synthetic_data, tmp_path):
+    """
+    The attached datasets are used instead of the source files, and the
+    DataFrames built from them can be modified by the caller.
+
+    """
+
+    expected = {s: covid.get_data(s, use_cache=False) for s in ['jhu', 'nytimes']}
+
+    covid.export_shared(str(tmp_path / 'shared'))
+    covid.clear_cache()
+    try:
+        assert sorted(covid.attach_shared(str(tmp_path / 'shared'))) == ['jhu', 'nytimes']
+        for data_source, df in expected.items():
+            shared_df = covid.get_data(data_source)
+            pd.testing.assert_frame_equal(shared_df, df)
+            shared_df['cases'] *= 2
+            pd.testing.assert_frame_equal(covid.get_data(data_source), df)
+
+        assert not covid.get_cube('jhu')[0].flags.writeable
+    finally:
+        covid.detach_shared()